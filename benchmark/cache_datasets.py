@@ -0,0 +1,73 @@
+'''
+  @file cache_datasets.py
+  @author Marcus Edel
+
+  Build the binary dataset cache for all datasets in the configuration file.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from parser import *
+from dataset_cache import *
+
+import argparse
+
+'''
+Parse all csv and txt datasets of the given config and save them in the dataset
+cache.
+
+@param configfile - Build the cache for the datasets in the configuration file.
+'''
+def Main(configfile):
+  config = Parser(configfile, verbose=False)
+  streamData = config.StreamMerge()
+
+  # Collect the datasets, a dataset can be used by several methods.
+  datasets = []
+  for method, sets in streamData.items():
+    if method == "general":
+      continue
+
+    for options, libraries in sets.items():
+      for library in libraries:
+        for dataset in library[1]:
+          if isinstance(dataset, str):
+            dataset = [dataset]
+
+          for data in dataset:
+            extension = os.path.splitext(data)[1][1:]
+            if extension in ["csv", "txt"] and data not in datasets:
+              datasets.append(data)
+
+  for dataset in sorted(datasets):
+    if not os.path.isfile(dataset):
+      Log.Warn("Dataset not available: " + dataset)
+      continue
+
+    cacheFile, prefix = DatasetCache.CacheFile(dataset)
+    if os.path.isfile(cacheFile):
+      Log.Info("Cached: " + dataset)
+    else:
+      Log.Info("Cache: " + dataset)
+      DatasetCache.Build(dataset)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="""Parse the datasets of the
+      given config and save them in the dataset cache.""")
+  parser.add_argument('-c','--config', help='Configuration file name.',
+      required=True)
+
+  args = parser.parse_args()
+
+  if args:
+    Main(args.config)
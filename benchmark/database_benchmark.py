@@ -0,0 +1,184 @@
+'''
+  @file database_benchmark.py
+  @author Marcus Edel
+
+  Measure the latency of the report queries on a synthetic results table.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains
+# symlinks to modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from database import *
+
+import argparse
+import datetime
+import random
+import timeit
+
+'''
+Fill the database with synthetic records. Every build contains one result for
+every method and dataset combination.
+
+@param db - The database.
+@param rows - The number of records of the results table.
+@param libraries - The number of libraries.
+@param methods - The number of methods.
+@param datasets - The number of datasets.
+'''
+def CreateRecords(db, rows, libraries, methods, datasets):
+  db.StartBuffer()
+  for i in range(libraries):
+    db.NewLibrary("library" + str(i))
+  for i in range(methods):
+    db.NewMethod("method" + str(i), {}, "None")
+  for i in range(datasets):
+    db.NewDataset("dataset" + str(i), 1, 1, 1)
+
+  builds = max(1, rows // (methods * datasets))
+  start = datetime.datetime(2013, 1, 1)
+  for build in range(builds):
+    libaryId = build % libraries + 1
+    db.Insert("builds", (start + datetime.timedelta(hours=build), libaryId,
+        ""))
+
+    for methodId in range(1, methods + 1):
+      for datasetId in range(1, datasets + 1):
+        db.Insert("results", (build + 1, libaryId, random.random(), 0,
+            datasetId, methodId, -1, -1))
+
+    if (build + 1) % 100 == 0:
+      db.Flush()
+      Log.Info("Builds: " + str(build + 1) + " of " + str(builds))
+
+  db.StopBuffer()
+
+'''
+Measure the average latency of the given function.
+
+@param function - The function to measure.
+@param repeat - The number of calls.
+@return The average latency in milliseconds.
+'''
+def Latency(function, repeat):
+  start = timeit.default_timer()
+  for i in range(repeat):
+    function()
+  return "{0:.3f}".format((timeit.default_timer() - start) / repeat * 1000)
+
+'''
+Remove the cached build sums, so GetResultsSum aggregates all builds again.
+
+@param db - The database.
+'''
+def ClearSums(db):
+  db.con.execute("DELETE FROM build_sums")
+  db.con.commit()
+
+'''
+Measure the latency of the report queries. GetResultsSum is measured with an
+empty build sums cache and afterwards with the filled cache.
+
+@param db - The database.
+@param methods - The number of methods.
+@param datasets - The number of datasets.
+@param repeat - The number of calls of every query.
+@param full - If False skip the queries that touch every build.
+@return List with the latency of every query in milliseconds.
+'''
+def MeasureQueries(db, methods, datasets, repeat, full):
+  buildId = db.GetLatestBuildFromLibary(1)[0][0]
+  methodId = methods // 2 + 1
+  datasetId = datasets // 2 + 1
+
+  latency = []
+  latency.append(Latency(lambda: db.GetResult(buildId, 1, datasetId,
+      methodId), repeat))
+  latency.append(Latency(lambda: db.GetMethodResultsForLibary(buildId,
+      methodId), repeat))
+  latency.append(Latency(lambda: db.GetLatestBuildFromLibary(1), repeat))
+  if full:
+    ClearSums(db)
+    latency.append(Latency(lambda: db.GetResultsSum("library0"), 1))
+    latency.append(Latency(lambda: db.GetResultsSum("library0"), repeat))
+  else:
+    latency += ["-", "-"]
+
+  return latency
+
+'''
+Create the synthetic database and measure the query latency without and with
+the secondary indexes.
+
+@param database - The location of the sqlite database.
+@param rows - The number of records of the results table.
+@param repeat - The number of calls of every query.
+'''
+def Main(database, rows, repeat):
+  methods = 50
+  datasets = 20
+  libraries = 5
+
+  if not os.path.isfile(database):
+    Log.Info("Create " + str(rows) + " results: " + database)
+    if os.path.dirname(database):
+      os.makedirs(os.path.dirname(database), exist_ok=True)
+    db = Database(driver="sqlite", database=database)
+    db.CreateTables()
+    CreateRecords(db, rows, libraries, methods, datasets)
+  else:
+    db = Database(driver="sqlite", database=database)
+
+  table = [["Query", "Without indexes [ms]", "With indexes [ms]"]]
+  queries = ["GetResult", "GetMethodResultsForLibary",
+      "GetLatestBuildFromLibary", "GetResultsSum",
+      "GetResultsSum (cached sums)"]
+
+  # Drop the indexes to get the latency of the old schema.
+  for name, _, _ in Database.INDEXES:
+    db.con.execute("DROP INDEX IF EXISTS " + name)
+  db.con.execute("ANALYZE")
+
+  # GetResultsSum scans the results table once per build without the indexes,
+  # so it's only measured for small tables.
+  full = rows <= 1000000
+  Log.Info("Measure the queries without indexes.")
+  without = MeasureQueries(db, methods, datasets, repeat, full)
+
+  Log.Info("Create the indexes.")
+  db.CreateIndexes()
+  db.con.execute("ANALYZE")
+
+  Log.Info("Measure the queries with indexes.")
+  withIndexes = MeasureQueries(db, methods, datasets, repeat, True)
+
+  for row in zip(queries, without, withIndexes):
+    table.append(list(row))
+
+  Log.Notice("\n")
+  Log.PrintTable(table)
+  Log.Notice("\n")
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="""Measure the latency of the
+      report queries on a synthetic results table.""")
+  parser.add_argument('-d','--database', help="""Location of the synthetic
+      sqlite database, the database is created if it doesn't exist.""",
+      required=False, default="reports/etc/database_benchmark.db")
+  parser.add_argument('-r','--rows', help="""Number of records of the results
+      table.""", required=False, default=10000000, type=int)
+  parser.add_argument('-n','--repeat', help="""Number of calls of every
+      query.""", required=False, default=10, type=int)
+
+  args = parser.parse_args()
+
+  if args:
+    Main(args.database, args.rows, args.repeat)
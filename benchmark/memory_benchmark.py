@@ -20,9 +20,14 @@ from parser import *
 from convert import *
 from misc import *
 from database import *
+from profiler import *
+from scheduler import *
+from environment import *
 
 import argparse
-import datetime
+import collections
+import hashlib
+import json
 
 '''
 Return a list with modified dataset.
@@ -65,6 +70,68 @@ def GetDataset(dataset, format):
 
   return (datasetList, modifiedList)
 
+# A single memory profiling job: profile one method/library/dataset
+# combination and save the massif output in the given file.
+MemoryJob = collections.namedtuple("MemoryJob", ["method", "script", "dataset",
+    "options", "timeout", "output", "backend"])
+
+# The loaded scripts of the current process.
+scriptModules = {}
+
+'''
+Get the name of the massif output file of the given job. The name is derived
+from the job and the benchmark process, so concurrent jobs and concurrent
+benchmark processes never write into the same file.
+
+@param name - The name of the library.
+@param method - The name of the method.
+@param options - The options of the method.
+@param dataset - The dataset as given in the config.
+@return The absolute location of the output file.
+'''
+def MemoryOutputName(name, method, options, dataset):
+  key = json.dumps([name, method, options, dataset])
+  return os.path.abspath("reports/etc/memory_" + str(os.getpid()) + "_" +
+      hashlib.sha1(key.encode("UTF-8")).hexdigest() + ".mout")
+
+'''
+Run the given memory job. This function is called by the scheduler, so it may
+be executed in a worker process; it doesn't touch the database.
+
+@param job - The job to run.
+@return The memory series (see Profiler.MassifSeries) or None if the job
+failed.
+'''
+def RunMemoryJob(job):
+  Profiler.backend = job.backend
+
+  try:
+    if job.script not in scriptModules:
+      scriptModules[job.script] = Loader.ImportModuleFromPath(job.script)
+    methodCall = getattr(scriptModules[job.script], job.method)
+  except Exception as e:
+    Log.Fatal("Could not load the script: " + job.script)
+    Log.Fatal("Exception: " + str(e))
+    return None
+
+  try:
+    instance = methodCall(job.dataset, timeout=job.timeout, verbose=False)
+  except Exception as e:
+    Log.Fatal("Could not call the constructor: " + job.script)
+    Log.Fatal("Exception: " + str(e))
+    return None
+
+  try:
+    if instance.RunMemory(job.options, job.output) == -1:
+      return None
+    return Profiler.MassifSeries(job.output)
+  except Exception as e:
+    Log.Fatal("Exception: " + str(e))
+    return None
+  finally:
+    if os.path.isfile(job.output):
+      os.remove(job.output)
+
 '''
 Create the new memory report.
 
@@ -73,11 +140,24 @@ Create the new memory report.
 @param log - If True save the reports otherwise use stdout and print the reports.
 @param methodBlocks - Run only the specified methods.
 @param update - Update the latest memory records in the database.
+@param sampler - If True track the memory with the memory sampler instead of
+valgrind massif.
+@param workers - Number of parallel worker processes, every worker is pinned to
+its own set of cores.
 '''
-def Main(configfile, blocks, log, methodBlocks, update):
+def Main(configfile, blocks, log, methodBlocks, update, sampler=False,
+    workers=None):
+  backend = "sampler" if sampler else "massif"
+
   # Benchmark settings.
   timeout = 23000
   database = "reports/benchmark.db"
+  driver = "sqlite"
+  configWorkers = 1
+  environmentPolicy = "warn"
+  maxLoad = Environment.MAX_LOAD
+  cpus = None
+  numaNode = None
 
   # Create the folder structure.
   CreateDirectoryStructure(["reports/img", "reports/etc"])
@@ -93,15 +173,45 @@ def Main(configfile, blocks, log, methodBlocks, update):
         timeout = value
       if key == "database":
         database = value
+      if key == "driver":
+        driver = value
+      if key == "workers":
+        configWorkers = value
+      if key == "environment":
+        environmentPolicy = value
+      if key == "maxLoad":
+        maxLoad = float(value)
+      if key == "cpus":
+        cpus = str(value)
+      if key == "numaNode":
+        numaNode = value
+
+  if not workers:
+    workers = configWorkers
+
+  # Pin the benchmark to the chosen cores and check the measurement
+  # environment.
+  environment = Environment.Prepare(environmentPolicy, maxLoad, cpus, numaNode)
+  if environment is None:
+    Log.Fatal("Refuse to run the benchmark in this environment.")
+    return
+
+  # Set up the memory cgroup before the workers are started, so the workers
+  # are started in the leaf cgroup and the backend is reported once.
+  if sampler:
+    MemoryTracker.Setup()
 
   # Temporary datastructures for the current build.
   build = {}
 
   # Create database connection if the user asked for to save the reports.
   if log:
-    db = Database(database)
+    db = Database(driver=driver, database=database)
     db.CreateTables()
 
+    # Write the records of every method block in a single transaction.
+    db.StartBuffer()
+
   # Transform the blocks string to a list.
   if blocks:
     blocks = blocks.split(",")
@@ -113,11 +223,17 @@ def Main(configfile, blocks, log, methodBlocks, update):
     if not methodBlocks or method in methodBlocks:
       Log.Info("Method: " + method)
       for options, libraries in sets.items():
-        Log.Info("Options: " + (options if options != "" else "None"))
+        options = json.loads(options) if options != "" else {}
+        Log.Info("Options: " + (str(options) if options != {} else "None"))
 
         if log:
           methodId = db.GetMethod(method, options)
-          methodId = methodId[0][0] if methodId else db.NewMethod(method, options)
+          methodId = methodId[0][0] if methodId else db.NewMethod(method,
+              options, "None")
+
+        # The jobs of the method block, every job is a tuple of the library
+        # name, the dataset id, the modified datasets and the memory job.
+        jobs = []
 
         for libary in libraries:
           name = libary[0]
@@ -137,65 +253,52 @@ def Main(configfile, blocks, log, methodBlocks, update):
                 buildId = db.GetLatestBuildFromLibary(libaryId)[0][0]
                 if buildId >= 0:
                   build[name] = (buildId, libaryId)
+                  db.UpdateBuildEnvironment(buildId, environment)
                 else:
                   Log.Warn("Nothing to update.")
                   continue
               else:
-                build[name] = (db.NewBuild(libaryId), libaryId)
-
-            # Load the script.
-            try:
-              module = Loader.ImportModuleFromPath(script)
-              methodCall = getattr(module, method)
-            except Exception as e:
-              Log.Fatal("Could not load the script: " + script)
-              Log.Fatal("Exception: " + str(e))
+                build[name] = (db.NewBuild(libaryId, environment), libaryId)
+
+            for dataset in datsets:
+              datasetName = NormalizeDatasetName(dataset)
+
+              # Logging: Create a new dataset record fot this dataset.
+              datasetId = None
+              if log:
+                datasetId = db.GetDataset(datasetName)
+                datasetId = datasetId[0][0] if datasetId else db.NewDataset(*DatasetInfo(dataset))
+
+              Log.Info("Dataset: " + datasetName)
+              modifiedDataset = GetDataset(dataset, format)
+              jobs.append((name, datasetId, modifiedDataset[1], MemoryJob(
+                  method, script, modifiedDataset[0], options, timeout,
+                  MemoryOutputName(name, method, options, dataset), backend)))
+
+        scheduler = Scheduler(RunMemoryJob, workers,
+            workdir="reports/etc/memory_workers")
+        results = scheduler.Run([job[3] for job in jobs])
+        for (name, datasetId, modified, job), series in zip(jobs, results):
+          if isinstance(series, Exception):
+            Log.Fatal("Exception: " + str(series))
+            series = None
+
+          # Save the results in the database if the user asked for.
+          if series is not None and log:
+            buildId, libaryId = build[name]
+            memoryInfo = json.dumps(series, separators=(",", ":"))
+
+            if update:
+              db.UpdateMemory(buildId, libaryId, methodId, datasetId,
+                  memoryInfo)
             else:
+              db.NewMemory(buildId, libaryId, methodId, datasetId, memoryInfo)
 
-              for dataset in datsets:
-                datasetName = NormalizeDatasetName(dataset)
+          # Remove temporary datasets.
+          RemoveDataset(modified)
 
-                # Logging: Create a new dataset record fot this dataset.
-                if log:
-                  datasetId = db.GetDataset(datasetName)
-                  datasetId = datasetId[0][0] if datasetId else db.NewDataset(*DatasetInfo(dataset))
-
-                Log.Info("Dataset: " + datasetName)
-                modifiedDataset = GetDataset(dataset, format)
-
-                try:
-                  instance = methodCall(modifiedDataset[0], timeout=timeout,
-                    verbose=False)
-                except Exception as e:
-                  Log.Fatal("Could not call the constructor: " + script)
-                  Log.Fatal("Exception: " + str(e))
-                  continue
-
-                # Generate a "unique" name for the memory output file.
-                outputName = "reports/etc/" + str(hash(datetime.datetime.now())) + ".mout"
-
-                try:
-                  err = instance.RunMemory(options, outputName);
-                except Exception as e:
-                  Log.Fatal("Exception: " + str(e))
-
-                  # Remove temporary datasets.
-                  RemoveDataset(modifiedDataset[1])
-                  continue
-
-                # Save the results in the database if the user asked for.
-                if err != -1 and log:
-                  buildId, libaryId = build[name]
-
-                  if update:
-                    db.UpdateMemory(buildId, libaryId, methodId, datasetId,
-                        outputName)
-                  else:
-                    db.NewMemory(buildId, libaryId, methodId, datasetId,
-                        outputName)
-
-                # Remove temporary datasets.
-                RemoveDataset(modifiedDataset[1])
+        if log:
+          db.Flush()
 
 if __name__ == '__main__':
   parser = argparse.ArgumentParser(description="""Perform the benchmark with the
@@ -210,10 +313,18 @@ if __name__ == '__main__':
       database.""", required=False)
   parser.add_argument('-m','--methodBlocks', help="""Run only the specified
       method blocks.""", required=False)
+  parser.add_argument('-s','--sampler', help="""Track the memory with the
+      memory sampler instead of valgrind massif.""", required=False)
+  parser.add_argument('-w','--workers', help="""Number of parallel worker
+      processes, every worker is pinned to its own set of cores.""",
+      required=False)
 
   args = parser.parse_args()
 
   if args:
     log = True if args.log == "True" else False
     update = True if args.update == "True" else False
-    Main(args.config, args.blocks, log, args.methodBlocks, update)
+    sampler = True if args.sampler == "True" else False
+    workers = int(args.workers) if args.workers else None
+    Main(args.config, args.blocks, log, args.methodBlocks, update, sampler,
+        workers)
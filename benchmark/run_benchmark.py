@@ -23,6 +23,15 @@ from parser import *
 from convert import *
 from misc import *
 from database import *
+from scheduler import *
+from bootstrap import *
+from journal import *
+from result_cache import *
+from sweep import *
+from resource_usage import *
+from perf_counters import *
+from pipe_server import *
+from environment import *
 
 try:
   from irc_bot import *
@@ -33,6 +42,7 @@ except ImportError:
 import random
 import argparse
 import datetime
+import collections
 
 try:
   import simplejson
@@ -110,6 +120,296 @@ def CountLibrariesDatasets(libraries):
 
   return len(datasetList)
 
+'''
+Check if one of the changed files belongs to the given method, i.e. the name of
+the method or one of the watched files of the library block is part of the path
+of a changed file.
+
+@param method - The name of the method.
+@param files - The watched files of the library block.
+@param watchFiles - List of the changed files.
+@return True if the method is affected by the changed files.
+'''
+def Watched(method, files, watchFiles):
+  checkFiles = [method, method.lower()] + files
+  return any(checkFile in watchFile for checkFile in checkFiles
+      for watchFile in watchFiles)
+
+'''
+Get the runtimes of the given method in the given builds.
+
+@param db - The database.
+@param methodId - The method id.
+@param buildIds - The ids of the builds.
+@return Dictionary with the tuple (build id, library id, dataset id, sweep id,
+sweep step) as key and the runtime as value, the sweep step of results without
+a sweep is -1.
+'''
+def PreviousResults(db, methodId, buildIds):
+  previous = {}
+  for result in db.GetBuildsResults(buildIds, methodId):
+    previous.setdefault((result[1], result[2], result[5], result[7],
+        result[8] if result[7] != -1 else -1), result[3])
+  return previous
+
+'''
+Average the metrics of all trials. Values which aren't numbers (e.g. failures)
+are taken from the first trial.
+
+@param metrics - List of metric dictionaries, one for every trial.
+@return Dictionary with the averaged metrics.
+'''
+def AverageMetrics(metrics):
+  finalMetrics = {}
+  if len(metrics) > 0:
+    finalMetrics = metrics[0]
+    for m in range(1, len(metrics)):
+      for metricKey in metrics[m]:
+        value = metrics[m][metricKey]
+
+        if isFloat(value) or isInt(value):
+          finalMetrics[metricKey] += value
+
+  for metricKey in finalMetrics:
+    value = finalMetrics[metricKey]
+    if isFloat(value) or isInt(value):
+      finalMetrics[metricKey] /= len(metrics)
+
+      # Convert to int if possible.
+      if (finalMetrics[metricKey] == int(finalMetrics[metricKey])):
+        finalMetrics[metricKey] = int(finalMetrics[metricKey])
+
+  return finalMetrics
+
+# Two-sided 95% quantiles of the Student's t-distribution for 1 to 30 degrees of
+# freedom, for more degrees of freedom we use the normal quantile.
+T_QUANTILES = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+    2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+'''
+Compute the half-width of the 95% confidence interval of the mean relative to
+the mean.
+
+@param values - List of measurements.
+@return The relative confidence interval or None if there are not enough
+measurements.
+'''
+def RelativeConfidenceInterval(values):
+  if len(values) < 2:
+    return None
+
+  mean = sum(values) / len(values)
+  if mean <= 0:
+    return None
+
+  variance = sum((x - mean) ** 2 for x in values) / (len(values) - 1)
+  t = T_QUANTILES[len(values) - 2] if len(values) - 1 <= len(T_QUANTILES) \
+      else 1.96
+  return t * math.sqrt(variance / len(values)) / mean
+
+# Settings of the adaptive trial count: run at least minTrials and at most
+# maxTrials trials, stop as soon as the relative confidence interval of the
+# runtime is below confidence or the trials took longer than budget seconds (0
+# for no budget).
+Adaptive = collections.namedtuple("Adaptive", ["minTrials", "maxTrials",
+    "confidence", "budget"])
+
+# A single benchmark job: run all trials of one method/library/dataset/sweep
+# element combination.
+Job = collections.namedtuple("Job", ["method", "script", "dataset", "options",
+    "trials", "timeout", "tasks", "describe", "adaptive",
+    "bootstrap", "journal", "key", "perf"])
+
+# The loaded scripts of the current process.
+scriptModules = {}
+
+'''
+Run the given job. This function is called by the scheduler, so it may be
+executed in a worker process; it doesn't touch the database.
+
+@param job - The job to run.
+@return Dictionary with the method description, the averaged metrics and the
+bootstrapped metrics or None if the constructor failed.
+'''
+def RunJob(job):
+  PerfCounters.enabled = job.perf
+
+  if job.script not in scriptModules:
+    scriptModules[job.script] = Loader.ImportModuleFromPath(job.script)
+  methodCall = getattr(scriptModules[job.script], job.method)
+
+  try:
+    instance = methodCall(job.dataset, timeout=job.timeout, verbose=False)
+  except Exception as e:
+    Log.Fatal("Could not call the constructor: " + job.script)
+    Log.Fatal("Exception: " + str(e))
+    return None
+
+  # Some script define a method description, we only get the description if
+  # the database doesn't contain a description, because the scripts have to
+  # call the executable to get the description.
+  result = {"description": None, "metrics": None, "bootstrap": None}
+  if job.describe:
+    result["description"] = getattr(instance, "description", None)
+
+  if 'metric' not in job.tasks:
+    return result
+
+  metrics = []
+  runtimes = []
+  failed = False
+  start = datetime.datetime.now()
+  while True:
+    if not job.adaptive:
+      if len(metrics) >= job.trials:
+        break
+    elif len(metrics) >= job.adaptive.maxTrials:
+      break
+    elif len(metrics) >= job.adaptive.minTrials:
+      # Stop if the runtime is stable enough or the time budget is used up.
+      confidence = RelativeConfidenceInterval(runtimes)
+      elapsed = (datetime.datetime.now() - start).total_seconds()
+      if confidence is None or confidence <= job.adaptive.confidence or \
+          (job.adaptive.budget and elapsed >= job.adaptive.budget):
+        break
+
+    usage = ResourceUsage()
+    usage.Start()
+    requests = PipeServer.requests
+    currentMetric = instance.RunMetrics(copy(job.options))
+    usageMetrics = usage.Stop()
+
+    # The methods that run on a persistent server (e.g. the JVM of weka or the
+    # R session) don't use the resources of this process, so the usage would
+    # be the usage of the client.
+    if PipeServer.requests != requests:
+      usageMetrics = {}
+
+    if type(currentMetric) is not dict and currentMetric == -2:
+      # Timout failure.
+      metrics = [{ 'Runtime' :  ">" + str(job.timeout)}]
+      failed = True
+      break
+    elif type(currentMetric) is not dict and currentMetric < 0:
+      # Runtime exception.
+      metrics = [{ 'Runtime' :  "failure"}]
+      failed = True
+      break
+    else:
+      # Add the resource usage, the usage the script measured itself (e.g. of
+      # the executable) is more accurate.
+      for key, value in usageMetrics.items():
+        currentMetric.setdefault(key, value)
+
+      # Append new data.
+      metrics.append(currentMetric)
+      if 'Runtime' in currentMetric and isFloat(currentMetric['Runtime']):
+        runtimes.append(float(currentMetric['Runtime']))
+
+  trials = len(metrics)
+
+  # Resample the trials before they are averaged, AverageMetrics() modifies the
+  # first trial.
+  if job.bootstrap and not failed:
+    result["bootstrap"] = Bootstrap.Metrics(metrics, job.bootstrap)
+
+  result["metrics"] = AverageMetrics(metrics)
+
+  # Store the number of trials and the achieved confidence interval next to the
+  # metrics.
+  if job.adaptive and not failed:
+    result["metrics"]['Trials'] = trials
+    confidence = RelativeConfidenceInterval(runtimes)
+    if confidence is not None:
+      result["metrics"]['RuntimeCI'] = confidence
+
+  return result
+
+'''
+Run the given job and record the state of the job in the journal. If the job
+crashes the journal still says 'running', so the job is run again when the
+benchmark is resumed.
+
+@param job - The job to run.
+@return The result of the job (see RunJob).
+'''
+def RunJournaledJob(job):
+  journal = Journal(job.journal)
+  journal.Update(job.key, "running")
+  result = RunJob(job)
+  journal.Update(job.key, "done", result)
+  return result
+
+'''
+Get the results of the given jobs. The jobs that are done according to the
+journal of the resumed run aren't run again, their result is taken from the
+journal.
+
+@param jobs - List of jobs.
+@param journaled - Dictionary with the job key as key and a tuple of the state
+and the result as value.
+@param workers - Number of parallel worker processes.
+@return Generator that yields the results in the order of the given jobs.
+'''
+def RunJobs(jobs, journaled, workers):
+  finished = ("done", "recorded")
+  pending = [job for job in jobs if journaled.get(job.key, ("pending",))[0]
+      not in finished]
+  if len(pending) < len(jobs):
+    Log.Info("Skip " + str(len(jobs) - len(pending)) + " of " + str(len(jobs)) +
+        " jobs, the results are taken from the journal or the result cache.")
+
+  scheduler = Scheduler(RunJournaledJob, workers)
+  results = scheduler.Run(pending)
+  try:
+    for job in jobs:
+      state = journaled.get(job.key, ("pending",))
+      if state[0] in finished:
+        yield state[1]
+      else:
+        yield next(results)
+  finally:
+    results.close()
+
+'''
+Refine the given adaptive sweeps. The sweeps are refined in rounds, the points of
+a round are measured in parallel and the results are kept in the journal, so the
+points aren't measured again when the jobs are run.
+
+@param adaptiveSweeps - List of tuples that contain the sweep, the jobs of all
+grid points (job and context) and the list that receives the jobs of the
+measured points, in the order of the grid.
+@param journaled - Dictionary with the job key as key and a tuple of the state
+and the result as value, the results of the measured points are added.
+@param workers - Number of parallel worker processes.
+'''
+def RefineSweeps(adaptiveSweeps, journaled, workers):
+  values = [{} for sweep in adaptiveSweeps]
+  steps = [sweep.Initial() for sweep, candidates, selected in adaptiveSweeps]
+
+  while any(steps):
+    points = [(i, step) for i in range(len(adaptiveSweeps))
+        for step in steps[i]]
+    Log.Info("Measure " + str(len(points)) + " points of the adaptive sweeps.")
+
+    jobs = [adaptiveSweeps[i][1][step][0] for i, step in points]
+    for (i, step), job, result in zip(points, jobs,
+        RunJobs(jobs, journaled, workers)):
+      journaled[job.key] = ("done", result)
+
+      value = None
+      if result and not isinstance(result, Exception) and result["metrics"]:
+        value = result["metrics"].get(adaptiveSweeps[i][0].metric)
+      values[i][step] = float(value) if value is not None and \
+          isFloat(value) else None
+
+    steps = [sweep.Refine(values[i]) for i, (sweep, candidates, selected) in
+        enumerate(adaptiveSweeps)]
+
+  for i, (sweep, candidates, selected) in enumerate(adaptiveSweeps):
+    selected[:] = [candidates[step] for step in sorted(values[i])]
+
 '''
 Start the main benchmark routine. The method shows some DEBUG information and
 prints a runtime information table.
@@ -119,17 +419,38 @@ prints a runtime information table.
 @param log - If True save the reports otherwise use stdout and print the reports.
 @param methodBlocks - Run only the specified methods.
 @param update - Update the records in the database.
+@param workers - Number of parallel worker processes, every worker is pinned to
+its own set of cores (None to use the value from the config).
+@param resume - Resume the last run with the same config, the jobs that are done
+according to the journal are skipped.
+@param force - Run every job, even if the result of the job is in the result
+cache.
+@param perf - Measure the hardware performance counters of the benchmark
+executables with perf stat.
 '''
 def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
-    databaseUser, databasePassword):
+    databaseUser, databasePassword, workers=None, resume=False, force=False,
+    perf=False):
   # Benchmark settings.
   timeout = 23000
   database = "reports/benchmark.db"
   driver = "sqlite"
   databaseHost = None
   databasePort = 3306
+  configWorkers = 1
+  adaptive = False
+  minTrials = 3
+  maxTrials = 30
+  confidence = 0.05
+  trialBudget = 0
 
   bootstrapCount = 10
+  libraryNames = []
+  libraryVersions = []
+  environmentPolicy = "warn"
+  maxLoad = Environment.MAX_LOAD
+  cpus = None
+  numaNode = None
 
   watchFiles = watchFiles.split()
 
@@ -171,6 +492,58 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
         databasePassword = value
       if key == "port":
         databasePort = value
+      if key == "workers":
+        configWorkers = value
+      if key == "adaptive":
+        adaptive = value
+      if key == "minTrials":
+        minTrials = value
+      if key == "maxTrials":
+        maxTrials = value
+      if key == "confidence":
+        confidence = value
+      if key == "trialBudget":
+        trialBudget = value
+      if key == "libraries":
+        libraryNames = value
+      if key == "version":
+        libraryVersions = value
+      if key == "perf":
+        perf = perf or str(value) == "True"
+      if key == "environment":
+        environmentPolicy = value
+      if key == "maxLoad":
+        maxLoad = float(value)
+      if key == "cpus":
+        cpus = str(value)
+      if key == "numaNode":
+        numaNode = value
+
+  if not workers:
+    workers = configWorkers
+
+  # Pin the benchmark to the chosen cores, the workers split these cores, and
+  # check the measurement environment.
+  environment = Environment.Prepare(environmentPolicy, maxLoad, cpus, numaNode)
+  if environment is None:
+    Log.Fatal("Refuse to run the benchmark in this environment.")
+    return
+
+  # Measure the performance counters only if perf can be used.
+  if perf and not PerfCounters.Available():
+    perf = False
+
+  # The version of every library, used to check if a cached result is still
+  # valid.
+  versions = dict(zip(libraryNames, libraryVersions))
+
+  # Use the adaptive trial count instead of the iteration count of the
+  # libraries.
+  if adaptive:
+    adaptive = Adaptive(max(1, minTrials), max(1, minTrials, maxTrials),
+        confidence, trialBudget)
+  else:
+    adaptive = None
 
   # Create database connection if the user asked for to save the reports.
   if log:
@@ -178,18 +551,57 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
         user=databaseUser, password=databasePassword, port=databasePort)
     db.CreateTables()
 
+    # Write the records of every method block in a single transaction.
+    db.StartBuffer()
+
   if irc_available and ircData:
     ircBOT = IRCBot(ircData[0], ircData[1], ircData[2])
     watchMessages = []
 
+  # Every config and database has its own journal, a journal that is used by
+  # a running benchmark isn't touched.
+  journal = Journal(Journal.Path(configfile, database if log else None))
+  owner = journal.Owner()
+  if owner is not None:
+    Log.Fatal("The benchmark process " + str(owner) + " runs with the same "
+        "config and database (" + journal.path + ").")
+    return
+
+  # Load the journal of the interrupted run, the run is only resumed with the
+  # same config and database.
+  journaled = {}
+  journaledBuilds = {}
+  resumed = False
+  if resume:
+    loaded = journal.Load()
+    if loaded and loaded[0]["config"] == os.path.abspath(configfile) and \
+        loaded[0]["database"] == (database if log else None) and \
+        journal.Resume(loaded[0]):
+      journaledBuilds = loaded[0]["builds"]
+      journaled = loaded[1]
+      resumed = True
+    else:
+      Log.Warn("No journal of an interrupted run with this config, start a new "
+          "run.")
+
   # Transform the blocks string to a list.
   if blocks:
     blocks = blocks.split(",")
 
   # Temporary datastructures for the current build.
   build = {}
-
-  # Iterate through all libraries.
+  buildPrevious = {}
+
+  # The method blocks, every block contains the jobs and the result table.
+  methodBlockList = []
+  # The adaptive sweeps, the sweep, the candidate jobs and the selected jobs.
+  adaptiveSweeps = []
+  # Temporary datasets, we remove them after all jobs are finished.
+  modifiedDatasets = []
+
+  # Expand the config into a flat list of independent jobs. Everything that
+  # touches the database is done here or after the job is finished, so the
+  # jobs can run in parallel.
   for method, sets in streamData.items():
     if method == "general":
       continue
@@ -205,11 +617,14 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
 
         Log.Info("Options: " + (str(options) if options != {} else "None"))
 
+        methodId = None
+        describe = False
         if log:
           methodId = db.GetMethod(method, options)
           methodId = methodId[0][0] if methodId else db.NewMethod(method,
                                                                   options,
                                                                   "None")
+          describe = not db.GetMethodInfo(methodId)
 
         # Create the result table.
         table = []
@@ -227,12 +642,17 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
         dataMatrixPrevious = [['-' for x in range(len(libraries) + 1)] for x in
             range(datasetCount)]
 
-        #Dictionary which will contain key as the library name and value as
-        #a dictionary of metrics for the current method
-        method_dict = {}
+        # Create the matrix which contains the hardware performance counters.
+        counterMatrix = [['-' for x in range(len(libraries) + 1)] for x in
+            range(datasetCount)]
+
+        methodBlock = {"method": method, "options": options,
+            "methodId": methodId, "table": table, "dataMatrix": dataMatrix,
+            "dataMatrixPrevious": dataMatrixPrevious,
+            "counterMatrix": counterMatrix, "jobs": [], "run": 0, "tasks": []}
+        methodBlockList.append(methodBlock)
 
         col = 1
-        run = 0
         for library in libraries:
           name = library[0]
           datasets = library[1]
@@ -243,15 +663,23 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
           alias = library[6]
           files = library[7]
 
+          methodBlock["tasks"] = tasks
+
           if log:
             db.UpdateMethod(methodId, alias)
 
           header.append(name)
 
           if not blocks or name in blocks:
-            run += 1
+            methodBlock["run"] += 1
             Log.Info("Library: " + name)
 
+            # Logging: use the builds of the interrupted run.
+            if log and name not in build and name in journaledBuilds:
+              build[name] = tuple(journaledBuilds[name]["build"])
+              buildPrevious[name] = [tuple(b) for b in
+                  journaledBuilds[name]["previous"]]
+
             # Logging: create a new build and library record for this library.
             if log and name not in build:
               libraryId = db.GetLibrary(name)
@@ -261,7 +689,7 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
                 if new:
                   buildId = db.GetLatestBuildFromLibary(libraryId)[0][0]
                   if buildId:
-                    newBuildId = db.NewBuild(libraryId)
+                    newBuildId = db.NewBuild(libraryId, environment)
                     db.CopyLatestBuildFromLibary(buildId, newBuildId)
 
                 buildId = db.GetLatestBuildFromLibary(libraryId)
@@ -273,312 +701,442 @@ def Main(configfile, blocks, log, methodBlocks, update, watchFiles, new,
                   else:
                     buildId = buildId[0]
 
-                buildIdPrevious = [(buildId,)]
+                buildPrevious[name] = [(buildId,)]
 
                 if buildId:
                   build[name] = (buildId, libraryId)
+                  db.UpdateBuildEnvironment(buildId, environment)
                 else:
                   Log.Warn("Nothing to update.")
                   continue
               else:
                 if db.GetLatestBuildFromLibary(libraryId)[0][0] <= 0:
-                  buildIdPrevious = [(1,)]
+                  buildPrevious[name] = [(1,)]
                 else:
-                  buildIdPrevious = db.GetLatestBuildFromLibary(libraryId)
+                  buildPrevious[name] = db.GetLatestBuildFromLibary(libraryId)
 
-                build[name] = (db.NewBuild(libraryId), libraryId)
+                build[name] = (db.NewBuild(libraryId, environment), libraryId)
 
-            # Load the script.
-            try:
-              module = Loader.ImportModuleFromPath(script)
-              methodCall = getattr(module, method)
-            except Exception as e:
-              Log.Fatal("Could not load the script: " + script)
-              Log.Fatal("Exception: " + str(e))
+            # Resolve the watch filter before the script is loaded, so only the
+            # jobs of the methods whose files changed are created.
+            watched = 'watch' not in tasks or not log or \
+                Watched(method, files, watchFiles)
+            if not watched:
+              Log.Info("No watched file changed: " + name)
             else:
-              for dataset in datasets:
-                datasetName = NormalizeDatasetName(dataset)
-                row = FindRightRow(dataMatrix, datasetName, datasetCount)
-
-                # Logging: Create a new dataset record fot this dataset.
-                if log:
-                  datasetId = db.GetDataset(datasetName)
-                  datasetId = datasetId[0][0] if datasetId else db.NewDataset(*DatasetInfo(dataset))
-
-                dataMatrix[row][0] = datasetName
-                dataMatrixPrevious[row][0] = datasetName
-
-                Log.Info("Dataset: " + dataMatrix[row][0])
-
-                modifiedDataset = GetDataset(dataset, format)
-
-                # Do we need to do any sweeps?
-                sweep = ["sweep" in str(v) for k, v in
-                    options.items()].count(True) > 0
-                if sweep:
-                  # Parse the sweep.
-                  for k, v in options.items():
-                    if "sweep" in str(v):
-                      p = re.compile(r"sweep\([ \t]*(?P<begin>[-0-9.e]*),[ \t]*"
-                          "(?P<step>[-0-9.e]*)[ \t]*,[ \t]*"
-                          "(?P<end>[-0-9.e]*)[ \t]*\)")
-                      m = p.match(str(v))
-                      sweep_begin = m.group("begin")
-                      sweep_step = m.group("step")
-                      sweep_end = m.group("end")
-                      sweep_name = k
-                      # Get the type of the sweep.
-                      def sweepType(sweep_begin, sweep_step, sweep_end):
-                        try:
-                          a = int(sweep_begin)
-                          b = int(sweep_step)
-                          c = int(sweep_end)
-                          return 'int'
-                        except ValueError:
-                          try:
-                            a = float(sweep_begin)
-                            b = float(sweep_step)
-                            c = float(sweep_end)
-                            return 'float'
-                          except ValueError:
-                            Log.Fatal("cannot parse sweep: " + str(v))
-                            raise Exception("cannot parse sweep")
-
-                      sweep_type = sweepType(sweep_begin, sweep_step, sweep_end)
-                      break
-
-                  sweep_len = math.ceil((float(sweep_end) - float(sweep_begin)) /
-                      float(sweep_step)) + 1
-                  # Get a sweep id.
-                  if log:
-                    sweep_id = db.GetSweep(sweep_type, sweep_begin, sweep_step,
-                        sweep_end)
-                    sweep_id = sweep_id[0][0] if sweep_id else \
-                        db.NewSweep(sweep_type, sweep_begin, sweep_step, sweep_end)
-                else:
-                  sweep_len = 1
-                  if log:
-                    sweep_id = -1
+              # Load the script.
+              try:
+                module = Loader.ImportModuleFromPath(script)
+                methodCall = getattr(module, method)
+              except Exception as e:
+                Log.Fatal("Could not load the script: " + script)
+                Log.Fatal("Exception: " + str(e))
+              else:
+                for dataset in datasets:
+                  datasetName = NormalizeDatasetName(dataset)
+                  row = FindRightRow(dataMatrix, datasetName, datasetCount)
 
-                for sweep_elem in range(sweep_len):
-                  # Generate the options.
-                  run_options = copy(options)
-                  if sweep:
-                    # Modify option value.
-                    def to_num(s):
-                      try:
-                        return int(s)
-                      except ValueError:
-                        return float(s)
-
-                    run_options[sweep_name] = to_num(sweep_begin) + \
-                        to_num(sweep_step) * sweep_elem
-                    Log.Info("- Sweep step " + str(sweep_elem + 1) + " of "
-                        + str(sweep_len) + " (" + sweep_name + ": "
-                        + str(run_options[sweep_name]) + ")")
-
-                  try:
-                    instance = methodCall(modifiedDataset[0], timeout=timeout,
-                        verbose=False)
-                  except Exception as e:
-                    Log.Fatal("Could not call the constructor: " + script)
-                    Log.Fatal("Exception: " + str(e))
-                    continue
-
-                  # Logging: Add method information record.
+                  # Logging: Create a new dataset record fot this dataset.
+                  datasetId = None
                   if log:
-                    try:
-                      # Some script define a method description, if
-                      # the description is set, save this in the database.
-                      methodDescription = instance.description
-                    except AttributeError:
-                      pass
-                    else:
-                      # Only store the description in the databse if there isn't
-                      # a description.
-                      if methodDescription and not db.GetMethodInfo(methodId):
-                        db.NewMethodInfo(methodId, methodDescription)
-
-                  if 'watch' in tasks and log:
-                    watchCheck = False
-                    checkFiles = [method, method.lower()] + files
-
-                    for checkFile in checkFiles:
-                      for watchFile in watchFiles:
-                        if checkFile in watchFile:
-                          watchCheck = True
-                          break;
-
-                    if not watchCheck:
-                      continue
-
-                  if 'metric' in tasks:
-                    metrics = []
-
-                    for trial in range(trials):
-                      try:
-                        currentMetric = instance.RunMetrics(copy(run_options))
-
-                        if type(currentMetric) is not dict and currentMetric == -2:
-                          # Timout failure.
-                          metrics = [{ 'Runtime' :  ">" + str(timeout)}]
-                          break
-                        elif type(currentMetric) is not dict and currentMetric < 0:
-                          # Runtime exception.
-                          metrics = [{ 'Runtime' :  "failure"}]
-                          break
-                        else:
-                          # Append new data.
-                          metrics.append(currentMetric)
-                      except Exception as e:
-                        Log.Fatal("Exception: " + str(e))
-                        raise e
-
-                    finalMetrics = {}
-                    if len(metrics) > 0:
-                      finalMetrics = metrics[0]
-                      for m in range(1, len(metrics)):
-                        for metricKey in metrics[m]:
-                          value = metrics[m][metricKey]
-
-                          if isFloat(value) or isInt(value):
-                            finalMetrics[metricKey] += value
-
-                    for metricKey in finalMetrics:
-                      value = finalMetrics[metricKey]
-                      if isFloat(value) or isInt(value):
-                        finalMetrics[metricKey] /= len(metrics)
-
-                        # Convert to int if possible.
-                        if (finalMetrics[metricKey] == int(finalMetrics[metricKey])):
-                          finalMetrics[metricKey] = int(finalMetrics[metricKey])
-
-                    # Update the Runtime matrix view.
-                    if 'Runtime' in finalMetrics:
-                      if ">" in str(finalMetrics['Runtime']):
-                        # Runtime timeout.
-                        dataMatrix[row][col] = -1
-                      elif "failure" == str(finalMetrics['Runtime']):
-                        # Runtime failure.
-                        dataMatrix[row][col] = -2
-                      elif isFloat(finalMetrics['Runtime']):
-                        # Truncate to specified precision.
-                        if sweep_elem == 0:
-                          dataMatrix[row][col] = "{0:.6f}".format(finalMetrics['Runtime'])
-                        elif sweep_elem == sweep_len - 1:
-                          dataMatrix[row][col] = dataMatrix[row][col] + \
-                              "-{0:.6f}".format(finalMetrics['Runtime'])
-                      else:
-                        # Integer, no need to specify the precision.
-                        if sweep_elem == 0:
-                          dataMatrix[row][col] = str(finalMetrics['Runtime'])
-                        elif sweep_elem == sweep_len - 1:
-                          dataMatrix[row][col] = dataMatrix[row][col] + "-" + \
-                              str(finalMetrics['Runtime'])
+                    datasetId = db.GetDataset(datasetName)
+                    datasetId = datasetId[0][0] if datasetId else db.NewDataset(*DatasetInfo(dataset))
+
+                  dataMatrix[row][0] = datasetName
+                  dataMatrixPrevious[row][0] = datasetName
+                  counterMatrix[row][0] = datasetName
 
+                  Log.Info("Dataset: " + dataMatrix[row][0])
+
+                  modifiedDataset = GetDataset(dataset, format)
+                  modifiedDatasets.append(modifiedDataset[1])
+
+                  # Do we need to do any sweeps? Every point of the sweep is
+                  # a job of its own, so the points run in parallel.
+                  sweep = Sweep.Parse(options)
+                  sweep_id = -1
+                  if sweep:
+                    points = sweep.Points()
+                    # Get a sweep id.
                     if log:
-                      buildID, libraryID = build[name]
-
-                      if update:
-                        try:
-                          # Update metric data.
-                          db.UpdateMetricResult(buildID, libraryID,
-                              simplejson.dumps(finalMetrics), datasetId,
-                              methodId, sweep_id, sweep_elem)
-
-                          # Update runtime data.
-                          db.UpdateResult(buildID, libraryID,
-                              finalMetrics['Runtime'], 0, datasetId, methodId,
-                              sweep_id, sweep_elem)
-                        except Exception:
-                          pass
+                      sweep_id = db.GetSweep(*sweep.Record())
+                      if sweep_id:
+                        sweep_id = sweep_id[0][0]
                       else:
-                        # Add new metric results.
-                        db.NewMetricResult(buildID, libraryID,
-                            simplejson.dumps(finalMetrics), datasetId, methodId,
-                            sweep_id, sweep_elem)
-
-                        # Add new runtime results.
-                        db.NewResult(buildID, libraryID, finalMetrics['Runtime'],
-                            0, datasetId, methodId, sweep_id, sweep_elem)
-
-                    if 'watch' in tasks and log:
-                      for prevbuildID in buildIdPrevious:
-                        resultsPrevious = db.GetResult(prevbuildID[0], libraryID,
-                            datasetId, methodId, sweep_id, sweep_elem)
-                        if (resultsPrevious and resultsPrevious[0][3] != '-'):
-                          break
-
-                      if resultsPrevious:
-                        dataMatrixPrevious[row][col] = str(resultsPrevious[0][3])
-
-                # Remove temporary datasets.
-                RemoveDataset(modifiedDataset[1])
+                        sweep_id = db.NewSweep(*sweep.Record())
+                        db.NewSweepPoints(sweep_id, points)
+                  else:
+                    points = [{}]
+                  sweep_len = len(points)
+
+                  # The jobs of an adaptive sweep are candidates, the jobs of
+                  # the measured points are added to the method block after the
+                  # sweep is refined.
+                  blockJobs = methodBlock["jobs"]
+                  if sweep and sweep.plan == "adaptive":
+                    blockJobs = []
+                    selected = []
+                    adaptiveSweeps.append((sweep, blockJobs, selected))
+                    methodBlock["jobs"].append(selected)
+
+                  for sweep_elem in range(sweep_len):
+                    # Generate the options.
+                    run_options = Sweep.Options(options, points[sweep_elem])
+
+                    job = Job(method, script, modifiedDataset[0], run_options,
+                        trials, timeout, tasks, describe, adaptive,
+                        bootstrapCount if 'bootstrap' in tasks else 0,
+                        journal.path, Journal.Key(name, method, run_options,
+                        dataset, sweep_elem, trials), perf)
+                    # Only the metrics are cached, the results without the
+                    # performance counters keep their key.
+                    cacheKey = None
+                    if 'metric' in tasks:
+                      settings = [method, run_options, trials, timeout, tasks,
+                          adaptive, job.bootstrap]
+                      if perf:
+                        settings.append("perf")
+                      cacheKey = ResultCache.Key(versions.get(name), script,
+                          dataset, settings)
+
+                    context = {"name": name, "col": col, "row": row,
+                        "datasetId": datasetId, "sweep_id": sweep_id,
+                        "sweep_elem": sweep_elem, "sweep_len": sweep_len,
+                        "sweep": sweep, "cacheKey": cacheKey}
+                    blockJobs.append((job, context))
           col += 1
-        # Show the results.
-        if not log and run > 0:
-          Log.Notice("\n\n")
-          Log.PrintTable(AddMatrixToTable(dataMatrix, table))
-          Log.Notice("\n\n")
-          run = 0
 
-        if 'watch' in tasks and log:
-          Log.Notice("\n\n")
-          Log.PrintTable(AddMatrixToTable(dataMatrix, table))
+  jobs = [item[0] for methodBlock in methodBlockList
+      for item in methodBlock["jobs"] if isinstance(item, tuple)]
+
+  # Start a new journal, the builds are saved so a resumed run writes into the
+  # same builds.
+  if not resumed and not journal.Start({"config": os.path.abspath(configfile),
+      "database": database if log else None,
+      "builds": dict((name, {"build": build[name],
+      "previous": buildPrevious[name]}) for name in build)},
+      [job.key for job in jobs]):
+    Log.Fatal("Another benchmark process started with the same config and "
+        "database (" + journal.path + ").")
+    return
+
+  # Take the results of the unchanged jobs from the result cache, the results
+  # are copied into the new build.
+  cachedJobs = set()
+  if not force:
+    cached = []
+    candidates = [item for methodBlock in methodBlockList
+        for item in methodBlock["jobs"] if isinstance(item, tuple)] + \
+        [candidate for sweep, sweepJobs, selected in adaptiveSweeps
+        for candidate in sweepJobs]
+    for job, context in candidates:
+      if journaled.get(job.key, ("pending",))[0] in ("done", "recorded"):
+        continue
+
+      result = ResultCache.Get(context["cacheKey"])
+      if result is not None:
+        journaled[job.key] = ("done", result)
+        cachedJobs.add(job.key)
+        cached.append({"key": job.key, "state": "done", "result": result})
+
+    journal.Write(cached)
+    if cached:
+      Log.Info("Use the cached results of " + str(len(cached)) + " jobs.")
+
+  # Measure the points of the adaptive sweeps and add their jobs to the method
+  # blocks.
+  if adaptiveSweeps:
+    RefineSweeps(adaptiveSweeps, journaled, workers)
+    for methodBlock in methodBlockList:
+      methodBlock["jobs"] = [jobContext for item in methodBlock["jobs"]
+          for jobContext in (item if isinstance(item, list) else [item])]
+    jobs = [job for methodBlock in methodBlockList
+        for job, context in methodBlock["jobs"]]
+
+  # Run the jobs, the results are returned in the order of the jobs, so the
+  # result tables and the database records are the same as in a serial run.
+  results = RunJobs(jobs, journaled, workers)
+
+  # The jobs whose records are buffered but not yet saved in the database.
+  unrecorded = []
+  # The new results for the result cache.
+  cacheResults = {}
+
+  try:
+    for methodBlock in methodBlockList:
+      method = methodBlock["method"]
+      options = methodBlock["options"]
+      methodId = methodBlock["methodId"]
+      table = methodBlock["table"]
+      dataMatrix = methodBlock["dataMatrix"]
+      dataMatrixPrevious = methodBlock["dataMatrixPrevious"]
+      counterMatrix = methodBlock["counterMatrix"]
+      tasks = methodBlock["tasks"]
 
-          resultsMessage = method
-          if options:
-            resultsMessage += " (" + options + ")"
-
-          resultsMessage += " | "
-          for result in zip(dataMatrixPrevious, dataMatrix):
-            if result[0][1] != '-' and result[1][1] != '-':
+      Log.Info("Method: " + method)
+      Log.Info("Options: " + (str(options) if options != {} else "None"))
+
+      # The bootstrapped metrics of the libraries for every dataset and sweep
+      # element.
+      bootstrapResults = collections.OrderedDict()
+
+      # The results of the latest previous build of every library, loaded with
+      # a single query. Older builds are only loaded if a job isn't in the
+      # latest build.
+      previousResults = {}
+      previousBuilds = set()
+      if 'watch' in tasks and log and methodBlock["jobs"]:
+        previousBuilds = set(buildPrevious[context["name"]][0][0]
+            for job, context in methodBlock["jobs"]
+            if buildPrevious[context["name"]])
+        previousResults = PreviousResults(db, methodId, previousBuilds)
+
+      for job, context in methodBlock["jobs"]:
+        name = context["name"]
+        row = context["row"]
+        col = context["col"]
+        datasetId = context["datasetId"]
+        sweep_id = context["sweep_id"]
+        sweep_elem = context["sweep_elem"]
+        sweep_len = context["sweep_len"]
+
+        result = next(results)
+
+        if context["sweep"]:
+          Log.Info("- Sweep step " + str(sweep_elem + 1) + " of "
+              + str(sweep_len) + " (" + context["sweep"].Describe(job.options)
+              + ")")
+
+        if isinstance(result, Exception):
+          Log.Fatal("Exception: " + str(result))
+          raise result
+
+        # The constructor failed.
+        if result is None:
+          continue
+
+        # Only the measured results are added to the cache, the cached
+        # results keep their age.
+        if context["cacheKey"] and job.key not in cachedJobs and \
+            ResultCache.Cacheable(result):
+          cacheResults[context["cacheKey"]] = result
+
+        # The records of the job are already saved by the interrupted run.
+        recorded = journaled.get(job.key, ("pending",))[0] == "recorded"
+        if log and not recorded:
+          unrecorded.append(job.key)
+
+        # Logging: Add method information record.
+        if log:
+          # Some script define a method description, if the description is
+          # set, save this in the database.
+          methodDescription = result["description"]
+
+          # Only store the description in the databse if there isn't a
+          # description.
+          if methodDescription and not db.GetMethodInfo(methodId):
+            db.NewMethodInfo(methodId, methodDescription)
+
+        if 'metric' not in job.tasks:
+          continue
+
+        finalMetrics = result["metrics"]
+
+        # Update the Runtime matrix view.
+        if 'Runtime' in finalMetrics:
+          if ">" in str(finalMetrics['Runtime']):
+            # Runtime timeout.
+            dataMatrix[row][col] = -1
+          elif "failure" == str(finalMetrics['Runtime']):
+            # Runtime failure.
+            dataMatrix[row][col] = -2
+          elif isFloat(finalMetrics['Runtime']):
+            # Truncate to specified precision.
+            if sweep_elem == 0:
+              dataMatrix[row][col] = "{0:.6f}".format(finalMetrics['Runtime'])
+            elif sweep_elem == sweep_len - 1:
+              dataMatrix[row][col] = dataMatrix[row][col] + \
+                  "-{0:.6f}".format(finalMetrics['Runtime'])
+          else:
+            # Integer, no need to specify the precision.
+            if sweep_elem == 0:
+              dataMatrix[row][col] = str(finalMetrics['Runtime'])
+            elif sweep_elem == sweep_len - 1:
+              dataMatrix[row][col] = dataMatrix[row][col] + "-" + \
+                  str(finalMetrics['Runtime'])
+
+        # The counters of a sweep are shown for the first sweep step.
+        if perf and sweep_elem == 0:
+          counterMatrix[row][col] = PerfCounters.Summary(finalMetrics)
 
-              # Increase the number of benchmark results for the summary.
-              summaryBenchmarks += 1
+        if log:
+          buildID, libraryID = build[name]
+
+          if recorded:
+            pass
+          elif update:
+            # Update metric data.
+            db.UpdateMetricResult(buildID, libraryID,
+                simplejson.dumps(finalMetrics), datasetId, methodId,
+                sweep_id, sweep_elem)
+
+            # Update runtime data.
+            db.UpdateResult(buildID, libraryID, finalMetrics['Runtime'],
+                0, datasetId, methodId, sweep_id, sweep_elem)
+          else:
+            # Add new metric results.
+            db.NewMetricResult(buildID, libraryID,
+                simplejson.dumps(finalMetrics), datasetId, methodId,
+                sweep_id, sweep_elem)
+
+            # Add new runtime results.
+            db.NewResult(buildID, libraryID, finalMetrics['Runtime'],
+                0, datasetId, methodId, sweep_id, sweep_elem)
+
+        if result["bootstrap"]:
+          bootstrapResults.setdefault((row, sweep_elem), []).append(
+              (name, result["bootstrap"], datasetId, sweep_id, sweep_elem))
 
-              # Truncate to specified precision.
-              if isFloat(result[0][1]):
-                timeOld = "{0:.2f}".format(float(result[0][1]))
-              else:
-                timeOld = result[0][1]
+        if 'watch' in tasks and log:
+          # Use the result of the latest previous build that contains the job.
+          for prevbuildID in buildPrevious[name]:
+            if prevbuildID[0] not in previousBuilds:
+              previousResults.update(PreviousResults(db, methodId,
+                  [prevbuildID[0]]))
+              previousBuilds.add(prevbuildID[0])
+
+            resultPrevious = previousResults.get((prevbuildID[0], libraryID,
+                datasetId, sweep_id, sweep_elem if sweep_id != -1 else -1))
+            if resultPrevious is not None and resultPrevious != '-':
+              dataMatrixPrevious[row][col] = str(resultPrevious)
+              break
+
+      # Normalize the bootstrapped metrics of the libraries for every dataset and
+      # save them together with the normalized scores.
+      blockRecorded = all(journaled.get(job.key, ("pending",))[0] == "recorded"
+          for job, context in methodBlock["jobs"])
+      scores = []
+      for bootstrapResult in bootstrapResults.values():
+        normalized = Bootstrap.Normalize(
+            dict((r[0], r[1]) for r in bootstrapResult))
+        scores.append(normalized)
+
+        for name, bootstrapMetrics, datasetId, sweep_id, sweep_elem in \
+            bootstrapResult:
+          for key in bootstrapMetrics:
+            bootstrapMetrics[key]["Score"] = normalized[name][key]
+
+          # The interrupted run saved the bootstrap records only if it finished
+          # the method block.
+          if log and not blockRecorded:
+            buildID, libraryID = build[name]
+            if update:
+              db.UpdateBootstrapResult(buildID, libraryID,
+                  simplejson.dumps(bootstrapMetrics), datasetId, methodId,
+                  sweep_id, sweep_elem)
+            else:
+              db.NewBootstrapResult(buildID, libraryID,
+                  simplejson.dumps(bootstrapMetrics), datasetId, methodId,
+                  sweep_id, sweep_elem)
+
+      if scores:
+        methodName = method
+        if options:
+          methodName += " (" + json.dumps(options) + ")"
+
+        bootstrapped_method_dict[methodName] = Bootstrap.AverageScores(scores)
+        Log.PrintMethodDictionary(methodName,
+            bootstrapped_method_dict[methodName])
+
+      # Show the results.
+      if not log and methodBlock["run"] > 0:
+        Log.Notice("\n\n")
+        Log.PrintTable(AddMatrixToTable(dataMatrix, table))
+        Log.Notice("\n\n")
+
+      # Show the hardware performance counters.
+      if perf and methodBlock["run"] > 0:
+        Log.Notice("Hardware performance counters:")
+        Log.PrintTable(AddMatrixToTable(counterMatrix, [table[0]]))
+        Log.Notice("\n\n")
+
+      if 'watch' in tasks and log:
+        Log.Notice("\n\n")
+        Log.PrintTable(AddMatrixToTable(dataMatrix, table))
+
+        resultsMessage = method
+        if options:
+          resultsMessage += " (" + json.dumps(options) + ")"
+
+        resultsMessage += " | "
+        for result in zip(dataMatrixPrevious, dataMatrix):
+          if result[0][1] != '-' and result[1][1] != '-':
+
+            # Increase the number of benchmark results for the summary.
+            summaryBenchmarks += 1
+
+            # Truncate to specified precision.
+            if isFloat(result[0][1]):
+              timeOld = "{0:.2f}".format(float(result[0][1]))
+            else:
+              timeOld = result[0][1]
 
-              if isFloat(result[1][1]):
-                timeCurrent = "{0:.2f}".format(float(result[1][1]))
-              else:
-                timeCurrent = result[1][1]
+            if isFloat(result[1][1]):
+              timeCurrent = "{0:.2f}".format(float(result[1][1]))
+            else:
+              timeCurrent = result[1][1]
 
-              if isFloat(result[0][1]) and isFloat(result[1][1]):
-                new = float(result[1][1])
-                old = float(result[0][1])
+            if isFloat(result[0][1]) and isFloat(result[1][1]):
+              new = float(result[1][1])
+              old = float(result[0][1])
 
-                timeDiffValue = new - old
-                timeDiff = "{0:.2f}".format(timeDiffValue)
+              timeDiffValue = new - old
+              timeDiff = "{0:.2f}".format(timeDiffValue)
 
-                if (new - old) > 0:
-                  offset = (differenceThreshold * old) / 100
-                  if timeDiffValue > 0 and timeDiffValue > offset:
-                    summaryDifference += 1
+              if (new - old) > 0:
+                offset = (differenceThreshold * old) / 100
+                if timeDiffValue > 0 and timeDiffValue > offset:
+                  summaryDifference += 1
 
-              else:
-                timeDiff = "-"
-
-              # Add dataset name.
-              resultsMessage += result[0][0] + " "
-              # Add old runtime.
-              resultsMessage += timeOld + " (old) => "
-              # Add current runtime.
-              resultsMessage += timeCurrent + " (new) => "
-              # Add runtime difference.
-              resultsMessage += timeDiff + " (diff) | "
-
-          if "=>" in resultsMessage:
-            if irc_available and ircData:
-              watchMessages.append(resultsMessage)
             else:
-              Log.Info(resultsMessage)
-
-          Log.Notice("\n\n")
+              timeDiff = "-"
+
+            # Add dataset name.
+            resultsMessage += result[0][0] + " "
+            # Add old runtime.
+            resultsMessage += timeOld + " (old) => "
+            # Add current runtime.
+            resultsMessage += timeCurrent + " (new) => "
+            # Add runtime difference.
+            resultsMessage += timeDiff + " (diff) | "
+
+        if "=>" in resultsMessage:
+          if irc_available and ircData:
+            watchMessages.append(resultsMessage)
+          else:
+            Log.Info(resultsMessage)
+
+        Log.Notice("\n\n")
+
+      if log:
+        db.Flush()
+        journal.Record(unrecorded)
+        unrecorded = []
+
+      ResultCache.Save(cacheResults)
+      cacheResults = {}
+  finally:
+    results.close()
+
+    # Write the records of the interrupted method block.
+    if log:
+      db.Flush()
+      journal.Record(unrecorded)
+    ResultCache.Save(cacheResults)
+
+    # Remove temporary datasets.
+    for modifiedDataset in modifiedDatasets:
+      RemoveDataset(modifiedDataset)
 
   if irc_available and ircData and len(watchMessages) > 0:
     # Add summary message ("Benchmarks x of y passed").
@@ -610,6 +1168,18 @@ if __name__ == '__main__':
       required=False)
   parser.add_argument('-p','--password', help="""Database password.""",
       required=False)
+  parser.add_argument('-w','--workers', help="""Number of parallel worker
+      processes, every worker is pinned to its own set of cores.""",
+      required=False)
+  parser.add_argument('-s','--resume', help="""Resume the last interrupted run
+      with the same config, finished jobs are skipped.""", required=False,
+      nargs='?', const="True")
+  parser.add_argument('-x','--force', help="""Run every job, even if the
+      result of the job is in the result cache.""", required=False,
+      nargs='?', const="True")
+  parser.add_argument('-e','--perf', help="""Measure the hardware performance
+      counters of the benchmark executables with perf stat.""", required=False,
+      nargs='?', const="True")
 
   args = parser.parse_args()
 
@@ -619,6 +1189,10 @@ if __name__ == '__main__':
     update = True if args.update == "True" else False
     args.files = "" if args.files == None else args.files
     new = True if args.new == "True" else False
+    workers = int(args.workers) if args.workers else None
+    resume = True if args.resume == "True" else False
+    force = True if args.force == "True" else False
+    perf = True if args.perf == "True" else False
 
     Main(args.config, args.blocks, log, args.methodBlocks, update, args.files,
-        new, args.user, args.password)
+        new, args.user, args.password, workers, resume, force, perf)
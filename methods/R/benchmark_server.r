@@ -0,0 +1,93 @@
+# Persistent R benchmark server. The server loads the libraries once and runs
+# the benchmark scripts in the same R session, so the library loading and the
+# parsing of the datasets is only paid by the first run.
+#
+# Every request is a single line on stdin of the form
+# '<script>\t<argument>\t<argument>...'. The server answers with a header line
+# '<status> <output length> <predictions length>' followed by the output of the
+# script and the predictions (one value per line).
+library(mlr)
+library(tictoc)
+
+# The parsed datasets, indexed by the path, the modification time and the
+# read.csv arguments.
+dataCache <- new.env()
+
+cachedReadCsv <- function(file, ...)
+{
+  info <- file.info(file)
+  key <- paste(normalizePath(file), info$size, info$mtime,
+      paste(deparse(list(...)), collapse = ""), sep = "|")
+
+  if (!exists(key, envir = dataCache, inherits = FALSE))
+  {
+    assign(key, utils::read.csv(file, ...), envir = dataCache)
+  }
+
+  get(key, envir = dataCache, inherits = FALSE)
+}
+
+runScript <- function(script, args)
+{
+  state <- new.env()
+  state$predictions <- NULL
+
+  # Run the script in its own environment, with the command line arguments of
+  # the request, the cached datasets and the predictions kept in memory.
+  env <- new.env(parent = globalenv())
+  env$commandArgs <- function(trailingOnly = FALSE)
+  {
+    if (trailingOnly) args else c("Rscript", script, args)
+  }
+  env$read.csv <- cachedReadCsv
+  env$write.csv <- function(x, file = "", ...)
+  {
+    state$predictions <- as.numeric(unlist(x))
+  }
+
+  tic.clearlog()
+  tic.clear()
+
+  status <- 0
+  output <- capture.output(
+    status <- tryCatch({
+      sys.source(script, envir = env)
+      0
+    }, error = function(e) {
+      cat(conditionMessage(e), "\n")
+      1
+    }))
+
+  predictions <- ""
+  if (!is.null(state$predictions))
+  {
+    values <- sprintf("%.17g", state$predictions)
+    values[is.na(state$predictions)] <- "nan"
+    predictions <- paste(values, collapse = "\n")
+  }
+
+  list(status = status, output = paste(c(output, ""), collapse = "\n"),
+      predictions = predictions)
+}
+
+out <- stdout()
+con <- file("stdin")
+open(con)
+
+# Tell the client that the server is ready to accept requests.
+cat("READY\n", file = out)
+flush(out)
+
+while (length(line <- readLines(con, n = 1)) > 0)
+{
+  if (nchar(line) == 0)
+    next
+
+  request <- strsplit(line, "\t", fixed = TRUE)[[1]]
+  result <- runScript(request[1], request[-1])
+
+  cat(result$status, " ", nchar(result$output, type = "bytes"), " ",
+      nchar(result$predictions, type = "bytes"), "\n", result$output,
+      result$predictions, sep = "", file = out)
+  flush(out)
+}
@@ -22,6 +22,7 @@ if metrics_folder not in sys.path:
 
 from log import *
 from profiler import *
+from r_server import *
 from definitions import *
 from misc import *
 
@@ -91,16 +92,15 @@ class DTC(object):
       return -1
 
     # Split the command using shell-like syntax.
-    cmd = shlex.split("libraries/bin/Rscript " + self.path + "dtc.r" +
+    cmd = shlex.split(self.path + "dtc.r" +
         " -t " + self.dataset[0] + " -T " +
         self.dataset[1] + " -md " + str(self.build_opts["max_depth"]) + 
         " -ms " + str(self.build_opts["min_samples_split"]) )
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run the script on the persistent R benchmark server, the output and the
+    # predictions are returned in memory.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      s, predictions = RServer.Run(self.path, cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -114,15 +114,8 @@ class DTC(object):
     timer = self.parseTimer(str(s))
     if timer != -1:
       metrics['Runtime'] = timer
-      predictions = np.genfromtxt("predictions.csv", delimiter = ',')
-      predictions = predictions[1:]
-      truelabels = np.genfromtxt(self.dataset[2], delimiter = ',')
-      confusionMatrix = Metrics.ConfusionMatrix(truelabels, predictions)
-      metrics['ACC'] = Metrics.AverageAccuracy(confusionMatrix)
-      metrics['MCC'] = Metrics.MCCMultiClass(confusionMatrix)
-      metrics['Precision'] = Metrics.AvgPrecision(confusionMatrix)
-      metrics['Recall'] = Metrics.AvgRecall(confusionMatrix)
-      metrics['MSE'] = Metrics.SimpleMeanSquaredError(truelabels, predictions)
+      truelabels = LoadDataset(self.dataset[2])
+      metrics.update(Metrics.AllClassificationMetrics(truelabels, predictions))
 
       Log.Info(("total time: %fs" % (metrics['Runtime'])), self.verbose)
 
@@ -22,6 +22,7 @@ if metrics_folder not in sys.path:
 
 from log import *
 from profiler import *
+from r_server import *
 from definitions import *
 from misc import *
 
@@ -84,14 +85,13 @@ class LASSO(object):
       return -1
 
     # Split the command using shell-like syntax.
-    cmd = shlex.split("libraries/bin/Rscript " + self.path + "lasso.r" +
+    cmd = shlex.split(self.path + "lasso.r" +
         " -t " + self.dataset[0] + " -l " + str(self.build_opts["lambda1"]))
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run the script on the persistent R benchmark server, the output and the
+    # predictions are returned in memory.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      s, predictions = RServer.Run(self.path, cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -105,9 +105,7 @@ class LASSO(object):
     timer = self.parseTimer(str(s))
     if timer != -1:
       metrics['Runtime'] = timer
-      predictions = np.genfromtxt("predictions.csv", delimiter = ',')
-      predictions = predictions[1:]
-      responseData = np.genfromtxt(self.dataset[1], delimiter = ',')
+      responseData = LoadDataset(self.dataset[1])
       metrics['MSE'] = Metrics.SimpleMeanSquaredError(responseData, predictions)
 
       Log.Info(("total time: %fs" % (metrics['Runtime'])), self.verbose)
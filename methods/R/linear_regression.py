@@ -22,6 +22,7 @@ if metrics_folder not in sys.path:
 
 from log import *
 from profiler import *
+from r_server import *
 from definitions import *
 from misc import *
 
@@ -74,14 +75,13 @@ class LinearRegression(object):
       raise Exception("unknown parameters")
 
     # Split the command using shell-like syntax.
-    cmd = shlex.split("libraries/bin/Rscript " + self.path + "linear_regression.r" +
+    cmd = shlex.split(self.path + "linear_regression.r" +
         " -t " + self.dataset[0])
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run the script on the persistent R benchmark server, the output and the
+    # predictions are returned in memory.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      s, predictions = RServer.Run(self.path, cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -95,10 +95,8 @@ class LinearRegression(object):
     timer = self.parseTimer(str(s))
     if timer != -1:
       metrics['Runtime'] = timer
-      predictions = np.genfromtxt("predictions.csv", delimiter = ',')
-      predictions = predictions[1:]
       if len(self.dataset) == 2:
-      	responseData = np.genfromtxt(self.dataset[1], delimiter = ',')
+      	responseData = LoadDataset(self.dataset[1])
       	metrics['MSE'] = Metrics.SimpleMeanSquaredError(responseData, predictions)
 
       Log.Info(("total time: %fs" % (metrics['Runtime'])), self.verbose)
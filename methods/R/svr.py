@@ -22,6 +22,7 @@ if metrics_folder not in sys.path:
 
 from log import *
 from profiler import *
+from r_server import *
 from definitions import *
 from misc import *
 
@@ -93,16 +94,15 @@ class SVR(object):
       raise Exception("unknown parameters")
 
     # Split the command using shell-like syntax.
-    cmd = shlex.split("libraries/bin/Rscript " + self.path + "svr.r" +
+    cmd = shlex.split(self.path + "svr.r" +
         " -t " + self.dataset[0] + " -k " + opts['kernel'] + 
 	" -c " + str(opts["C"]) + " -e " + str(opts["epsilon"]) + 
 	" -g " + str(opts["gamma"]))
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run the script on the persistent R benchmark server, the output and the
+    # predictions are returned in memory.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      s, predictions = RServer.Run(self.path, cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -105,17 +105,12 @@ class SVM(object):
 
     # Parse data: runtime.
     predictions = np.genfromtxt("predictions.csv", delimiter = ',')
-    truelabels = np.genfromtxt(self.dataset[2], delimiter = ',')
+    truelabels = LoadDataset(self.dataset[2])
     timer = self.parseTimer(s)
 
     if timer != -1:
       metrics['Runtime'] = timer.runtime
-      confusionMatrix = Metrics.ConfusionMatrix(truelabels, predictions)
-      metrics['ACC'] = Metrics.AverageAccuracy(confusionMatrix)
-      metrics['MCC'] = Metrics.MCCMultiClass(confusionMatrix)
-      metrics['Precision'] = Metrics.AvgPrecision(confusionMatrix)
-      metrics['Recall'] = Metrics.AvgRecall(confusionMatrix)
-      metrics['MSE'] = Metrics.SimpleMeanSquaredError(truelabels, predictions)
+      metrics.update(Metrics.AllClassificationMetrics(truelabels, predictions))
 
       
       Log.Info(("total time: %fs" % (metrics['Runtime'])), self.verbose)
@@ -102,14 +102,9 @@ class DTC(object):
 
     if timer != -1:
       predictions = np.genfromtxt("predictions.csv", delimiter = ',')
-      truelabels = np.genfromtxt(self.dataset[2], delimiter = ',')
+      truelabels = LoadDataset(self.dataset[2])
       metrics['Runtime'] = timer.total_time
-      confusionMatrix = Metrics.ConfusionMatrix(truelabels, predictions)
-      metrics['ACC'] = Metrics.AverageAccuracy(confusionMatrix)
-      metrics['MCC'] = Metrics.MCCMultiClass(confusionMatrix)
-      metrics['Precision'] = Metrics.AvgPrecision(confusionMatrix)
-      metrics['Recall'] = Metrics.AvgRecall(confusionMatrix)
-      metrics['MSE'] = Metrics.SimpleMeanSquaredError(truelabels, predictions)
+      metrics.update(Metrics.AllClassificationMetrics(truelabels, predictions))
 
       Log.Info(("total time: %fs" % (metrics['Runtime'])), self.verbose)
 
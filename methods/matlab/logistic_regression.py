@@ -25,6 +25,7 @@ if metrics_folder not in sys.path:
 from log import *
 from profiler import *
 from definitions import *
+from misc import *
 
 import shlex
 import subprocess
@@ -108,7 +109,7 @@ class LogisticRegression(object):
     
     if timer != -1:
       predictions = np.genfromtxt("predictions.csv", delimiter = ',')
-      truelabels = np.genfromtxt(self.dataset[2], delimiter = ',')
+      truelabels = LoadDataset(self.dataset[2])
       metrics['Runtime'] = timer.total_time
       confusionMatrix = Metrics.ConfusionMatrix(truelabels, predictions)
 
@@ -115,7 +115,7 @@ class SVR(object):
 
     if timer != -1:
       predictions = np.genfromtxt("predictions.csv", delimiter = ',')
-      truelabels = np.genfromtxt(self.dataset[2], delimiter = ',')
+      truelabels = LoadDataset(self.dataset[2])
       metrics['Runtime'] = timer.total_time
       metrics['MSE'] = Metrics.SimpleMeanSquaredError(truelabels, predictions)
 
@@ -9,20 +9,69 @@ import sys
 import numpy as np
 import math
 
+'''
+This class accumulates the confusion matrix over chunks of predictions, e.g.
+when the predictions are streamed. The labels are encoded as the index in the
+sorted array of the classes seen so far and every chunk is counted with a
+single np.bincount call. Labels of any sortable type (e.g. the float labels
+returned by LoadDataset) are supported; the matrix grows if a chunk contains
+unseen classes.
+'''
+class ConfusionMatrixAccumulator(object):
+
+  '''
+  @param classes - Optional array with the known classes
+  Create the accumulator.
+  '''
+  def __init__(self, classes=None):
+    self.classes = np.unique(classes) if classes is not None else np.array([])
+    self.CM = np.zeros((len(self.classes), len(self.classes)), dtype=np.int64)
+
+  '''
+  @param labels - Array containing the true labels of the chunk
+  @param prediction - Array containing the predicted labels of the chunk
+  Add the given chunk of predictions to the confusion matrix.
+  '''
+  def Update(self, labels, prediction):
+    labels = np.asarray(labels).ravel()
+    prediction = np.asarray(prediction).ravel()
+    if len(labels) != len(prediction):
+      raise ValueError("Found input variables with inconsistent numbers of "
+          "samples: [%d, %d]" % (len(labels), len(prediction)))
+
+    # Add the unseen classes, the counts of the known classes are moved to the
+    # new positions.
+    classes = np.union1d(labels, prediction)
+    if len(self.classes) > 0:
+      classes = np.union1d(self.classes, classes)
+    if len(classes) != len(self.classes):
+      index = np.searchsorted(classes, self.classes)
+      CM = np.zeros((len(classes), len(classes)), dtype=np.int64)
+      CM[np.ix_(index, index)] = self.CM
+      self.classes, self.CM = classes, CM
+
+    n = len(self.classes)
+    truth = np.searchsorted(self.classes, labels)
+    predicted = np.searchsorted(self.classes, prediction)
+    self.CM += np.bincount(truth * n + predicted,
+        minlength=n * n).reshape(n, n)
+
 class Metrics(object):
 
   '''
-  @param labels - File containing true labels
-  @param prediction - File containing predicted labels
+  @param labels - Array containing the true labels
+  @param prediction - Array containing the predicted labels
   Create the confusion matrix from the two arrays containing the true labels and
   the predicted labels. The confusion matrix contains all information about the
   number of true and false positives and negatives for all the classes in
-  consideration.
+  consideration. The rows and columns are ordered by the sorted labels of both
+  arrays, so a class that only occurs in the predictions gets its own row.
   '''
   @staticmethod
   def ConfusionMatrix(labels, prediction):
-    from sklearn.metrics import confusion_matrix
-    return confusion_matrix(labels, prediction)
+    accumulator = ConfusionMatrixAccumulator()
+    accumulator.Update(labels, prediction)
+    return accumulator.CM
 
   '''
   @param CM - The confusion matrix
@@ -41,6 +90,21 @@ class Metrics(object):
     pl.xlabel('Predicted Label')
     pl.show()
 
+  '''
+  @param CM - The confusion matrix
+  Compute the number of true positives, false positives, false negatives and
+  true negatives of all classes in one pass over the confusion matrix. Every
+  returned value is an array with one entry per class (One vs All approach).
+  '''
+  @staticmethod
+  def ClassCounts(CM):
+    CM = np.asarray(CM, dtype=np.float64)
+    truePositives = np.diag(CM)
+    falsePositives = CM.sum(axis=0) - truePositives
+    falseNegatives = CM.sum(axis=1) - truePositives
+    trueNegatives = CM.sum() - truePositives - falsePositives - falseNegatives
+    return truePositives, falsePositives, falseNegatives, trueNegatives
+
   '''
   @param CM - The confusion matrix
   Average accuracy measure. The average accuracy is defined as the average/mean
@@ -49,17 +113,36 @@ class Metrics(object):
   '''
   @staticmethod
   def AverageAccuracy(CM):
-    acc=0.0
-    Sum=0
-    l=len(CM)
-    for i in range(l):
-        for j in range(l):
-            Sum+=CM[i][j]
-        acc = acc + (float(CM[i][i])/float(Sum))*100.0
-        Sum=0
-    acc = acc/l
-    return acc/100.0
+    truePositives, _, falseNegatives, _ = Metrics.ClassCounts(CM)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      acc = np.sum(truePositives / (truePositives + falseNegatives) * 100.0)
+    acc = acc / len(truePositives)
+    return float(acc / 100.0)
 
+  '''
+  @param CM - The confusion matrix
+  Precision measure for all classes. A class without predictions is not
+  relevant, all instances are predicted as negative and there are no spurious
+  cases, so the precision of the class is 1.
+  '''
+  @staticmethod
+  def Precisions(CM):
+    truePositives, falsePositives, _, _ = Metrics.ClassCounts(CM)
+    totalPositives = truePositives + falsePositives
+    precision = np.ones(len(truePositives))
+    relevant = totalPositives != 0
+    precision[relevant] = truePositives[relevant] / totalPositives[relevant]
+    return precision
+
+  '''
+  @param CM - The confusion matrix
+  Recall measure for all classes.
+  '''
+  @staticmethod
+  def Recalls(CM):
+    truePositives, _, falseNegatives, _ = Metrics.ClassCounts(CM)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      return truePositives / (truePositives + falseNegatives)
 
   '''
   @param class_i - Index of the class in the confusion matrix
@@ -70,20 +153,7 @@ class Metrics(object):
   '''
   @staticmethod
   def PrecisionForAClass(class_i,CM):
-    l=len(CM)
-    truePositives = CM[class_i][class_i]
-    falsePositives = 0
-    for j in range(l):
-        falsePositives+=CM[j][class_i]
-    falsePositives-=truePositives
-    totalPositives = truePositives + falsePositives
-    if totalPositives != 0:
-      precision = truePositives/totalPositives
-    else:
-      #The class is not relevant (no predictions in this class)
-      #All instances predicted as negative, no spurious cases
-      precision = 1
-    return precision
+    return float(Metrics.Precisions(CM)[class_i])
 
   '''
   @param class_i - Index of the class in the confusion matrix
@@ -94,15 +164,7 @@ class Metrics(object):
   '''
   @staticmethod
   def RecallForAClass(class_i,CM):
-     l=len(CM)
-     truePositives = CM[class_i][class_i]
-     falseNegatives = 0
-     for j in range(l):
-         falseNegatives+=CM[class_i][j]
-     falseNegatives-=truePositives
-     total = truePositives + falseNegatives
-     recall = truePositives/total
-     return recall
+    return float(Metrics.Recalls(CM)[class_i])
 
   '''
   @param CM - The confusion matrix
@@ -114,21 +176,29 @@ class Metrics(object):
   '''
   @staticmethod
   def AvgPrecision(CM):
-    l=len(CM)
-    avgPrecision = 0
-    for i in range(l):
-        avgPrecision+=Metrics.PrecisionForAClass(i,CM)
-    avgPrecision = avgPrecision/l
-    return avgPrecision
+    return float(np.mean(Metrics.Precisions(CM)))
 
   @staticmethod
   def AvgRecall(CM):
-    l=len(CM)
-    avgRecall = 0
-    for i in range(l):
-        avgRecall+=Metrics.RecallForAClass(i,CM)
-    avgRecall = avgRecall/l
-    return avgRecall
+    return float(np.mean(Metrics.Recalls(CM)))
+
+  '''
+  @param CM - The confusion matrix
+  FMeasure for all classes, the FMeasure is defined as the harmonic mean of
+  precision and recall. If precision and recall are zero, the FMeasure is
+  computed from the true positives, false positives and false negatives.
+  '''
+  @staticmethod
+  def FMeasures(CM):
+    truePositives, falsePositives, falseNegatives, _ = Metrics.ClassCounts(CM)
+    precision = Metrics.Precisions(CM)
+    recall = Metrics.Recalls(CM)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      #Took care of the edge case here!
+      return np.where((precision + recall) != 0,
+          2 * precision * recall / (precision + recall),
+          2 * truePositives / (2 * truePositives + falsePositives +
+          falseNegatives))
 
   '''
   @param class_i - Index of the class in the confusion matrix
@@ -137,31 +207,7 @@ class Metrics(object):
   '''
   @staticmethod
   def FMeasureClass(class_i,CM):
-    l = len(CM)
-    precClass = Metrics.PrecisionForAClass(class_i,CM)
-    recClass = Metrics.RecallForAClass(class_i,CM)
-    if (precClass + recClass) != 0:
-      fMeasure = 2*precClass*recClass/(precClass+recClass)
-    else:
-      #Took care of the edge case here!
-      truePositives = CM[class_i][class_i]
-      falsePositives = 0
-      for j in range(l):
-        falsePositives+=CM[j][class_i]
-      falsePositives-=truePositives
-      falseNegatives=0
-      for j in range(l):
-        falseNegatives+=CM[class_i][j]
-      falseNegatives-=truePositives
-      trueNegatives=0
-      #calculate trueNegatives
-      for i in range(l):
-        if i!=class_i:
-          for j in range(l):
-            trueNegatives+=CM[i][j]
-          trueNegatives-=CM[i][class_i]
-      fMeasure = 2*truePositives / (2*truePositives + falsePositives + falseNegatives)
-    return fMeasure
+    return float(Metrics.FMeasures(CM)[class_i])
 
 
   '''
@@ -171,12 +217,22 @@ class Metrics(object):
   '''
   @staticmethod
   def AvgFMeasure(CM):
-    l=len(CM)
-    avgF=0
-    for i in range(l):
-        avgF+=Metrics.FMeasureClass(i,CM)
-    avgF = avgF/l
-    return avgF
+    return float(np.mean(Metrics.FMeasures(CM)))
+
+  '''
+  @param CM - The confusion matrix
+  Lift for all classes. The threshold is the fraction of the instances that
+  were predicted as the first class.
+  '''
+  @staticmethod
+  def Lifts(CM):
+    CM = np.asarray(CM, dtype=np.float64)
+    #pgt - positives greater than threshold
+    #tgt - total greater than threshold
+    with np.errstate(divide='ignore', invalid='ignore'):
+      pgt = (1 / CM.sum(axis=1)) * np.diag(CM)
+      tgt = CM[:, 0].sum() / CM.sum()
+      return pgt / tgt
 
   '''
   @param class_i - Index of the class in the confusion matrix
@@ -186,23 +242,7 @@ class Metrics(object):
   '''
   @staticmethod
   def LiftForAClass(class_i,CM):
-    l=len(CM)
-    #pgt - positives greater than threshold
-    pgt = 0
-    #tgt - total greater than threshold
-    tgt = 0
-    total = 0
-    for i in range(l):
-      pgt = pgt + CM[class_i][i]
-    pgt = (1/pgt) * CM[class_i][class_i]
-    for j in range(l):
-      tgt = tgt + CM[j][0]
-    for i in range(l):
-      for j in range(l):
-        total = total + CM[i][j]
-    tgt = tgt/total
-    lift = pgt/tgt
-    return lift
+    return float(Metrics.Lifts(CM)[class_i])
 
 
   '''
@@ -215,13 +255,26 @@ class Metrics(object):
   '''
   @staticmethod
   def LiftMultiClass(CM):
-    AvgLift=0
-    l=len(CM)
-    for i in range(l):
-      AvgLift+=Metrics.LiftForAClass(i,CM)
-    AvgLift/=l
-    return AvgLift
+    return float(np.mean(Metrics.Lifts(CM)))
 
+  '''
+  @param CM - The confusion matrix
+  MCC for all classes. A class without predictions is not relevant, in this
+  limiting case the MCC of the class is 0.
+  '''
+  @staticmethod
+  def MatthewsCorrelationCoefficients(CM):
+    truePositives, falsePositives, falseNegatives, trueNegatives = \
+        Metrics.ClassCounts(CM)
+    Numerator = (truePositives*trueNegatives) - (falsePositives*falseNegatives)
+    Denominator = np.sqrt((truePositives + falsePositives) *
+                          (truePositives + falseNegatives) *
+                          (trueNegatives + falsePositives) *
+                          (trueNegatives + falseNegatives))
+    MCC = np.zeros(len(truePositives))
+    relevant = Denominator != 0
+    MCC[relevant] = Numerator[relevant] / Denominator[relevant]
+    return MCC
 
   '''
   @param class_i - Index of the class in the confusion matrix
@@ -233,35 +286,7 @@ class Metrics(object):
   '''
   @staticmethod
   def MatthewsCorrelationCoefficientClass(class_i, CM):
-    l=len(CM)
-    truePositives = CM[class_i][class_i]
-    falsePositives = 0
-    for j in range(l):
-      falsePositives+=CM[j][class_i]
-    falsePositives-=truePositives
-    falseNegatives=0
-    for j in range(l):
-      falseNegatives+=CM[class_i][j]
-    falseNegatives-=truePositives
-    trueNegatives=0
-    #calculate trueNegatives
-    for i in range(l):
-      if i!=class_i:
-        for j in range(l):
-          trueNegatives+=CM[i][j]
-        trueNegatives-=CM[i][class_i]
-    Numerator = (truePositives*trueNegatives) - (falsePositives*falseNegatives)
-    Denominator=math.sqrt((truePositives + falsePositives)*
-							(truePositives + falseNegatives)*
-							(trueNegatives + falsePositives)*
-							(trueNegatives + falseNegatives))
-    if Denominator != 0:
-      MCC = Numerator/Denominator
-    else:
-      #Class is not relevant (no predictions in this class)
-      #The limiting case.
-      MCC = 0
-    return MCC
+    return float(Metrics.MatthewsCorrelationCoefficients(CM)[class_i])
 
 
   '''
@@ -275,12 +300,7 @@ class Metrics(object):
   '''
   @staticmethod
   def MCCMultiClass(CM):
-    MCC=0
-    l=len(CM)
-    for i in range(l):
-      MCC+=Metrics.MatthewsCorrelationCoefficientClass(i,CM)
-    MCC/=l
-    return MCC
+    return float(np.mean(Metrics.MatthewsCorrelationCoefficients(CM)))
 
   '''
   @param truelabelFile - Name of the file which contains the true label
@@ -347,59 +367,53 @@ class Metrics(object):
   def MeanPredictiveInformationClass(class_i, truelabels, predictedlabels):
     predicted=np.genfromtxt(predictedlabels, delimiter=',')
     actual=np.genfromtxt(truelabels, delimiter=',')
-    instances=len(actual)
-    predictiveSum=0
-    count=0
-    for i in range(instances):
-      if actual[i] == class_i:
-        count+=1
-        '''
-        predictiveSum+=((actual[i] * math.log(predicted[i],2))+
-						  ((1-actual[i]) * math.log(1-predicted[i],2)))
-        We take actual[i] to be 0. Hence, the formula :
-        We take 0.05 instead of absolute 0 and 0.95 instead of absolute 1
-        to guarantee that an absolute 0 value doesn't become an argument
-        to logarithm.
-        '''
-        predicted_val=0.05
-        actual_val=0.05
-        if predicted[i] != actual[i]:
-          predicted_val = 0.95
-
-        predictiveSum+=((actual_val*math.log(predicted_val,2)) + (predicted_val*math.log(1 - predicted_val,2)))
-
-    if count != 0:
-      predictiveSum/=count
-    predictiveSum+=1
-    return predictiveSum
+    return Metrics.MPIArrayClass(class_i, actual, predicted)
+
+  '''
+  @param labels - Array with the labels of the classes
+  @param truelabels - Array with true labels for each instance
+  @param predictedlabels - Array with predicted label for each instance
+  Mean predictive information of the given classes. Every instance of a class
+  contributes the same value, which only depends on whether the instance was
+  predicted correctly:
+    predictiveSum+=((actual[i] * math.log(predicted[i],2))+
+                    ((1-actual[i]) * math.log(1-predicted[i],2)))
+  We take actual[i] to be 0. Hence, the formula :
+  We take 0.05 instead of absolute 0 and 0.95 instead of absolute 1
+  to guarantee that an absolute 0 value doesn't become an argument
+  to logarithm. So we only have to count the correct and wrong predictions of
+  every class.
+  '''
+  @staticmethod
+  def MPIArray(labels, truelabels, predictedlabels):
+    truelabels = np.asarray(truelabels).ravel()
+    predictedlabels = np.asarray(predictedlabels).ravel()[:len(truelabels)]
+    labels = np.asarray(labels).ravel()
+
+    # Map the true labels to the index of the class, -1 for other labels.
+    order = np.argsort(labels, kind='mergesort')
+    position = np.searchsorted(labels[order], truelabels)
+    position[position >= len(labels)] = 0
+    index = np.where(labels[order][position] == truelabels, order[position], -1)
+
+    valid = index >= 0
+    wrong = predictedlabels[valid] != truelabels[valid]
+    count = np.bincount(index[valid], minlength=len(labels))
+    wrongCount = np.bincount(index[valid][wrong], minlength=len(labels))
+
+    actual_val = 0.05
+    rightInformation = (actual_val * math.log(0.05, 2)) + \
+        (0.05 * math.log(1 - 0.05, 2))
+    wrongInformation = (actual_val * math.log(0.95, 2)) + \
+        (0.95 * math.log(1 - 0.95, 2))
+    predictiveSum = (count - wrongCount) * rightInformation + \
+        wrongCount * wrongInformation
+
+    return predictiveSum / np.maximum(count, 1) + 1
 
   @staticmethod
   def MPIArrayClass(class_i, truelabels, predictedlabels):
-    instances=len(truelabels)
-    predictiveSum=0
-    count=0
-    for i in range(instances):
-      if truelabels[i] == class_i:
-        count+=1
-        '''
-        predictiveSum+=((actual[i] * math.log(predicted[i],2))+
-						  ((1-actual[i]) * math.log(1-predicted[i],2)))
-        We take actual[i] to be 0. Hence, the formula :
-        We take 0.05 instead of absolute 0 and 0.95 instead of absolute 1
-        to guarantee that an absolute 0 value doesn't become an argument
-        to logarithm.
-        '''
-        predicted_val=0.05
-        actual_val=0.05
-        if predictedlabels[i] != truelabels[i]:
-          predicted_val = 0.95
-
-        predictiveSum+=((actual_val*math.log(predicted_val,2)) + (predicted_val*math.log(1 - predicted_val,2)))
-
-    if count != 0:
-      predictiveSum/=count
-    predictiveSum+=1
-    return predictiveSum
+    return float(Metrics.MPIArray([class_i], truelabels, predictedlabels)[0])
 
   '''
   This method extracts all the labels from the truelabels file in a list
@@ -408,12 +422,9 @@ class Metrics(object):
   '''
   @staticmethod
   def GetActualLabels(truelabels):
-    labels=[]
-    labels.append(truelabels[0])
-    for i in range(len(truelabels)):
-      if truelabels[i] not in labels:
-        labels.append(truelabels[i])
-    return labels
+    truelabels = np.asarray(truelabels).ravel()
+    labels, index = np.unique(truelabels, return_index=True)
+    return list(truelabels[np.sort(index)])
 
 
   '''
@@ -427,12 +438,7 @@ class Metrics(object):
   def AvgMeanPredictiveInformation(CM, truelabels, predictedlabels):
     predicted=np.genfromtxt(predictedlabels, delimiter=',')
     actual=np.genfromtxt(truelabels, delimiter=',')
-    mpi=0
-    all_labels = Metrics.GetActualLabels(actual)
-    for i in range(len(CM)):
-      mpi+=Metrics.MeanPredictiveInformationClass(all_labels[i], truelabels, predictedlabels)
-    mpi/=len(CM)
-    return mpi
+    return Metrics.AvgMPIArray(CM, actual, predicted)
 
   '''
   @param CM - The confusion matrix
@@ -443,12 +449,9 @@ class Metrics(object):
   '''
   @staticmethod
   def AvgMPIArray(CM, truelabels, predictedlabels):
-    mpi=0
     all_labels = Metrics.GetActualLabels(truelabels)
-    for i in range(len(CM)):
-      mpi+=Metrics.MPIArrayClass(all_labels[i], truelabels, predictedlabels)
-    mpi/=len(CM)
-    return mpi
+    mpi = Metrics.MPIArray(all_labels[:len(CM)], truelabels, predictedlabels)
+    return float(np.sum(mpi) / len(CM))
 
   '''
   @param truelabels - Array containing the true labels for the test data
@@ -459,10 +462,26 @@ class Metrics(object):
   '''
   @staticmethod
   def SimpleMeanSquaredError(truelabels, predictedlabels):
-    simplemse = 0
+    truelabels = np.asarray(truelabels, dtype=np.float64).ravel()
     n = len(truelabels)
-    for i in range(n):
-      difference = truelabels[i] - predictedlabels[i]
-      simplemse += difference * difference
-    simplemse /= n
-    return simplemse
+    predictedlabels = np.asarray(predictedlabels,
+        dtype=np.float64).ravel()[:n]
+    difference = truelabels - predictedlabels
+    return float(np.dot(difference, difference) / n)
+
+  '''
+  @param truelabels - Array containing the true labels for the test data
+  @param predictedlabels - Array containing the predicted labels for test data
+  Compute the standard classification metrics of the benchmark scripts with a
+  single confusion matrix, so the scripts only have to call this method once.
+  '''
+  @staticmethod
+  def AllClassificationMetrics(truelabels, predictedlabels):
+    CM = Metrics.ConfusionMatrix(truelabels, predictedlabels)
+    metrics = {}
+    metrics['ACC'] = Metrics.AverageAccuracy(CM)
+    metrics['MCC'] = Metrics.MCCMultiClass(CM)
+    metrics['Precision'] = Metrics.AvgPrecision(CM)
+    metrics['Recall'] = Metrics.AvgRecall(CM)
+    metrics['MSE'] = Metrics.SimpleMeanSquaredError(truelabels, predictedlabels)
+    return metrics
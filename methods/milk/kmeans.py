@@ -18,6 +18,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 from milk import kmeans
@@ -54,10 +55,10 @@ class KMEANS(object):
       # file.
       Log.Info("Loading dataset", self.verbose)
       if len(self.dataset) == 2:
-        data = np.genfromtxt(self.dataset[0], delimiter=',')
-        centroids = np.genfromtxt(self.dataset[1], delimiter=',')
+        data = LoadDataset(self.dataset[0])
+        centroids = LoadDataset(self.dataset[1])
       else:
-        data = np.genfromtxt(self.dataset, delimiter=',')
+        data = LoadDataset(self.dataset)
 
       # Gather parameters.
       clusters = None
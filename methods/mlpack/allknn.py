@@ -18,6 +18,8 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from profiler import *
+from description_cache import *
+from timer_parser import *
 
 import shlex
 
@@ -26,9 +28,6 @@ try:
 except ImportError:
   import subprocess
 
-import re
-import collections
-
 '''
 This class implements the All K-Nearest-Neighbor Search benchmark.
 '''
@@ -51,25 +50,13 @@ class ALLKNN(object):
     self.timeout = timeout
     self.debug = debug
 
-    # Get description from executable.
-    cmd = shlex.split(self.path + "mlpack_allknn -h")
-    try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False)
-    except Exception as e:
-      Log.Fatal("Could not execute command: " + str(cmd))
-    else:
-      # Use regular expression pattern to get the description.
-      pattern = re.compile(br"""(.*?)Optional.*?options:""",
-          re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-      match = pattern.match(s)
-      if not match:
-        Log.Warn("Can't parse description", self.verbose)
-        description = ""
-      else:
-        description = match.group(1)
-
-      self.description = description
+  '''
+  The description of the method, the description is read from the '-h' output
+  of the executable the first time it's used.
+  '''
+  @property
+  def description(self):
+    return DescriptionCache.Description(self.path + "mlpack_allknn")
 
   '''
   Destructor to clean up at the end. Use this method to remove created files.
@@ -159,11 +146,11 @@ class ALLKNN(object):
       cmd = shlex.split(self.path + "mlpack_allknn -r " + self.dataset +
           " -v -n neighbors.csv -d distances.csv " + self.OptionsToStr(options))
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run command with the nessecary arguments and parse the timers while the
+    # output is streamed. We have untrusted input so we disable all shell based
+    # features.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      timers = TimerParser.Run(cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -172,11 +159,12 @@ class ALLKNN(object):
       return -1
 
     # Datastructure to store the results.
-    metrics = {}
+    metrics = timers.Metrics()
 
     # Parse data (runtime and number of base cases).
-    baseCases = self.parseNumBaseCases(s)
-    timer = self.parseTimer(s)
+    baseCases = timers.Get("base_cases")
+    timer = timers.Timer(["computing_neighbors", "loading_data", "saving_data",
+        "total_time", "tree_building"])
 
     if timer != -1:
       metrics['Runtime'] = timer.total_time - timer.loading_data - timer.saving_data
@@ -189,57 +177,3 @@ class ALLKNN(object):
       metrics['BaseCases'] = baseCases
 
     return metrics
-
-  '''
-  Parse the number of base cases from a given string.
-
-  @param data - String to parse information from.
-  @return - Int positive number of base cases or None in case of an error.
-  '''
-  def parseNumBaseCases(self, data):
-    # Compile the regular expression pattern into a regular expression object to
-    # parse the verbose output.
-    pattern = re.compile(
-        br""".*[^\d](?P<num_base_cases>\d+) base cases were calculated.*""",
-        re.MULTILINE|re.DOTALL)
-
-    match = pattern.match(data)
-
-    if not match:
-      # Can't parse the base cases: wrong format
-      return -1
-    else:
-      return int(match.group("num_base_cases"))
-
-  '''
-  Parse the timer data from a given string.
-
-  @param data - String to parse timer data from.
-  @return - Namedtuple that contains the timer data or -1 in case of an error.
-  '''
-  def parseTimer(self, data):
-    # Compile the regular expression pattern into a regular expression object to
-    # parse the timer data.
-    pattern = re.compile(br"""
-              .*?computing_neighbors: (?P<computing_neighbors>.*?)s.*?
-              .*?loading_data: (?P<loading_data>.*?)s.*?
-              .*?saving_data: (?P<saving_data>.*?)s.*?
-              .*?total_time: (?P<total_time>.*?)s.*?
-              .*?tree_building: (?P<tree_building>.*?)s.*?
-              """, re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-    match = pattern.match(data)
-
-    if not match:
-      Log.Fatal("Can't parse the data: wrong format")
-      return -1
-    else:
-      # Create a namedtuple and return the timer data.
-      timer = collections.namedtuple("timer", ["computing_neighbors",
-          "loading_data", "saving_data", "total_time", "tree_building"])
-
-      return timer(float(match.group("computing_neighbors")),
-                   float(match.group("loading_data")),
-                   float(match.group("saving_data")),
-                   float(match.group("total_time")),
-                   float(match.group("tree_building")))
@@ -25,6 +25,8 @@ if metrics_folder not in sys.path:
 
 from log import *
 from profiler import *
+from description_cache import *
+from timer_parser import *
 from definitions import *
 from misc import *
 import shlex
@@ -34,9 +36,6 @@ try:
 except ImportError:
   import subprocess
 
-import re
-import collections
-
 '''
 This class implements the Decision Stump benchmark.
 '''
@@ -59,26 +58,14 @@ class DecisionStump(object):
     self.timeout = timeout
     self.debug = debug
 
-    # Get description from executable.
-    cmd = shlex.split(self.path + "mlpack_decision_stump -h")
-    try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False)
-    except Exception as e:
-      Log.Fatal("Could not execute command: " + str(cmd))
-    else:
-      # Use regular expression pattern to get the description.
-      pattern = re.compile(br"""(.*?)Required.*?options:""",
-          re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-      match = pattern.match(s)
-      if not match:
-        Log.Warn("Can't parse description", self.verbose)
-        description = ""
-      else:
-        description = match.group(1)
-
-      self.description = description
-
+  '''
+  The description of the method, the description is read from the '-h' output
+  of the executable the first time it's used.
+  '''
+  @property
+  def description(self):
+    return DescriptionCache.Description(self.path + "mlpack_decision_stump",
+        br"""(.*?)Required.*?options:""")
   '''
   Destructor to clean up at the end. Use this method to remove created files.
 
@@ -140,11 +127,11 @@ class DecisionStump(object):
     else:
       Log.Fatal("This method requires atleast two datasets.")
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run command with the nessecary arguments and parse the timers while the
+    # output is streamed. We have untrusted input so we disable all shell based
+    # features.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      timers = TimerParser.Run(cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -153,10 +140,10 @@ class DecisionStump(object):
       return -1
 
     # Datastructure to store the results.
-    metrics = {}
+    metrics = timers.Metrics()
 
     # Parse data (runtime and number of base cases).
-    timer = self.parseTimer(s)
+    timer = timers.Timer(["loading_data", "saving_data", "total_time"])
 
     if timer != -1:
       metrics['Runtime'] = timer.total_time - timer.loading_data - timer.saving_data
@@ -172,7 +159,7 @@ class DecisionStump(object):
       testData = LoadDataset(self.dataset[1])
       truelabels = LoadDataset(self.dataset[2])
 
-      predictedlabels = LoadDataset("output_file")
+      predictedlabels = LoadDataset("output_file", cache=False)
 
       confusionMatrix = Metrics.ConfusionMatrix(truelabels, predictedlabels)
       AvgAcc = Metrics.AverageAccuracy(confusionMatrix)
@@ -194,28 +181,3 @@ class DecisionStump(object):
       metrics['Simple MSE'] = SimpleMSE
 
     return metrics
-
-  '''
-  Parse the timer data form a given string.
-
-  @param data - String to parse timer data from.
-  @return - Namedtuple that contains the timer data or -1 in case of an error.
-  '''
-  def parseTimer(self, data):
-    # Compile the regular expression pattern into a regular expression object to
-    # parse the timer data.
-    pattern = re.compile(br"""
-        .*?loading_data: (?P<loading_data>.*?)s.*?
-        .*?saving_data: (?P<saving_data>.*?)s.*?
-        .*?total_time: (?P<total_time>.*?)s.*?
-        """, re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-    match = pattern.match(data)
-    if not match:
-      Log.Fatal("Can't parse the data: wrong format")
-      return -1
-    else:
-      # Create a namedtuple and return the timer data.
-      timer = collections.namedtuple('timer', ["loading_data", "total_time", "saving_data"])
-      return timer(float(match.group("loading_data")),
-          float(match.group("total_time")), float(match.group("saving_data")))
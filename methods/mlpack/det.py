@@ -19,6 +19,8 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from profiler import *
+from description_cache import *
+from timer_parser import *
 
 import shlex
 
@@ -27,9 +29,6 @@ try:
 except ImportError:
   import subprocess
 
-import re
-import collections
-
 '''
 This class implements the Density Estimation With Density Estimation Trees
 benchmark.
@@ -53,25 +52,13 @@ class DET(object):
     self.timeout = timeout
     self.debug = debug
 
-    # Get description from executable.
-    cmd = shlex.split(self.path + "mlpack_det -h")
-    try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False)
-    except Exception as e:
-      Log.Fatal("Could not execute command: " + str(cmd))
-    else:
-      # Use regular expression pattern to get the description.
-      pattern = re.compile(br"""(.*?)Optional.*?options:""",
-          re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-      match = pattern.match(s)
-      if not match:
-        Log.Warn("Can't parse description", self.verbose)
-        description = ""
-      else:
-        description = match.group(1)
-
-      self.description = description
+  '''
+  The description of the method, the description is read from the '-h' output
+  of the executable the first time it's used.
+  '''
+  @property
+  def description(self):
+    return DescriptionCache.Description(self.path + "mlpack_det")
 
   '''
   Destructor to clean up at the end. Use this method to remove created files.
@@ -140,11 +127,11 @@ class DET(object):
       cmd = shlex.split(self.path + "mlpack_det -t " + self.dataset + " -v " +
           self.OptionsToStr(options))
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run command with the nessecary arguments and parse the timers while the
+    # output is streamed. We have untrusted input so we disable all shell based
+    # features.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      timers = TimerParser.Run(cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -153,11 +140,11 @@ class DET(object):
       return -1
 
     # Datastructure to store the results.
-    metrics = {}
+    metrics = timers.Metrics()
 
     # Parse data: runtime, test time.
-    testTime = self.parseTestingTime(s)
-    timer = self.parseTimer(s)
+    testTime = timers.Get("det_test_set_estimation")
+    timer = timers.Timer(["det_training", "loading_data", "total_time"])
 
     if timer != -1:
       metrics['Runtime'] = timer.total_time - timer.loading_data
@@ -169,53 +156,3 @@ class DET(object):
       metrics['Testing'] = testTime
 
     return metrics
-
-  '''
-  Parse the time need to test.
-
-  @param data - String to parse information from.
-  @return - float time to performe testing.
-  '''
-  def parseTestingTime(self, data):
-    # Compile the regular expression pattern into a regular expression object to
-    # parse the verbose output.
-    pattern = re.compile(br"""
-              .*?det_test_set_estimation: (?P<det_test_set_estimation>.*?)s.*?
-              """, re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-    match = pattern.match(data)
-
-    if not match:
-      # Can't parse the base cases: wrong format
-      return -1
-    else:
-      return float(match.group("det_test_set_estimation"))
-
-  '''
-  Parse the timer data from a given string.
-
-  @param data - String to parse timer data from.
-  @return - Namedtuple that contains the timer data or -1 in case of an error.
-  '''
-  def parseTimer(self, data):
-    # Compile the regular expression pattern into a regular expression object to
-    # parse the timer data.
-    pattern = re.compile(br"""
-              .*?det_training: (?P<det_training>.*?)s.*?
-              .*?loading_data: (?P<loading_data>.*?)s.*?
-              .*?total_time: (?P<total_time>.*?)s.*?
-              """, re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-    match = pattern.match(data)
-
-    if not match:
-      Log.Fatal("Can't parse the data: wrong format")
-      return -1
-    else:
-      # Create a namedtuple and return the timer data.
-      timer = collections.namedtuple("timer", ["det_training",
-          "loading_data", "total_time"])
-
-      return timer(float(match.group("det_training")),
-                   float(match.group("loading_data")),
-                   float(match.group("total_time")))
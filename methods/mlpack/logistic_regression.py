@@ -25,6 +25,8 @@ if metrics_folder not in sys.path:
 
 from log import *
 from profiler import *
+from description_cache import *
+from timer_parser import *
 from definitions import *
 from misc import *
 import shlex
@@ -34,9 +36,6 @@ try:
 except ImportError:
   import subprocess
 
-import re
-import collections
-
 '''
 This class implements the Logistic Regression Prediction benchmark.
 '''
@@ -59,25 +58,13 @@ class LogisticRegression(object):
     self.timeout = timeout
     self.debug = debug
 
-    # Get description from executable.
-    cmd = shlex.split(self.path + "mlpack_logistic_regression -h")
-    try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False)
-    except Exception as e:
-      Log.Fatal("Could not execute command: " + str(cmd))
-    else:
-      # Use regular expression pattern to get the description.
-      pattern = re.compile(br"""(.*?)Optional.*?options:""",
-          re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-      match = pattern.match(s)
-      if not match:
-        Log.Warn("Can't parse description", self.verbose)
-        description = ""
-      else:
-        description = match.group(1)
-
-      self.description = description
+  '''
+  The description of the method, the description is read from the '-h' output
+  of the executable the first time it's used.
+  '''
+  @property
+  def description(self):
+    return DescriptionCache.Description(self.path + "mlpack_logistic_regression")
 
   '''
   Destructor to clean up at the end. Use this method to remove created files.
@@ -149,11 +136,11 @@ class LogisticRegression(object):
       cmd = shlex.split(self.path + "mlpack_logistic_regression -t " +
           self.dataset + " -v " + self.OptionsToStr(options))
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run command with the nessecary arguments and parse the timers while the
+    # output is streamed. We have untrusted input so we disable all shell based
+    # features.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      timers = TimerParser.Run(cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -162,10 +149,10 @@ class LogisticRegression(object):
       return -1
 
     # Datastructure to store the results.
-    metrics = {}
+    metrics = timers.Metrics()
 
     # Parse data: runtime.
-    timer = self.parseTimer(s)
+    timer = timers.Timer(["saving_data", "loading_data", "total_time"])
 
     if timer != -1:
       metrics['Runtime'] = timer.total_time - timer.loading_data - timer.saving_data
@@ -177,7 +164,7 @@ class LogisticRegression(object):
       testData = LoadDataset(self.dataset[1])
       truelabels = LoadDataset(self.dataset[2])
 
-      predictedlabels = LoadDataset("predictions.csv")
+      predictedlabels = LoadDataset("predictions.csv", cache=False)
 
       confusionMatrix = Metrics.ConfusionMatrix(truelabels, predictedlabels)
       AvgAcc = Metrics.AverageAccuracy(confusionMatrix)
@@ -198,36 +185,3 @@ class LogisticRegression(object):
       metrics['Simple MSE'] = SimpleMSE
 
     return metrics
-
-  '''
-  Parse the timer data form a given string.
-
-  @param data - String to parse timer data from.
-  @return - Namedtuple that contains the timer data or -1 in case of an error.
-  '''
-  def parseTimer(self, data):
-    # Compile the regular expression pattern into a regular expression object to
-    # parse the timer data.
-    pattern = re.compile(br"""
-        .*?saving_data: (?P<saving_data>.*?)s.*?
-        """, re.VERBOSE|re.MULTILINE|re.DOTALL)
-    pattern2 = re.compile(br"""
-        .*?loading_data: (?P<loading_data>.*?)s.*?
-        """, re.VERBOSE|re.MULTILINE|re.DOTALL)
-    pattern3 = re.compile(br"""
-        .*?total_time: (?P<total_time>.*?)s.*?
-        """, re.VERBOSE|re.MULTILINE|re.DOTALL)
-
-    match1 = pattern.match(data)
-    match2 = pattern2.match(data)
-    match3 = pattern3.match(data)
-    if not (match1 and match2 and match3):
-      Log.Fatal("Can't parse the data: wrong format")
-      return -1
-    else:
-      # Create a namedtuple and return the timer data.
-      timer = collections.namedtuple('timer', ["loading_data", "total_time", "saving_data"])
-      return timer(float(match2.group("loading_data")),
-          float(match3.group("total_time")), float(match1.group("saving_data")))
-
-
@@ -19,6 +19,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 import mlpy
@@ -54,7 +55,7 @@ class KPCA(object):
 
       # Load input dataset.
       Log.Info("Loading dataset", self.verbose)
-      data = np.genfromtxt(self.dataset, delimiter=',')
+      data = LoadDataset(self.dataset)
 
       try:
         with totalTimer:
@@ -19,6 +19,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 import mlpy
@@ -58,8 +59,8 @@ class LARS(object):
 
       # Load input dataset.
       Log.Info("Loading dataset", self.verbose)
-      inputData = np.genfromtxt(self.dataset[0], delimiter=',')
-      responsesData = np.genfromtxt(self.dataset[1], delimiter=',')
+      inputData = LoadDataset(self.dataset[0])
+      responsesData = LoadDataset(self.dataset[1])
 
       try:
         with totalTimer:
@@ -82,7 +82,7 @@ class LinearRegression(object):
       # If the dataset contains two files then the second file is the test file.
       Log.Info("Loading dataset", self.verbose)
       if len(self.dataset) >= 2:
-        test_data = np.genfromtxt(self.dataset[1], delimiter=',')
+        test_data = LoadDataset(self.dataset[1])
 
       # Use the last row of the training set as the responses.
       X, y = SplitTrainData(self.dataset)
@@ -138,7 +138,7 @@ class LinearRegression(object):
       testData = LoadDataset(self.dataset[1])
       truelabels = LoadDataset(self.dataset[2])
 
-      predictedlabels = LoadDataset("mlpy_lr_predictions.csv")
+      predictedlabels = LoadDataset("mlpy_lr_predictions.csv", cache=False)
 
       confusionMatrix = Metrics.ConfusionMatrix(truelabels, predictedlabels)
       AvgAcc = Metrics.AverageAccuracy(confusionMatrix)
@@ -58,7 +58,7 @@ class ANN(object):
 
       # Load input dataset.
       Log.Info("Loading dataset", self.verbose)
-      queryData = np.genfromtxt(self.dataset[1], delimiter=',')
+      queryData = LoadDataset(self.dataset[1])
       train, label = SplitTrainData(self.dataset)
 
       with totalTimer:
@@ -146,11 +146,7 @@ class ADABOOST(object):
 
       truelabels = LoadDataset(self.dataset[2])
 
-      confusionMatrix = Metrics.ConfusionMatrix(truelabels, self.predictions)
-      metrics['ACC'] = Metrics.AverageAccuracy(confusionMatrix)
-      metrics['MCC'] = Metrics.MCCMultiClass(confusionMatrix)
-      metrics['Precision'] = Metrics.AvgPrecision(confusionMatrix)
-      metrics['Recall'] = Metrics.AvgRecall(confusionMatrix)
-      metrics['MSE'] = Metrics.SimpleMeanSquaredError(truelabels, self.predictions)
+      metrics.update(Metrics.AllClassificationMetrics(truelabels,
+          self.predictions))
 
     return metrics
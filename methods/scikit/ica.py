@@ -19,6 +19,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 from sklearn.decomposition import FastICA
@@ -53,7 +54,7 @@ class ICA(object):
       totalTimer = Timer()
 
       # Load input dataset.
-      data = np.genfromtxt(self.dataset, delimiter=',')
+      data = LoadDataset(self.dataset)
 
       opts = {}
       if "num_components" in options:
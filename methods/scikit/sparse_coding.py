@@ -19,6 +19,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 from sklearn.decomposition import SparseCoder
@@ -53,8 +54,8 @@ class SparseCoding(object):
       totalTimer = Timer()
 
       # Load input dataset.
-      inputData = np.genfromtxt(self.dataset[0], delimiter=',')
-      dictionary = np.genfromtxt(self.dataset[1], delimiter=',')
+      inputData = LoadDataset(self.dataset[0])
+      dictionary = LoadDataset(self.dataset[1])
 
       # Get all the parameters.
       opts = {}
@@ -19,6 +19,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 from modshogun import RealFeatures, MulticlassLabels, EuclideanDistance
@@ -59,11 +60,11 @@ class ALLKNN(object):
       try:
         Log.Info("Loading dataset", self.verbose)
         if len(self.dataset) == 2:
-          referenceData = np.genfromtxt(self.dataset[0], delimiter=',')
-          queryData = np.genfromtxt(self.dataset[1], delimiter=',')
+          referenceData = LoadDataset(self.dataset[0])
+          queryData = LoadDataset(self.dataset[1])
           queryFeat = RealFeatures(queryFeat.T)
         else:
-          referenceData = np.genfromtxt(self.dataset, delimiter=',')
+          referenceData = LoadDataset(self.dataset)
 
         # Labels are the last row of the dataset.
         labels = MulticlassLabels(referenceData[:, (referenceData.shape[1] - 1)])
@@ -19,6 +19,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import shlex
 import subprocess
@@ -62,10 +63,10 @@ class KMEANS(object):
       # file.
       Log.Info("Loading dataset", self.verbose)
       if len(self.dataset) == 2:
-        data = np.genfromtxt(self.dataset[0], delimiter=',')
-        centroids = np.genfromtxt(self.dataset[1], delimiter=',')
+        data = LoadDataset(self.dataset[0])
+        centroids = LoadDataset(self.dataset[1])
       else:
-        data = np.genfromtxt(self.dataset[0], delimiter=',')
+        data = LoadDataset(self.dataset[0])
 
       # Gather parameters.
       if "clusters" in options:
@@ -68,7 +68,7 @@ class LASSO(object):
       try:
         Log.Info("Loading dataset", self.verbose)
         if len(self.dataset) >= 2:
-          testSet = np.genfromtxt(self.dataset[1], delimiter=',')
+          testSet = LoadDataset(self.dataset[1])
 
         # Get all the parameters.
         lambda1 = None
@@ -25,6 +25,7 @@ if metrics_folder not in sys.path:
 from log import *
 from timer import *
 from definitions import *
+from misc import *
 
 import numpy as np
 from modshogun import RealFeatures, MulticlassLabels, GaussianNaiveBayes
@@ -73,8 +74,8 @@ class NBC(object):
       Log.Info("Loading dataset", self.verbose)
       try:
         # Load train and test dataset.
-        trainData = np.genfromtxt(self.dataset[0], delimiter=',')
-        testData = np.genfromtxt(self.dataset[1], delimiter=',')
+        trainData = LoadDataset(self.dataset[0])
+        testData = LoadDataset(self.dataset[1])
 
         # Labels are the last row of the training set.
         labels = MulticlassLabels(trainData[:, (trainData.shape[1] - 1)])
@@ -129,7 +130,7 @@ class NBC(object):
 
     if len(self.dataset) >= 3:
      
-      truelabels = np.genfromtxt(self.dataset[2], delimiter = ',')
+      truelabels = LoadDataset(self.dataset[2])
       
       confusionMatrix = Metrics.ConfusionMatrix(truelabels, self.predictions)
       
@@ -19,6 +19,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from timer import *
+from misc import *
 
 import numpy as np
 from modshogun import RealFeatures
@@ -43,7 +44,7 @@ class PCA(object):
 
     # Load input dataset.
     Log.Info("Loading dataset", verbose)
-    self.data = np.genfromtxt(dataset, delimiter=',')
+    self.data = LoadDataset(dataset)
 
   '''
   Use the shogun libary to implement Principal Components Analysis.
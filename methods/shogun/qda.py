@@ -63,11 +63,11 @@ class QDA(object):
       Log.Info("Loading dataset", self.verbose)
       try:
         # Load train and test dataset.
-        trainData = np.genfromtxt(self.dataset[0], delimiter=',')
+        trainData = LoadDataset(self.dataset[0])
         trainFeat = modshogun.RealFeatures(trainData[:,:-1].T)
 
         if len(self.dataset) == 2:
-          testSet = np.genfromtxt(self.dataset[1], delimiter=',')
+          testSet = LoadDataset(self.dataset[1])
           testFeat = modshogun.RealFeatures(testData.T)
 
         if len(options) > 0:
@@ -23,6 +23,7 @@ if metrics_folder not in sys.path:
 
 from log import *
 from profiler import *
+from java_server import *
 from definitions import *
 from misc import *
 
@@ -50,6 +51,7 @@ class NBC(object):
     self.dataset = dataset
     self.path = path
     self.timeout = timeout
+    self.coldTimer = None
     
   def __del__(self):
     Log.Info("Clean up.", self.verbose)
@@ -77,15 +79,18 @@ class NBC(object):
       return -1
 
     # Split the command using shell-like syntax.
-    cmd = shlex.split("java -classpath " + self.path + "/weka.jar" +
-        ":methods/weka" + " NBC -t " + self.dataset[0] + " -T " +
-        self.dataset[1])
+    classpath = self.path + "/weka.jar:methods/weka"
+    cmd = shlex.split("NBC -t " + self.dataset[0] + " -T " + self.dataset[1])
 
-    # Run command with the nessecary arguments and return its output as a byte
-    # string. We have untrusted input so we disable all shell based features.
+    # Run the method on the persistent java benchmark server and return its
+    # output as a byte string. The instance measures an extra cold run in a new
+    # JVM first, it pays for the class loading and the JIT warm-up and is only
+    # reported as ColdRuntime; the measured runs use the warm JVM.
     try:
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False,
-          timeout=self.timeout)
+      if self.coldTimer is None:
+        self.coldTimer = self.parseTimer(JavaServer.Run(classpath, cmd,
+            timeout=self.timeout, cold=True))
+      s = JavaServer.Run(classpath, cmd, timeout=self.timeout)
     except subprocess.TimeoutExpired as e:
       Log.Warn(str(e))
       return -2
@@ -102,14 +107,11 @@ class NBC(object):
     if timer != -1:
       metrics['Runtime'] = timer.total_time
       predictions = np.genfromtxt("weka_predicted.csv", delimiter=',')
-      truelabels = np.genfromtxt(self.dataset[2], delimiter = ',')
+      truelabels = LoadDataset(self.dataset[2])
       metrics['Runtime'] = timer.total_time
-      confusionMatrix = Metrics.ConfusionMatrix(truelabels, predictions)
-      metrics['ACC'] = Metrics.AverageAccuracy(confusionMatrix)
-      metrics['MCC'] = Metrics.MCCMultiClass(confusionMatrix)
-      metrics['Precision'] = Metrics.AvgPrecision(confusionMatrix)
-      metrics['Recall'] = Metrics.AvgRecall(confusionMatrix)
-      metrics['MSE'] = Metrics.SimpleMeanSquaredError(truelabels, predictions)
+      if self.coldTimer != -1:
+        metrics['ColdRuntime'] = self.coldTimer.total_time
+      metrics.update(Metrics.AllClassificationMetrics(truelabels, predictions))
 
       Log.Info(("total time: %fs" % (metrics['Runtime'])), self.verbose)
 
@@ -0,0 +1,83 @@
+/**
+ * @file BenchmarkServer.java
+ * @author Marcus Edel
+ *
+ * Persistent server to run the weka benchmark methods in a single JVM.
+ */
+
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.util.Arrays;
+
+/**
+ * This class implements a simple benchmark server. The server reads one
+ * request per line from stdin, a request contains the name of the benchmark
+ * class followed by the arguments, separated by tabs. The main method of the
+ * class is invoked in the running JVM, so the JVM startup, the class loading
+ * and the JIT warm-up are only paid by the first call. Everything the method
+ * writes to stdout and stderr is captured and sent back to the client after a
+ * header line of the form "<status> <length>".
+ */
+public class BenchmarkServer {
+
+  private static final String USAGE = String
+      .format("This program runs the main method of the requested benchmark\n"
+      + "classes and sends back the output. Every request is a single line\n"
+      + "of the form '<class>\\t<argument>\\t<argument>...' on stdin.");
+
+  public static void main(String args[]) throws Exception {
+    if (args.length > 0) {
+      System.err.println(USAGE);
+      return;
+    }
+
+    PrintStream out = System.out;
+    PrintStream err = System.err;
+    BufferedReader in = new BufferedReader(new InputStreamReader(System.in));
+
+    ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+    PrintStream capture = new PrintStream(buffer, true);
+
+    // Tell the client that the server is ready to accept requests.
+    out.print("READY\n");
+    out.flush();
+
+    String line;
+    while ((line = in.readLine()) != null) {
+      if (line.length() == 0)
+        continue;
+
+      String[] request = line.split("\t", -1);
+      String[] methodArgs = Arrays.copyOfRange(request, 1, request.length);
+
+      int status = 0;
+      buffer.reset();
+      System.setOut(capture);
+      System.setErr(capture);
+      try {
+        Method method = Class.forName(request[0]).getMethod("main",
+            String[].class);
+        method.invoke(null, (Object) methodArgs);
+      } catch (InvocationTargetException e) {
+        e.getCause().printStackTrace();
+        status = 1;
+      } catch (Exception e) {
+        e.printStackTrace();
+        status = 1;
+      } finally {
+        capture.flush();
+        System.setOut(out);
+        System.setErr(err);
+      }
+
+      byte[] data = buffer.toByteArray();
+      out.print(status + " " + data.length + "\n");
+      out.write(data, 0, data.length);
+      out.flush();
+    }
+  }
+}
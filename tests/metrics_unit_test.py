@@ -20,6 +20,62 @@ if metric_subfolder not in sys.path:
 
 from definitions import *
 import numpy as np
+import math
+
+'''
+The loop implementations of the per-class metrics the vectorized metrics are
+tested against.
+'''
+def LoopPrecision(class_i, CM):
+  truePositives = CM[class_i][class_i]
+  falsePositives = 0
+  for j in range(len(CM)):
+    falsePositives += CM[j][class_i]
+  falsePositives -= truePositives
+  totalPositives = truePositives + falsePositives
+  if totalPositives != 0:
+    return float(truePositives) / totalPositives
+  return 1
+
+def LoopMCC(class_i, CM):
+  l = len(CM)
+  truePositives = CM[class_i][class_i]
+  falsePositives = 0
+  falseNegatives = 0
+  for j in range(l):
+    falsePositives += CM[j][class_i]
+    falseNegatives += CM[class_i][j]
+  falsePositives -= truePositives
+  falseNegatives -= truePositives
+  trueNegatives = 0
+  for i in range(l):
+    if i != class_i:
+      for j in range(l):
+        trueNegatives += CM[i][j]
+      trueNegatives -= CM[i][class_i]
+  Numerator = (truePositives * trueNegatives) - (falsePositives * falseNegatives)
+  Denominator = math.sqrt((truePositives + falsePositives) *
+      (truePositives + falseNegatives) * (trueNegatives + falsePositives) *
+      (trueNegatives + falseNegatives))
+  if Denominator != 0:
+    return Numerator / Denominator
+  return 0
+
+def LoopMPI(class_i, truelabels, predictedlabels):
+  predictiveSum = 0
+  count = 0
+  for i in range(len(truelabels)):
+    if truelabels[i] == class_i:
+      count += 1
+      predicted_val = 0.05
+      actual_val = 0.05
+      if predictedlabels[i] != truelabels[i]:
+        predicted_val = 0.95
+      predictiveSum += ((actual_val * math.log(predicted_val, 2)) +
+          (predicted_val * math.log(1 - predicted_val, 2)))
+  if count != 0:
+    predictiveSum /= count
+  return predictiveSum + 1
 
 class Metrics_Test(unittest.TestCase):
 
@@ -117,3 +173,95 @@ class Metrics_Test(unittest.TestCase):
   def test_AvgMeanPredictiveInformation(self):
     result=Metrics.AvgMeanPredictiveInformation(self.CM, "tests/true_labels.csv", "tests/predicted_labels.csv")
     self.assertTrue(result > -1.7 and result <= -1.6)
+
+  '''
+  Test for the ClassCounts(...) method (TP, FP, FN, TN of the second class)
+  '''
+  def test_ClassCounts(self):
+    tp, fp, fn, tn = Metrics.ClassCounts(self.CM)
+    self.assertEqual((tp[1], fp[1], fn[1], tn[1]), (35, 29, 10, 61))
+    self.assertTrue(np.all(tp + fp + fn + tn == self.CM.sum()))
+
+  '''
+  Test for the vectorized per-class metrics, they have to match the loop
+  implementation (Precision: 11/21, 35/64, 25/50).
+  '''
+  def test_PerClassMetrics(self):
+    # The second matrix contains a class without predictions.
+    for CM in [self.CM, np.array([[3, 0, 1], [2, 0, 4], [0, 0, 5]])]:
+      precision = Metrics.Precisions(CM)
+      mcc = Metrics.MatthewsCorrelationCoefficients(CM)
+      for i in range(len(CM)):
+        self.assertAlmostEqual(precision[i], LoopPrecision(i, CM))
+        self.assertAlmostEqual(mcc[i], LoopMCC(i, CM))
+
+    self.assertTrue(np.allclose(Metrics.Precisions(self.CM),
+        [11.0 / 21.0, 35.0 / 64.0, 0.5]))
+    self.assertEqual(Metrics.PrecisionForAClass(1, [[3, 0], [2, 0]]), 1)
+    self.assertEqual(Metrics.MatthewsCorrelationCoefficientClass(1,
+        [[3, 0], [2, 0]]), 0)
+
+  '''
+  Test for the MPIArray(...) metric, it has to match the loop implementation.
+  '''
+  def test_MPIArray(self):
+    true_labels = np.genfromtxt("tests/true_labels.csv",delimiter=',')
+    predicted_labels = np.genfromtxt("tests/predicted_labels.csv",delimiter=',')
+    labels = Metrics.GetActualLabels(true_labels)
+    result = Metrics.MPIArray(labels, true_labels, predicted_labels)
+    for i, label in enumerate(labels):
+      self.assertAlmostEqual(result[i],
+          LoopMPI(label, true_labels, predicted_labels))
+
+  '''
+  Test for the ConfusionMatrix(...) method with float labels and a class that
+  is only predicted.
+  '''
+  def test_ConfusionMatrix(self):
+    result = Metrics.ConfusionMatrix([1.0, 2.0, 2.0, 3.0], [1.0, 2.0, 4.0, 3.0])
+    self.assertTrue(np.array_equal(result, [[1, 0, 0, 0],
+                                            [0, 1, 0, 1],
+                                            [0, 0, 1, 0],
+                                            [0, 0, 0, 0]]))
+
+  '''
+  Test for the ConfusionMatrixAccumulator, the accumulated confusion matrix
+  has to match the confusion matrix of all predictions.
+  '''
+  def test_ConfusionMatrixAccumulator(self):
+    true_labels = np.genfromtxt("tests/true_labels.csv",delimiter=',')
+    predicted_labels = np.genfromtxt("tests/predicted_labels.csv",delimiter=',')
+    accumulator = ConfusionMatrixAccumulator()
+    for i in range(0, len(true_labels), 3):
+      accumulator.Update(true_labels[i:i + 3], predicted_labels[i:i + 3])
+    self.assertTrue(np.array_equal(accumulator.CM,
+        Metrics.ConfusionMatrix(true_labels, predicted_labels)))
+
+  '''
+  Test for the AllClassificationMetrics(...) method.
+  '''
+  def test_AllClassificationMetrics(self):
+    true_labels = np.genfromtxt("tests/true_labels.csv",delimiter=',')
+    predicted_labels = np.genfromtxt("tests/predicted_labels.csv",delimiter=',')
+    result = Metrics.AllClassificationMetrics(true_labels, predicted_labels)
+
+    # The confusion matrix is built with a loop over the instances, the labels
+    # are 1, 2 and 3.
+    CM = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+    for i in range(len(true_labels)):
+      CM[int(true_labels[i]) - 1][int(predicted_labels[i]) - 1] += 1
+    self.assertEqual(CM, [[9, 7, 9], [7, 10, 7], [9, 8, 9]])
+
+    recalls = [float(CM[i][i]) / sum(CM[i]) for i in range(3)]
+    squaredError = 0
+    for i in range(len(true_labels)):
+      squaredError += (true_labels[i] - predicted_labels[i]) ** 2
+
+    self.assertAlmostEqual(result['ACC'], sum(recalls) / 3)
+    self.assertAlmostEqual(result['ACC'], (9 / 25.0 + 10 / 24.0 + 9 / 26.0) / 3)
+    self.assertAlmostEqual(result['Recall'], sum(recalls) / 3)
+    self.assertAlmostEqual(result['Precision'],
+        sum(LoopPrecision(i, CM) for i in range(3)) / 3)
+    self.assertAlmostEqual(result['MCC'],
+        sum(LoopMCC(i, CM) for i in range(3)) / 3)
+    self.assertAlmostEqual(result['MSE'], squaredError / len(true_labels))
@@ -0,0 +1,114 @@
+'''
+  @file sweep_unit_test.py
+  @author Marcus Edel
+
+  Test for the Sweep class.
+'''
+
+import unittest
+
+import os, sys, inspect
+
+
+'''
+Import the util path.
+'''
+util_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if util_subfolder not in sys.path:
+  sys.path.insert(0, util_subfolder)
+
+from sweep import *
+
+'''
+Test the expansion of the parameter sweeps.
+'''
+class Sweep_Test(unittest.TestCase):
+
+  '''
+  Test for the Parse(...) method.
+  '''
+  def test_Parse(self):
+    self.assertEqual(Sweep.Parse({"k": 3}), None)
+
+    sweep = Sweep.Parse({"k": "sweep(1, 1, 4)",
+        "tolerance": "sweep(0.1, 0.1, 0.3)", "leaf_size": 20})
+    self.assertEqual(sweep.plan, "grid")
+    self.assertEqual(sorted(sweep.axes), [("k", "int", "1", "1", "4"),
+        ("tolerance", "float", "0.1", "0.1", "0.3")])
+
+    sweep = Sweep.Parse({"k": "sweep(10, -2, 4)", "sweep_plan": "random(5, 3)"})
+    self.assertEqual(sweep.axes, [("k", "int", "10", "-2", "4")])
+    self.assertEqual((sweep.plan, sweep.count, sweep.seed), ("random", 5, 3))
+
+    sweep = Sweep.Parse({"k": "sweep(1, 1, 9)",
+        "sweep_plan": "adaptive(6, 0.1, Accuracy)"})
+    self.assertEqual((sweep.plan, sweep.count, sweep.tolerance, sweep.metric),
+        ("adaptive", 6, 0.1, "Accuracy"))
+
+  '''
+  Test the invalid sweeps and plans.
+  '''
+  def test_ParseInvalid(self):
+    for options in [{"k": "sweep(1, 0, 4)"}, {"k": "sweep(4, 1, 1)"},
+        {"k": "sweep(1, -1, 4)"}, {"k": "sweep(a, 1, 4)"},
+        {"k": "sweep(1, 1, 4)", "sweep_plan": "random"},
+        {"k": "sweep(1, 1, 4)", "sweep_plan": "spiral(3)"},
+        {"k": "sweep(1, 1, 4)", "m": "sweep(1, 1, 4)",
+        "sweep_plan": "adaptive(5)"}]:
+      self.assertRaises(Exception, Sweep.Parse, options)
+
+  '''
+  Test for the Points(...) method with the grid plan.
+  '''
+  def test_Points(self):
+    sweep = Sweep([("k", "int", "1", "1", "3"), ("m", "int", "10", "-5", "5")])
+    self.assertEqual(sweep.Points(), [{"k": 1, "m": 10}, {"k": 1, "m": 5},
+        {"k": 2, "m": 10}, {"k": 2, "m": 5}, {"k": 3, "m": 10},
+        {"k": 3, "m": 5}])
+
+    sweep = Sweep([("alpha", "float", "0.5", "0.25", "1.0")])
+    self.assertEqual([p["alpha"] for p in sweep.Points()], [0.5, 0.75, 1.0])
+
+  '''
+  Test for the Sample(...) method.
+  '''
+  def test_Sample(self):
+    lengths = [1001, 11]
+    for plan in ["random", "lhs"]:
+      indices = Sweep([], plan, 4, seed=7).Sample(lengths)
+      self.assertEqual(indices, Sweep([], plan, 4, seed=7).Sample(lengths))
+      self.assertTrue(len(indices) <= 4)
+      self.assertEqual(len(indices), len(set(indices)))
+      for index in indices:
+        self.assertTrue(0 <= index[0] < 1001 and 0 <= index[1] < 11)
+
+    # Every stratum of the latin hypercube is used once.
+    indices = Sweep([], "lhs", 4, seed=7).Sample(lengths)
+    self.assertEqual(sorted(i * 4 // 1000 for i, j in indices), [0, 1, 2, 3])
+
+    # The sampled points are points of the grid.
+    sweep = Sweep([("k", "int", "1", "2", "21")], "lhs", 5)
+    for point in sweep.Points():
+      self.assertTrue(point["k"] in range(1, 22, 2))
+
+  '''
+  Test for the Refine(...) method of the adaptive plan.
+  '''
+  def test_Refine(self):
+    sweep = Sweep([("k", "int", "0", "1", "20")], "adaptive", 6, tolerance=0.1)
+    self.assertEqual(sweep.Initial(), [0, 5, 10, 15, 20])
+
+    # Only the interval with the change is bisected.
+    self.assertEqual(sweep.Refine({0: 1.0, 10: 1.0, 20: 5.0}), [15])
+
+    # The largest change first, as long as the budget isn't used up.
+    self.assertEqual(sweep.Refine({0: 1.0, 5: 2.0, 10: 5.0, 15: 5.5,
+        20: 5.5}), [7])
+
+    # Intervals next to a failed run and intervals of neighbours are skipped.
+    self.assertEqual(sweep.Refine({0: 1.0, 1: 5.0, 10: None, 20: 9.0}), [])
+    self.assertEqual(sweep.Refine({0: 3.0, 20: 3.0}), [])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,75 @@
+'''
+  @file timer_parser_unit_test.py
+  @author Marcus Edel
+
+  Test for the TimerParser class.
+'''
+
+import unittest
+
+import os, sys, inspect
+
+
+'''
+Import the util path.
+'''
+util_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], '../util')))
+if util_subfolder not in sys.path:
+  sys.path.insert(0, util_subfolder)
+
+from timer_parser import *
+
+'''
+Test the parser with the verbose output of the mlpack executables.
+'''
+class TimerParser_Test(unittest.TestCase):
+
+  '''
+  Test for the ParseLine(...) method with the human readable representation of
+  the timer.
+  '''
+  def test_ParseLine(self):
+    parser = TimerParser()
+    parser.ParseLine("[INFO ]   total_time: 61.5s (1 mins, 1.5 secs)")
+    parser.ParseLine("\x1b[0;32m[INFO ] \x1b[0m  tree_building: 0.012345s")
+    parser.ParseLine("[INFO ] 1024 base cases were calculated.")
+    self.assertEqual(parser.Get("total_time"), 61.5)
+    self.assertEqual(parser.Get("tree_building"), 0.012345)
+    self.assertEqual(parser.Get("base_cases"), 1024)
+
+  '''
+  Test the JSON timer dump.
+  '''
+  def test_JSONDump(self):
+    parser = TimerParser.Parse(
+        b'{"timers": {"total_time": 1.25, "loading_data": "0.5s"}}\n')
+    self.assertEqual(parser.Get("total_time"), 1.25)
+    self.assertEqual(parser.Get("loading_data"), 0.5)
+    self.assertEqual(parser.Metrics()["LoadingData"], 0.5)
+
+  '''
+  Test a timer line that is split across two chunks.
+  '''
+  def test_SplitLine(self):
+    parser = TimerParser()
+    parser.Feed(b"[INFO ]   total_time: 12.")
+    self.assertEqual(parser.Get("total_time"), -1)
+    parser.Feed(b"75s (12.75 secs)\n[INFO ]   saving_data: 0.1s")
+    self.assertEqual(parser.Get("total_time"), 12.75)
+
+    # The last line doesn't end with a newline.
+    parser.Close()
+    self.assertEqual(parser.Get("saving_data"), 0.1)
+
+  '''
+  Test the missing timer case.
+  '''
+  def test_MissingTimer(self):
+    parser = TimerParser.Parse(b"[INFO ]   total_time: 1.5s\n")
+    self.assertEqual(parser.Get("tree_building"), -1)
+    self.assertEqual(parser.Timer(["total_time", "tree_building"]), -1)
+    self.assertEqual(parser.Timer(["total_time"]).total_time, 1.5)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,142 @@
+'''
+  @file bootstrap.py
+  @author Marcus Edel
+
+  Functions to bootstrap the metrics of the benchmark trials.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import numbers
+import numpy as np
+
+'''
+This class implements the bootstrap of the per-trial metrics. All metrics of a
+benchmark are resampled at once: the trials are stored as (trials x metrics)
+matrix and a single (count x trials) index matrix selects the resampled trials,
+so the bootstrap doesn't loop over the resamples or the metrics.
+'''
+class Bootstrap(object):
+
+  # The percentiles of the two-sided 95% confidence interval.
+  PERCENTILES = [2.5, 97.5]
+
+  '''
+  Get the names of the metrics that are numbers in every trial.
+
+  @param trials - List of metric dictionaries, one for every trial.
+  @return Sorted list of the metric names.
+  '''
+  @staticmethod
+  def NumericKeys(trials):
+    keys = set(trials[0].keys()) if trials else set()
+    for trial in trials:
+      keys &= set(k for k, v in trial.items() if isinstance(v, numbers.Real)
+          and not isinstance(v, bool))
+    return sorted(keys)
+
+  '''
+  Bootstrap the mean of the given trials.
+
+  @param trials - List of metric dictionaries, one for every trial.
+  @param count - The number of bootstrap resamples.
+  @param seed - The seed of the random number generator (None for a random
+  seed).
+  @return Dictionary that contains for every metric a dictionary with the mean,
+  the standard error and the lower and upper bound of the 95% confidence
+  interval of the mean or None if there are no trials.
+  '''
+  @staticmethod
+  def Metrics(trials, count, seed=None):
+    keys = Bootstrap.NumericKeys(trials)
+    if not keys or count <= 0:
+      return None
+
+    values = np.array([[trial[k] for k in keys] for trial in trials],
+        dtype=np.float64)
+    random = np.random.RandomState(seed)
+    index = random.randint(0, values.shape[0], size=(count, values.shape[0]))
+
+    # The means of all resamples, a (count x metrics) matrix.
+    means = values[index].mean(axis=1)
+    lower, upper = np.percentile(means, Bootstrap.PERCENTILES, axis=0)
+    std = means.std(axis=0)
+
+    metrics = {}
+    for i, key in enumerate(keys):
+      metrics[key] = {"Mean": float(values[:, i].mean()),
+          "Std": float(std[i]), "Lower": float(lower[i]),
+          "Upper": float(upper[i])}
+
+    return metrics
+
+  '''
+  Normalize the bootstrapped metrics of the libraries, every metric is divided
+  by the largest absolute mean of all libraries, so the scores of the
+  libraries are comparable across datasets.
+
+  @param libraries - Dictionary with the library name as key and the
+  bootstrapped metrics as value.
+  @return Dictionary with the library name as key and a dictionary with the
+  normalized score of every metric as value.
+  '''
+  @staticmethod
+  def Normalize(libraries):
+    keys = sorted(set(k for metrics in libraries.values() for k in metrics))
+    names = list(libraries.keys())
+
+    # A (libraries x metrics) matrix of the means, nan for missing metrics.
+    means = np.full((len(names), len(keys)), np.nan)
+    for i, name in enumerate(names):
+      for j, key in enumerate(keys):
+        if key in libraries[name]:
+          means[i, j] = libraries[name][key]["Mean"]
+
+    scale = np.nanmax(np.abs(means), axis=0) if names else np.array([])
+    scale[scale == 0] = 1
+    scores = means / scale
+
+    normalized = {}
+    for i, name in enumerate(names):
+      normalized[name] = {}
+      for j, key in enumerate(keys):
+        if not np.isnan(scores[i, j]):
+          normalized[name][key] = float(scores[i, j])
+
+    return normalized
+
+  '''
+  Average the normalized scores of the libraries over all datasets.
+
+  @param scores - List of normalized scores (see Normalize), one for every
+  dataset.
+  @return Dictionary with the library name as key and a dictionary with the
+  average score of every metric as value.
+  '''
+  @staticmethod
+  def AverageScores(scores):
+    totals = {}
+    for datasetScores in scores:
+      for name, metrics in datasetScores.items():
+        total = totals.setdefault(name, {})
+        for key, value in metrics.items():
+          total.setdefault(key, []).append(value)
+
+    average = {}
+    for name, metrics in totals.items():
+      average[name] = {}
+      for key, values in sorted(metrics.items()):
+        average[name][key] = round(float(np.mean(values)), 4)
+
+    return average
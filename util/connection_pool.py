@@ -0,0 +1,116 @@
+'''
+  @file connection_pool.py
+  @author Marcus Edel
+
+  Class to share database connections.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import threading
+
+'''
+This class implements a pool of database connections. A connection is checked
+with a health check before it's handed out, broken connections are closed and
+replaced by a new connection. The connections are never shared with a forked
+process.
+'''
+class ConnectionPool(object):
+
+  # The pools of the current process, indexed by the connection settings.
+  pools = {}
+
+  '''
+  Create the pool.
+
+  @param connect - Function to open a new connection.
+  @param check - Function that raises an exception if the given connection is
+  broken.
+  @param size - The maximum number of idle connections.
+  '''
+  def __init__(self, connect, check, size=4):
+    self.connect = connect
+    self.check = check
+    self.size = size
+    self.idle = []
+    self.pid = os.getpid()
+    self.lock = threading.Lock()
+
+  '''
+  Get a healthy connection from the pool or open a new connection.
+
+  @return The connection.
+  '''
+  def Get(self):
+    while True:
+      with self.lock:
+        # Don't use the connections of the parent process.
+        if self.pid != os.getpid():
+          self.idle = []
+          self.pid = os.getpid()
+
+        if not self.idle:
+          break
+        con = self.idle.pop()
+
+      try:
+        self.check(con)
+        return con
+      except Exception as e:
+        Log.Warn("Discard broken database connection: " + str(e))
+        ConnectionPool.Close(con)
+
+    return self.connect()
+
+  '''
+  Return the given connection to the pool.
+
+  @param con - The connection.
+  '''
+  def Put(self, con):
+    with self.lock:
+      if self.pid == os.getpid() and len(self.idle) < self.size:
+        self.idle.append(con)
+        return
+
+    ConnectionPool.Close(con)
+
+  '''
+  Close the given connection, errors are ignored since the connection may
+  already be broken.
+
+  @param con - The connection.
+  '''
+  @staticmethod
+  def Close(con):
+    try:
+      con.close()
+    except Exception:
+      pass
+
+  '''
+  Get the pool for the given connection settings, the pool is created if
+  necessary.
+
+  @param key - The connection settings.
+  @param connect - Function to open a new connection.
+  @param check - Function that raises an exception if the given connection is
+  broken.
+  @return The pool.
+  '''
+  @staticmethod
+  def Pool(key, connect, check):
+    if key not in ConnectionPool.pools:
+      ConnectionPool.pools[key] = ConnectionPool(connect, check)
+    return ConnectionPool.pools[key]
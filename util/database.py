@@ -17,16 +17,39 @@ try:
 except ImportError:
   pass
 
+from connection_pool import *
+
+import atexit
+import collections
 import datetime
+import functools
 import json
+import random
+import time
 
 '''
 This class implements functions to handle the database.
 '''
 class Database:
 
+  # The number of seconds a sqlite operation waits for a lock held by another
+  # process before it fails.
+  BUSY_TIMEOUT = 60
+
+  # The number of attempts of a transaction that failed because the database
+  # is locked, the delay between the attempts is doubled every time.
+  RETRIES = 6
+  RETRY_DELAY = 0.1
+
+  # MySQL errors of a lost connection (server has gone away, lost connection
+  # during query, lost connection at handshake).
+  CONNECTION_ERRORS = [2006, 2013, 2055]
+
   '''
-  Open the database connection.
+  Open the database connection. The sqlite database is opened in WAL mode, so
+  several benchmark processes can log into the same database; readers don't
+  block the writer and the writers wait for each other. The mysql connection is
+  taken from a connection pool and replaced transparently if it's lost.
 
   @param driver - Driver used for the connection (mysql or sqlite).
   @param database - Path to the database or databse name.
@@ -46,20 +69,252 @@ class Database:
     self.database = database
     self.password = password
     self.driver = driver
-    self.error = 0
+
+    # The buffered result records (None if the records are written
+    # immediately).
+    self.buffer = None
+
+    # The number of nested method calls, only the outermost call is repeated
+    # after a reconnect.
+    self.depth = 0
 
     if driver == "mysql":
-      self.con = mdb.connect(host=host, port=port, user=user, db=database, passwd=password)
+      def Connect():
+        con = mdb.connect(host=host, port=port, user=user, db=database,
+            passwd=password)
+        con.cursor().execute('SET FOREIGN_KEY_CHECKS = 0')
+        return con
+
+      self.pool = ConnectionPool.Pool(("mysql", host, port, user, database),
+          Connect, lambda con: con.ping())
+      self.con = self.pool.Get()
       self.cur = self.con.cursor()
-      self.cur.execute('SET FOREIGN_KEY_CHECKS = 0')
 
     elif driver == "sqlite":
-      self.con = sqlite3.connect(database)
+      self.pool = None
+      self.con = sqlite3.connect(database, timeout=Database.BUSY_TIMEOUT)
       self.con.execute('pragma foreign_keys = on')
+      self.con.execute('pragma journal_mode = wal')
+      self.con.execute('pragma synchronous = normal')
       self.cur = self.con.cursor()
 
   '''
-  Create a new build table.
+  Open a second connection to the same database, e.g. to generate the reports
+  while the benchmark writes into the database. The mysql connection is taken
+  from the same connection pool.
+
+  @return The database object of the new connection.
+  '''
+  def Reader(self):
+    return Database(driver=self.driver, database=self.database,
+        host=self.host, user=self.user, password=self.password, port=self.port)
+
+  '''
+  Write the buffered records and close the connection, the mysql connection is
+  returned to the connection pool.
+  '''
+  def Close(self):
+    self.StopBuffer()
+    if self.pool:
+      self.pool.Put(self.con)
+    else:
+      self.con.close()
+    self.con = None
+    self.cur = None
+
+  '''
+  Check if the given exception was raised because the connection to the
+  database server was lost.
+
+  @param e - The exception.
+  @return True if the operation can be tried again with a new connection.
+  '''
+  def Disconnected(self, e):
+    if self.driver == "mysql":
+      return isinstance(e, mdb.InterfaceError) or \
+          (isinstance(e, mdb.OperationalError) and bool(e.args) and
+          e.args[0] in Database.CONNECTION_ERRORS)
+    return False
+
+  '''
+  Replace the lost connection by a healthy connection from the pool.
+  '''
+  def Reconnect(self):
+    ConnectionPool.Close(self.con)
+    self.con = self.pool.Get()
+    self.cur = self.con.cursor()
+
+  '''
+  Check if the given exception was raised because the database is locked by
+  another process.
+
+  @param e - The exception.
+  @return True if the operation can be tried again.
+  '''
+  def Locked(self, e):
+    if self.driver == "sqlite":
+      return isinstance(e, sqlite3.OperationalError) and \
+          ("locked" in str(e) or "busy" in str(e))
+    elif self.driver == "mysql":
+      # Lock wait timeout and deadlock.
+      return isinstance(e, mdb.OperationalError) and e.args and \
+          e.args[0] in [1205, 1213]
+    return False
+
+  '''
+  Call the given function, which executes a complete transaction, and try
+  again with an exponential backoff if the database is locked.
+
+  @param function - The function to call.
+  @return The return value of the function.
+  '''
+  def Retry(self, function):
+    delay = Database.RETRY_DELAY
+    for attempt in range(Database.RETRIES):
+      try:
+        return function()
+      except Exception as e:
+        if attempt == Database.RETRIES - 1 or not self.Locked(e):
+          raise
+
+      # The random part avoids that the waiting processes retry at the same
+      # time.
+      time.sleep(delay * (1 + random.random()))
+      delay *= 2
+
+  '''
+  Buffer the result records (results, metrics, bootstrap and memory records)
+  instead of writing every record in its own transaction. The buffered records
+  are written with Flush(); the remaining records are written when the process
+  exits. The methods that read these tables flush the buffer first.
+  '''
+  def StartBuffer(self):
+    if self.buffer is None:
+      self.buffer = collections.OrderedDict()
+      atexit.register(self.Flush)
+
+  '''
+  Write the buffered records and write every following record immediately.
+  '''
+  def StopBuffer(self):
+    if self.buffer is not None:
+      self.Flush()
+      self.buffer = None
+      atexit.unregister(self.Flush)
+
+  '''
+  Write all buffered records with a single executemany() call per table inside
+  one transaction.
+  '''
+  def Flush(self):
+    if not self.buffer:
+      return
+
+    buffer = self.buffer
+    self.buffer = collections.OrderedDict()
+
+    def Write():
+      with self.con:
+        for table, records in buffer.items():
+          self.cur.executemany(self.InsertCommand(table, len(records[0])),
+              records)
+          if table == "results":
+            self.InvalidateSums(set(record[0] for record in records))
+
+    try:
+      self.Retry(Write)
+    except Exception:
+      # The transaction was rolled back, keep the records for the next flush.
+      for table, records in self.buffer.items():
+        buffer.setdefault(table, []).extend(records)
+      self.buffer = buffer
+      raise
+
+  '''
+  Get the insert command for the given table.
+
+  @param table - The name of the table.
+  @param columns - The number of values without the id.
+  @return The insert command for the driver.
+  '''
+  def InsertCommand(self, table, columns):
+    placeholder = "%s" if self.driver == "mysql" else "?"
+    return "INSERT INTO " + table + " VALUES (NULL" + \
+        ("," + placeholder) * columns + ")"
+
+  '''
+  Add a new record to the given table, the record is buffered if the buffer is
+  enabled.
+
+  @param table - The name of the table.
+  @param values - The values of the record without the id.
+  '''
+  def Insert(self, table, values):
+    if self.buffer is not None:
+      self.buffer.setdefault(table, []).append(values)
+    else:
+      def Write():
+        with self.con:
+          self.cur.execute(self.InsertCommand(table, len(values)), values)
+          if table == "results":
+            self.InvalidateSums([values[0]])
+
+      self.Retry(Write)
+
+  '''
+  Execute the given parameterized statement and return the records. The
+  placeholders are written as '%s' and converted for the sqlite driver; the
+  statement text doesn't depend on the values, so the drivers can reuse the
+  prepared statement.
+
+  @param command - The statement.
+  @param values - The values of the placeholders.
+  @return The records.
+  '''
+  def Query(self, command, values=()):
+    if self.driver == "sqlite":
+      command = command.replace("%s", "?")
+
+    def Read():
+      with self.con:
+        self.cur.execute(command, values)
+        return self.cur.fetchall()
+
+    return self.Retry(Read)
+
+  '''
+  Check if the given record is in the given table, e.g. to find out if a write
+  was committed before the connection was lost.
+
+  @param table - The name of the table.
+  @param values - The values of the record without the id.
+  @return True if the table contains the record.
+  '''
+  def Contains(self, table, values):
+    self.Query("SELECT * FROM " + table + " LIMIT 0")
+    columns = [column[0] for column in self.cur.description][1:]
+    equal = " <=> %s" if self.driver == "mysql" else " IS %s"
+    return bool(self.Query("SELECT 1 FROM " + table + " WHERE " +
+        " AND ".join(column + equal for column in columns) + " LIMIT 1",
+        tuple(values)))
+
+  '''
+  Drop the buffered records if a flush committed them before the connection was
+  lost. The transaction of a flush is atomic, so the first record tells if the
+  whole buffer was written.
+  '''
+  def DropCommittedBuffer(self):
+    if not self.buffer:
+      return
+
+    table, records = next(iter(self.buffer.items()))
+    if self.Contains(table, records[0]):
+      self.buffer = collections.OrderedDict()
+
+  '''
+  Create a new build table. The environment column contains the fingerprint of
+  the measurement environment (see Environment) as JSON. Tables of older
+  databases get the new column.
   '''
   def CreateBuildTable(self):
     comand = """
@@ -67,6 +322,7 @@ class Database:
           id INTEGER PRIMARY KEY %s,
           build TIMESTAMP NOT NULL,
           libary_id INTEGER NOT NULL,
+          environment TEXT,
 
           FOREIGN KEY(libary_id) REFERENCES libraries(id) ON DELETE CASCADE
         );
@@ -74,8 +330,17 @@ class Database:
 
     if self.driver == "mysql":
       self.cur.execute(comand % "AUTO_INCREMENT")
+      columns = [c[0] for c in self.Query("SELECT column_name FROM "
+          "information_schema.columns WHERE table_schema=DATABASE() AND "
+          "table_name='builds'")]
     elif self.driver == "sqlite":
       self.con.executescript(comand % "AUTOINCREMENT")
+      columns = [c[1] for c in self.Query("PRAGMA table_info(builds)")]
+
+    if "environment" not in columns:
+      with self.con:
+        self.cur.execute("ALTER TABLE builds ADD COLUMN environment TEXT")
+        self.cur.execute("UPDATE builds SET environment=''")
 
   '''
   Create a new libraries table.
@@ -220,6 +485,25 @@ class Database:
     elif self.driver == "sqlite":
       self.con.executescript(comand % "AUTOINCREMENT")
 
+  '''
+  Create a new table for the cached sums of the time column of every build.
+  '''
+  def CreateBuildSumsTable(self):
+    comand = """
+        CREATE TABLE IF NOT EXISTS build_sums (
+          build_id INTEGER PRIMARY KEY,
+          libary_id INTEGER NOT NULL,
+          time REAL,
+
+          FOREIGN KEY(build_id) REFERENCES builds(id) ON DELETE CASCADE
+        );
+        """
+
+    if self.driver == "mysql":
+      self.cur.execute(comand)
+    elif self.driver == "sqlite":
+      self.con.executescript(comand)
+
   '''
   Create a new memory table.
   '''
@@ -267,7 +551,11 @@ class Database:
       self.con.executescript(comand % "AUTOINCREMENT")
 
   '''
-  Create a table to hold information about sweeps.
+  Create a table to hold information about sweeps. The type, begin, step and end
+  columns describe the first swept option, the parameters column contains all
+  swept options of a multi-dimensional sweep (as JSON) and the plan column the
+  plan of the sweep; both are empty for the one-dimensional grid sweep. Tables
+  of older databases get the new columns.
   '''
   def CreateSweepsTable(self):
     command = """
@@ -276,14 +564,78 @@ class Database:
           type TEXT NOT NULL,
           begin TEXT NOT NULL,
           step TEXT NOT NULL,
-          end TEXT NOT NULL
+          end TEXT NOT NULL,
+          parameters TEXT,
+          plan TEXT
         );
         """
 
     if self.driver == "mysql":
       self.cur.execute(command % "AUTO_INCREMENT")
+      columns = [c[0] for c in self.Query("SELECT column_name FROM "
+          "information_schema.columns WHERE table_schema=DATABASE() AND "
+          "table_name='sweeps'")]
     elif self.driver == "sqlite":
       self.con.executescript(command % "AUTOINCREMENT")
+      columns = [c[1] for c in self.Query("PRAGMA table_info(sweeps)")]
+
+    for column in ["parameters", "plan"]:
+      if column not in columns:
+        with self.con:
+          self.cur.execute("ALTER TABLE sweeps ADD COLUMN " + column + " TEXT")
+          self.cur.execute("UPDATE sweeps SET " + column + "=''")
+
+  '''
+  Create a table to hold the points of the sweeps, the option values of every
+  sweep step.
+  '''
+  def CreateSweepPointsTable(self):
+    command = """
+        CREATE TABLE IF NOT EXISTS sweep_points (
+          sweep_id INTEGER NOT NULL,
+          sweep_elem_id INTEGER NOT NULL,
+          point TEXT NOT NULL,
+
+          PRIMARY KEY(sweep_id, sweep_elem_id),
+          FOREIGN KEY(sweep_id) REFERENCES sweeps(id) ON DELETE CASCADE
+        );
+        """
+
+    if self.driver == "mysql":
+      self.cur.execute(command)
+    elif self.driver == "sqlite":
+      self.con.executescript(command)
+
+  # The secondary indexes of the tables (name, table, columns). The result
+  # indexes start with the build id, so they also serve the lookups of a whole
+  # build.
+  INDEXES = [
+      ("builds_libary_build", "builds", "libary_id, build"),
+      ("results_lookup", "results",
+       "build_id, method_id, dataset_id, sweep_id, sweep_elem_id"),
+      ("metrics_lookup", "metrics",
+       "build_id, method_id, dataset_id, sweep_id, sweep_elem_id"),
+      ("bootstrap_lookup", "bootstrap",
+       "build_id, method_id, dataset_id, sweep_id, sweep_elem_id"),
+      ("memory_lookup", "memory",
+       "build_id, method_id, dataset_id, sweep_id, sweep_elem_id")]
+
+  '''
+  Create the missing secondary indexes, so existing databases are migrated
+  when the tables are created.
+  '''
+  def CreateIndexes(self):
+    for name, table, columns in Database.INDEXES:
+      if self.driver == "mysql":
+        # MySQL doesn't support CREATE INDEX IF NOT EXISTS.
+        if not self.Query("SELECT index_name FROM information_schema.statistics"
+            " WHERE table_schema=DATABASE() AND table_name=%s AND "
+            "index_name=%s", (table, name)):
+          self.cur.execute("CREATE INDEX " + name + " ON " + table + " ("
+              + columns + ")")
+      elif self.driver == "sqlite":
+        self.con.execute("CREATE INDEX IF NOT EXISTS " + name + " ON " + table
+            + " (" + columns + ")")
 
   '''
   Create a new build, libraries, datasets and results table.
@@ -299,29 +651,56 @@ class Database:
     self.CreateMethodInfoTable()
     self.CreateMetricBootstrapTable()
     self.CreateSweepsTable()
+    self.CreateSweepPointsTable()
+    self.CreateBuildSumsTable()
+    self.CreateIndexes()
 
   '''
   Add a new build record to the builds table.
 
   @param libaryId - The id of the library.
+  @param environment - The fingerprint of the measurement environment as JSON.
   @return The new build id.
   '''
-  def NewBuild(self, libaryId):
+  def NewBuild(self, libaryId, environment=""):
     with self.con:
-      command = "INSERT INTO builds VALUES (NULL,%s,%s)"
+      command = "INSERT INTO builds VALUES (NULL,%s,%s,%s)"
 
       if self.driver == "mysql":
-        self.cur.execute(command, (datetime.datetime.now(), libaryId))
+        self.cur.execute(command, (datetime.datetime.now(), libaryId,
+            environment))
         self.cur.execute("SELECT LAST_INSERT_ID()")
 
       elif self.driver == "sqlite":
-        self.cur.execute(command % ('?', '?'),
-            (datetime.datetime.now(), libaryId))
+        self.cur.execute(command % ('?', '?', '?'),
+            (datetime.datetime.now(), libaryId, environment))
 
         self.cur.execute("SELECT last_insert_rowid()")
 
       return self.cur.fetchall()[0][0]
 
+  '''
+  Set the fingerprint of the measurement environment of the given build, e.g.
+  if the results of the build are updated.
+
+  @param buildId - The id of the build.
+  @param environment - The fingerprint of the measurement environment as JSON.
+  '''
+  def UpdateBuildEnvironment(self, buildId, environment):
+    with self.con:
+      self.Query("UPDATE builds SET environment=%s WHERE id=%s",
+          (environment, buildId))
+
+  '''
+  Get the fingerprint of the measurement environment of the given build.
+
+  @param buildId - The id of the build.
+  @return The fingerprint as JSON or None if the build has no fingerprint.
+  '''
+  def GetBuildEnvironment(self, buildId):
+    res = self.Query("SELECT environment FROM builds WHERE id=%s", (buildId,))
+    return res[0][0] if res and res[0][0] else None
+
   '''
   Add a new metrics result record to the metric table.
   @param buildId - The id of the build.
@@ -334,30 +713,8 @@ class Database:
   '''
   def NewMetricResult(self, buildId, libaryId, metric, datasetId, methodId,
                       sweepId=-1, sweepElementId=-1):
-    try:
-      with self.con:
-        command = "INSERT INTO metrics VALUES (NULL,%s,%s,%s,%s,%s,%s,%s)"
-
-        if self.driver == "mysql":
-          self.cur.execute(command,
-              (buildId, libaryId, str(metric), datasetId, methodId, sweepId,
-               sweepElementId))
-
-        elif self.driver == "sqlite":
-          self.cur.execute(command % ('?', '?', '?', '?', '?', '?', '?'),
-              (buildId, libaryId, str(metric), datasetId, methodId, sweepId,
-               sweepElementId))
-
-        self.error = 0
-    except Exception:
-      if self.error == 0:
-        self.error = 1
-        self.con = mdb.connect(host=self.host, port=self.port, user=self.user, db=self.database, passwd=self.password)
-        self.cur = self.con.cursor()
-        self.cur.execute('SET FOREIGN_KEY_CHECKS = 0')
-
-        self.NewMetricResult(buildId, libaryId, metric, datasetId, methodId,
-                             sweepId, sweepElementId)
+    self.Insert("metrics", (buildId, libaryId, str(metric), datasetId,
+        methodId, sweepId, sweepElementId))
 
   '''
   Add a new metric result record to the bootstrap table.
@@ -371,18 +728,8 @@ class Database:
   '''
   def NewBootstrapResult(self, buildId, libaryId, metric, datasetId, methodId,
                          sweepId=-1, sweepElementId=-1):
-    with self.con:
-      command = "INSERT INTO bootstrap VALUES (NULL,%s,%s,%s,%s,%s,%s,%s)"
-
-      if self.driver == "mysql":
-        self.cur.execute(command,
-            (buildId, libaryId, str(metric), datasetId, methodId, sweepId,
-             sweepElementId))
-
-      elif self.driver == "sqlite":
-        self.cur.execute(command % ('?', '?', '?', '?', '?', '?', '?'),
-            (buildId, libaryId, str(metric), datasetId, methodId, sweepId,
-             sweepElementId))
+    self.Insert("bootstrap", (buildId, libaryId, str(metric), datasetId,
+        methodId, sweepId, sweepElementId))
 
   '''
   Create a new sweep.
@@ -391,92 +738,145 @@ class Database:
   @param sweepBegin First value of the sweep.
   @param sweepStep Step size of the sweep.
   @param sweepEnd Final value of the sweep.
+  @param parameters All swept options of a multi-dimensional sweep (JSON).
+  @param plan The plan of the sweep.
   '''
-  def NewSweep(self, sweepType, sweepBegin, sweepStep, sweepEnd):
+  def NewSweep(self, sweepType, sweepBegin, sweepStep, sweepEnd, parameters="",
+      plan=""):
     with self.con:
-      command = "INSERT INTO sweeps VALUES (NULL, %s, %s, %s, %s)"
+      command = ("INSERT INTO sweeps (type, begin, step, end, parameters, plan) "
+          "VALUES (%s, %s, %s, %s, %s, %s)")
 
       if self.driver == "mysql":
-        self.cur.execute(command, (sweepType, sweepBegin, sweepStep, sweepEnd))
+        self.cur.execute(command, (sweepType, sweepBegin, sweepStep, sweepEnd,
+            parameters, plan))
         self.cur.execute("SELECT LAST_INSERT_ID()")
       elif self.driver == "sqlite":
-        self.cur.execute(command % ('?', '?', '?', '?'),
-            (sweepType, sweepBegin, sweepStep, sweepEnd))
+        self.cur.execute(command.replace("%s", "?"), (sweepType, sweepBegin,
+            sweepStep, sweepEnd, parameters, plan))
         self.cur.execute("SELECT last_insert_rowid()")
 
       return self.cur.fetchall()[0][0]
 
+  '''
+  Save the points of the given sweep.
+
+  @param sweepId The id of the sweep.
+  @param points List of the points, dictionaries that map the swept options to
+  the values of the sweep step.
+  '''
+  def NewSweepPoints(self, sweepId, points):
+    command = "INSERT INTO sweep_points VALUES (%s, %s, %s)"
+    if self.driver == "sqlite":
+      command = command.replace("%s", "?")
+
+    def Write():
+      with self.con:
+        self.cur.executemany(command, [(sweepId, i, json.dumps(point,
+            sort_keys=True)) for i, point in enumerate(points)])
+
+    self.Retry(Write)
+
+  '''
+  Get the points of the given sweep.
+
+  @param sweepId The id of the sweep.
+  @return List of the points, ordered by the sweep step.
+  '''
+  def GetSweepPoints(self, sweepId):
+    return [json.loads(point[0]) for point in self.Query("SELECT point FROM "
+        "sweep_points WHERE sweep_id=%s ORDER BY sweep_elem_id", (sweepId,))]
+
+  '''
+  Get the condition that selects the record of the given sweep step, the records
+  without a sweep have the sweep id -1.
+
+  @param sweepId - The id of the sweep (-1 if no sweep).
+  @param sweepElementId - The element of the sweep.
+  @return Tuple that contains the condition and the values.
+  '''
+  @staticmethod
+  def SweepCondition(sweepId, sweepElementId):
+    if sweepId == -1:
+      return (" AND sweep_id=%s", (sweepId,))
+    return (" AND sweep_id=%s AND sweep_elem_id=%s", (sweepId, sweepElementId))
+
+  '''
+  Update the given metric record in the metrics table if the record is available
+  otherwise create a new record.
+
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param metric - The metrics as JSON string.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  @param sweepId - The id of the sweep (-1 if no sweep).
+  @param sweepElementId - The element of the sweep (-1 if no sweep).
+  '''
   def UpdateMetricResult(self, buildId, libaryId, metric, datasetId, methodId,
                          sweepId=-1, sweepElementId=-1):
-    with self.con:
-      if self.GetMetricResult(buildId, libaryId, datasetId, methodId, sweepId,
-                              sweepElementId):
-        if sweepId != -1:
-          self.cur.execute("UPDATE metrics SET metric='" + str(metric) + "'"
-              + " WHERE build_id=" + str(buildId) + " AND libary_id="
-              + str(libaryId) + " AND dataset_id=" + str(datasetId)
-              + " AND method_id=" + str(methodId))
-        else:
-          self.cur.execute("UPDATE metrics SET metric='" + str(metric) + "'"
-              + " WHERE build_id=" + str(buildId) + " AND libary_id="
-              + str(libaryId) + " AND dataset_id=" + str(datasetId)
-              + " AND method_id=" + str(methodId) + " AND sweep_id="
-              + str(sweepId) + " AND sweep_element_id=" + str(sweepElementId))
-      else:
-        self.NewMetricResult(buildId, libaryId, metric, datasetId, methodId,
-                             sweepId, sweepElementId)
+    if self.GetMetricResult(buildId, libaryId, datasetId, methodId, sweepId,
+                            sweepElementId):
+      condition, values = Database.SweepCondition(sweepId, sweepElementId)
+      self.Query("UPDATE metrics SET metric=%s WHERE build_id=%s AND "
+          "libary_id=%s AND dataset_id=%s AND method_id=%s" + condition,
+          (str(metric), buildId, libaryId, datasetId, methodId) + values)
+    else:
+      self.NewMetricResult(buildId, libaryId, metric, datasetId, methodId,
+                           sweepId, sweepElementId)
+
+  '''
+  Update the given bootstrap record in the bootstrap table if the record is
+  available otherwise create a new record.
 
+  @param buildId - The id of the build.
+  @param libaryId - The id of the library.
+  @param metric - The bootstrapped metrics as JSON string.
+  @param datasetId - The id of the dataset.
+  @param methodId - The id of the method.
+  @param sweepId - The id of the sweep (-1 if no sweep).
+  @param sweepElementId - The element of the sweep (-1 if no sweep).
+  '''
   def UpdateBootstrapResult(self, buildId, libaryId, metric, datasetId,
                             methodId, sweepId=-1, sweepElementId=-1):
-    with self.con:
-      if self.GetBootstrapResult(buildId, libaryId, datasetId, methodId,
-                                 sweepId, sweepElementId):
-        if sweepId == -1:
-          self.cur.execute("UPDATE bootstrap SET metric='" + str(metric) + "'"
-              + " WHERE build_id=" + str(buildId) + " AND libary_id="
-              + str(libaryId) + " AND dataset_id=" + str(datasetId)
-              + " AND method_id=" + str(methodId))
-        else:
-          self.cur.execute("UPDATE bootstrap SET metric='" + str(metric) + "'"
-              + " WHERE build_id=" + str(buildId) + " AND libary_id="
-              + str(libaryId) + " AND dataset_id=" + str(datasetId)
-              + " AND method_id=" + str(methodId) + " AND sweepId="
-              + str(sweepId) + " AND sweepElementId=" + str(sweepElementId))
-      else:
-        self.NewBootstrapResult(buildId, libaryId, metric, datasetId, methodId)
+    if self.GetBootstrapResult(buildId, libaryId, datasetId, methodId,
+                               sweepId, sweepElementId):
+      condition, values = Database.SweepCondition(sweepId, sweepElementId)
+      self.Query("UPDATE bootstrap SET metric=%s WHERE build_id=%s AND "
+          "libary_id=%s AND dataset_id=%s AND method_id=%s" + condition,
+          (str(metric), buildId, libaryId, datasetId, methodId) + values)
+    else:
+      self.NewBootstrapResult(buildId, libaryId, metric, datasetId, methodId,
+                              sweepId, sweepElementId)
 
   def GetMetricResult(self, buildId, libaryId, datasetId, methodId, sweepId=-1,
                       sweepElementId=-1):
+    self.Flush()
     try:
-      with self.con:
-        if sweepId == -1:
-          self.cur.execute("SELECT * FROM metrics WHERE build_id=" + str(buildId)
-              + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-              + str(datasetId) + " AND method_id=" + str(methodId))
-        else:
-          self.cur.execute("SELECT * FROM metrics WHERE build_id=" + str(buildId)
-              + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-              + str(datasetId) + " AND method_id=" + str(methodId)
-              + " AND sweepId=" + str(sweepId) + " AND sweepElementId="
-              + str(sweepElementId))
-        return self.cur.fetchall()
+      if sweepId == -1:
+        return self.Query("SELECT * FROM metrics WHERE build_id=%s AND "
+            "method_id=%s AND dataset_id=%s AND libary_id=%s",
+            (buildId, methodId, datasetId, libaryId))
+      else:
+        return self.Query("SELECT * FROM metrics WHERE build_id=%s AND "
+            "method_id=%s AND dataset_id=%s AND sweep_id=%s AND "
+            "sweep_elem_id=%s AND libary_id=%s",
+            (buildId, methodId, datasetId, sweepId, sweepElementId, libaryId))
     except Exception:
       return None
 
   def GetBootstrapResult(self, buildId, libaryId, datasetId, methodId,
                          sweepId=-1, sweepElementId=-1):
-    with self.con:
-      if sweepId == -1:
-        self.cur.execute("SELECT * FROM bootstrap WHERE build_id=" + str(buildId)
-            + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-            + str(datasetId) + " AND method_id=" + str(methodId))
-      else:
-        self.cur.execute("SELECT * FROM bootstrap WHERE build_id=" + str(buildId)
-            + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-            + str(datasetId) + " AND method_id=" + str(methodId)
-            + " AND sweep_id=" + str(sweepId) + " AND sweep_element_id="
-            + str(sweepElementId))
-      return self.cur.fetchall()
+    self.Flush()
+    if sweepId == -1:
+      return self.Query("SELECT * FROM bootstrap WHERE build_id=%s AND "
+          "method_id=%s AND dataset_id=%s AND libary_id=%s",
+          (buildId, methodId, datasetId, libaryId))
+    else:
+      return self.Query("SELECT * FROM bootstrap WHERE build_id=%s AND "
+          "method_id=%s AND dataset_id=%s AND sweep_id=%s AND "
+          "sweep_elem_id=%s AND libary_id=%s",
+          (buildId, methodId, datasetId, sweepId, sweepElementId, libaryId))
 
   '''
   Add a new dataset record to the datasets table.
@@ -511,9 +911,7 @@ class Database:
   @return The records.
   '''
   def GetDataset(self, name):
-    with self.con:
-      self.cur.execute("SELECT id FROM datasets WHERE name='" + name  + "'")
-      return self.cur.fetchall()
+    return self.Query("SELECT id FROM datasets WHERE name=%s", (name,))
 
   '''
   Get the informations of the given build.
@@ -522,9 +920,8 @@ class Database:
   @return The records.
   '''
   def GetBuild(self, id):
-    with self.con:
-      self.cur.execute("SELECT * FROM results WHERE build_id=" + str(id))
-      return self.cur.fetchall()
+    self.Flush()
+    return self.Query("SELECT * FROM results WHERE build_id=%s", (id,))
 
   '''
   Get the libary id form the libraries table with the given name.
@@ -533,9 +930,7 @@ class Database:
   @return The records.
   '''
   def GetLibrary(self, name):
-    with self.con:
-      self.cur.execute("SELECT id FROM libraries WHERE name='" + name + "'")
-      return self.cur.fetchall()
+    return self.Query("SELECT id FROM libraries WHERE name=%s", (name,))
 
   '''
   Add a new library record to the libraries table.
@@ -571,20 +966,8 @@ class Database:
   '''
   def NewResult(self, buildId, libaryId, time, var, datasetId, methodId,
                 sweepId=-1, sweepElementId=-1):
-    with self.con:
-      command = "INSERT INTO results VALUES (NULL,%s,%s,%s,%s,%s,%s,%s,%s)"
-
-      if self.driver == "mysql":
-        self.cur.execute(command,
-            (buildId, libaryId, time, var, datasetId, methodId, sweepId,
-             sweepElementId))
-        self.cur.execute("SELECT LAST_INSERT_ID()")
-
-      elif self.driver == "sqlite":
-        self.cur.execute(command % ('?', '?', '?', '?', '?', '?', '?', '?'),
-            (buildId, libaryId, time, var, datasetId, methodId, sweepId,
-             sweepElementId))
-        self.cur.execute("SELECT last_insert_rowid()")
+    self.Insert("results", (buildId, libaryId, time, var, datasetId, methodId,
+        sweepId, sweepElementId))
 
   '''
   Get the specified result from the results table.
@@ -599,18 +982,36 @@ class Database:
   '''
   def GetResult(self, buildId, libaryId, datasetId, methodId, sweepId=-1,
                 sweepElementId=-1):
-    with self.con:
-      if sweepId != -1:
-        self.cur.execute("SELECT * FROM results WHERE build_id=" + str(buildId)
-            + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-            + str(datasetId) + " AND method_id=" + str(methodId)
-            + " AND sweep_id=" + str(sweepId) + " AND sweep_element_id="
-            + str(sweepElementId))
-      else:
-        self.cur.execute("SELECT * FROM results WHERE build_id=" + str(buildId)
-            + " AND libary_id=" + str(libaryId) + " AND dataset_id="
-            + str(datasetId) + " AND method_id=" + str(methodId))
-      return self.cur.fetchall()
+    self.Flush()
+    if sweepId != -1:
+      return self.Query("SELECT * FROM results WHERE build_id=%s AND "
+          "method_id=%s AND dataset_id=%s AND sweep_id=%s AND "
+          "sweep_elem_id=%s AND libary_id=%s",
+          (buildId, methodId, datasetId, sweepId, sweepElementId, libaryId))
+    else:
+      return self.Query("SELECT * FROM results WHERE build_id=%s AND "
+          "method_id=%s AND dataset_id=%s AND libary_id=%s",
+          (buildId, methodId, datasetId, libaryId))
+
+  '''
+  Get the results of the given method for several builds at once. The build ids
+  are split into chunks, so the number of query parameters stays below the
+  limit of the database.
+
+  @param buildIds - The build ids.
+  @param methodId - The method id.
+  @return A list with the results, ordered by the record id.
+  '''
+  def GetBuildsResults(self, buildIds, methodId):
+    self.Flush()
+    buildIds = sorted(buildIds)
+    results = []
+    for i in range(0, len(buildIds), 500):
+      chunk = buildIds[i:i + 500]
+      results += self.Query("SELECT * FROM results WHERE method_id=%s AND "
+          "build_id IN (" + ", ".join(["%s"] * len(chunk)) + ") ORDER BY id",
+          [methodId] + chunk)
+    return sorted(results)
 
   '''
   Update the given result record in the results table if the record is available
@@ -627,23 +1028,24 @@ class Database:
   '''
   def UpdateResult(self, buildId, libaryId, time, var, datasetId, methodId,
                    sweepId=-1, sweepElementId=-1):
-    with self.con:
-      if self.GetResult(buildId, libaryId, datasetId, methodId, sweepId,
-                        sweepElementId):
-        if sweepId != -1:
-          self.cur.execute("UPDATE results SET time=" + str(time) + ",var="
-              + str(var) + " WHERE build_id=" + str(buildId) + " AND libary_id="
-              + str(libaryId) + " AND dataset_id=" + str(datasetId)
-              + " AND method_id=" + str(methodId) + " AND sweepId="
-              + str(sweepId) + " AND sweepElementId=" + str(sweepElementId))
-        else:
-          self.cur.execute("UPDATE results SET time=" + str(time) + ",var="
-              + str(var) + " WHERE build_id=" + str(buildId) + " AND libary_id="
-              + str(libaryId) + " AND dataset_id=" + str(datasetId)
-              + " AND method_id=" + str(methodId))
-
-      else:
-        self.NewResult(buildId, libaryId, time, var, datasetId, methodId)
+    if self.GetResult(buildId, libaryId, datasetId, methodId, sweepId,
+                      sweepElementId):
+      condition, values = Database.SweepCondition(sweepId, sweepElementId)
+      command = ("UPDATE results SET time=%s, var=%s WHERE build_id=%s AND "
+          "libary_id=%s AND dataset_id=%s AND method_id=%s" + condition)
+      if self.driver == "sqlite":
+        command = command.replace("%s", "?")
+
+      def Write():
+        with self.con:
+          self.cur.execute(command, (time, var, buildId, libaryId, datasetId,
+              methodId) + values)
+          self.InvalidateSums([buildId])
+
+      self.Retry(Write)
+    else:
+      self.NewResult(buildId, libaryId, time, var, datasetId, methodId,
+                     sweepId, sweepElementId)
 
   '''
   Get the method id from the methods table with the given name and parameters.
@@ -653,10 +1055,8 @@ class Database:
   @return The records.
   '''
   def GetMethod(self, name, parameters):
-     with self.con:
-      self.cur.execute("SELECT id FROM methods WHERE name='" + name +
-          "' AND parameters='" + json.dumps(parameters) + "'")
-      return self.cur.fetchall()
+    return self.Query("SELECT id FROM methods WHERE name=%s AND parameters=%s",
+        (name, json.dumps(parameters)))
 
   '''
   Add a new method record to the methods table.
@@ -685,6 +1085,61 @@ class Database:
     self.cur.execute("UPDATE methods SET alias=\'" + alias + "\' WHERE id="
         + str(methodId))
 
+  '''
+  Remove the cached sums of the given builds, the sums are computed again with
+  the next GetResultsSums() call. This method is called inside the transaction
+  that modifies the results.
+
+  @param buildIds - The ids of the builds.
+  '''
+  def InvalidateSums(self, buildIds):
+    command = "DELETE FROM build_sums WHERE build_id=%s"
+    if self.driver == "sqlite":
+      command = command.replace("%s", "?")
+    self.cur.executemany(command, [(buildId,) for buildId in buildIds])
+
+  '''
+  Get the sums of the time column of all builds of all libraries. The sums are
+  computed with a single grouped query and cached in the build_sums table, so
+  only the builds that aren't in the cache (new builds or builds with modified
+  results) are aggregated. Sums that another process inserted in the meantime
+  are kept.
+
+  @return Dictionary with the library id as key and a tuple with the id of the
+  latest build and the list of sums (ordered by the build time) as value.
+  '''
+  def GetResultsSums(self):
+    self.Flush()
+
+    # Concurrent benchmarks can aggregate the same builds, the sums are the
+    # same, so a duplicate is skipped.
+    ignore = "IGNORE" if self.driver == "mysql" else "OR IGNORE"
+
+    def Aggregate():
+      with self.con:
+        command = """
+            INSERT """ + ignore + """ INTO build_sums (build_id, libary_id, time)
+            SELECT builds.id, builds.libary_id, SUM(results.time) FROM builds
+            LEFT JOIN build_sums ON build_sums.build_id = builds.id
+            LEFT JOIN results ON results.build_id = builds.id
+            WHERE build_sums.build_id IS NULL
+            GROUP BY builds.id, builds.libary_id
+            """
+        self.cur.execute(command)
+
+    self.Retry(Aggregate)
+
+    sums = collections.OrderedDict()
+    for libaryId, buildId, time in self.Query("SELECT builds.libary_id, "
+        "builds.id, build_sums.time FROM builds JOIN build_sums ON "
+        "build_sums.build_id = builds.id ORDER BY builds.libary_id, "
+        "builds.build ASC"):
+      timeSummed = sums[libaryId][1] if libaryId in sums else []
+      timeSummed.append(time)
+      sums[libaryId] = (buildId, timeSummed)
+
+    return sums
+
   '''
   Get the sum of the time column of all build of the given name.
 
@@ -698,19 +1153,7 @@ class Database:
     else:
       return None
 
-    with self.con:
-      self.cur.execute("SELECT id FROM builds WHERE libary_id=" + str(libaryId)
-          + " ORDER BY build ASC")
-      timeSummed = []
-      res = self.cur.fetchall()
-      for buildId in res:
-        self.cur.execute("SELECT SUM(time) FROM results WHERE build_id=" +
-           str(buildId[0]))
-        timeSummed.append(self.cur.fetchall()[0][0])
-    if res:
-      return (buildId[0], timeSummed)
-    else:
-      return None
+    return self.GetResultsSums().get(libaryId)
 
   '''
   Get the ids of all libraries.
@@ -729,29 +1172,36 @@ class Database:
   @param The latest build id if there is a latest build otherwise -1.
   '''
   def GetLatestBuildFromLibary(self, libaryId):
-    with self.con:
-      self.cur.execute("SELECT id FROM builds WHERE libary_id=" + str(libaryId)
-          + " ORDER BY build DESC")
-      res = self.cur.fetchall()
-      if res:
-        return res
-      else:
-        return [(-1,)]
+    res = self.Query("SELECT id FROM builds WHERE libary_id=%s ORDER BY build "
+        "DESC", (libaryId,))
+    if res:
+      return res
+    else:
+      return [(-1,)]
 
+  '''
+  Copy the results of the given build to the new build.
+
+  @param buildId - The id of the build to copy.
+  @param newBuildId - The id of the new build.
+  '''
   def CopyLatestBuildFromLibary(self, buildId, newBuildId):
-    self.cur.execute("SELECT * FROM results WHERE build_id=" + str(buildId))
-    results = self.cur.fetchall()
+    self.Flush()
     with self.con:
-      for res in results:
-        command = "INSERT INTO results VALUES (NULL,%s,%s,%s,%s,%s,%s)"
+      command = """
+          INSERT INTO results (build_id, libary_id, time, var, dataset_id,
+              method_id, sweep_id, sweep_elem_id)
+          SELECT %s, libary_id, time, var, dataset_id, method_id, sweep_id,
+              sweep_elem_id FROM results WHERE build_id=%s
+          """
+
+      if self.driver == "mysql":
+        self.cur.execute(command, (newBuildId, buildId))
 
-        if self.driver == "mysql":
-          self.cur.execute(command,
-              (newBuildId, res[2], res[3], res[4], res[5], res[6]))
+      elif self.driver == "sqlite":
+        self.cur.execute(command % ('?', '?'), (newBuildId, buildId))
 
-        elif self.driver == "sqlite":
-          self.cur.execute(command % ('?', '?', '?', '?', '?', '?'),
-              (newBuildId, res[2], res[3], res[4], res[5], res[6]))
+      self.InvalidateSums([newBuildId])
 
   '''
   Get a list of all methods.
@@ -771,11 +1221,10 @@ class Database:
   @return A list with the results.
   '''
   def GetMethodResultsForLibary(self, buildId, methodId):
-    with self.con:
-      self.cur.execute("SELECT * FROM results JOIN datasets ON" +
-          " results.dataset_id = datasets.id WHERE build_id=" + str(buildId) +
-          " AND method_id=" + str(methodId) + " ORDER BY datasets.name")
-      return self.cur.fetchall()
+    self.Flush()
+    return self.Query("SELECT * FROM results JOIN datasets ON "
+        "results.dataset_id = datasets.id WHERE build_id=%s AND method_id=%s "
+        "ORDER BY datasets.name", (buildId, methodId))
 
   '''
   Get the metrics results for the specified method and build id.
@@ -785,11 +1234,10 @@ class Database:
   @return A list with the results.
   '''
   def GetMethodMetricResultsForLibrary(self, buildId, methodId):
-    with self.con:
-      self.cur.execute("SELECT * FROM metrics JOIN datasets ON" +
-          " metrics.dataset_id = datasets.id WHERE build_id=" + str(buildId) +
-          " AND method_id=" + str(methodId) + " ORDER BY datasets.name")
-      return self.cur.fetchall()
+    self.Flush()
+    return self.Query("SELECT * FROM metrics JOIN datasets ON "
+        "metrics.dataset_id = datasets.id WHERE build_id=%s AND method_id=%s "
+        "ORDER BY datasets.name", (buildId, methodId))
 
   '''
   Get the bootstrap results for the specified method and build id.
@@ -799,11 +1247,10 @@ class Database:
   @return A list with the results.
   '''
   def GetMethodBootstrapResultsForLibrary(self, buildId, methodId):
-    with self.con:
-      self.cur.execute("SELECT * FROM bootstrap JOIN datasets ON" +
-          " bootstrap.dataset_id = datasets.id WHERE build_id=" + str(buildId) +
-          " AND method_id=" + str(methodId) + " ORDER BY datasets.name")
-      return self.cur.fetchall()
+    self.Flush()
+    return self.Query("SELECT * FROM bootstrap JOIN datasets ON "
+        "bootstrap.dataset_id = datasets.id WHERE build_id=%s AND "
+        "method_id=%s ORDER BY datasets.name", (buildId, methodId))
 
   '''
   Get the sum of the time column of all build of the given method.
@@ -814,15 +1261,12 @@ class Database:
   '''
   def GetResultsMethodSum(self, name, methodId):
     libaryId = self.GetLibrary(name)[0][0]
-    with self.con:
-      self.cur.execute("SELECT id FROM builds WHERE libary_id=" + str(libaryId)
-          + " ORDER BY build ASC")
-      timeSummed = []
-      res = self.cur.fetchall()
-      for buildId in res:
-        self.cur.execute("SELECT SUM(time) FROM results WHERE build_id=" +
-           str(buildId[0]) + " AND method_id=" + str(methodId))
-        timeSummed.append(self.cur.fetchall()[0][0])
+    res = self.Query("SELECT id FROM builds WHERE libary_id=%s ORDER BY build "
+        "ASC", (libaryId,))
+    timeSummed = []
+    for buildId in res:
+      timeSummed.append(self.Query("SELECT SUM(time) FROM results WHERE "
+          "build_id=%s AND method_id=%s", (buildId[0], methodId))[0][0])
     if res:
       return (buildId[0], timeSummed)
     else:
@@ -838,22 +1282,12 @@ class Database:
   @param sweepId - The id of the parameter sweep (-1 if no sweep).
   @param sweepElementId - The element of the sweep this record is for (-1 if no
       sweep).
-  @param memoryInfo - The text for the memory value.
+  @param memoryInfo - The memory series (see Profiler.MassifSeries) as JSON.
   '''
   def NewMemory(self, buildId, libaryId, methodId, datasetId, memoryInfo,
       sweepId=-1, sweepElementId=-1):
-    with self.con:
-      command = "INSERT INTO memory VALUES (NULL,%s,%s,%s,%s,%s,%s,%s)"
-
-      if self.driver == "mysql":
-        self.cur.execute(command,
-            (buildId, libaryId, methodId, datasetId, sweepId, sweepElementId,
-             memoryInfo))
-
-      elif self.driver == "sqlite":
-        self.cur.execute(command % ('?', '?', '?', '?', '?', '?', '?'),
-            (buildId, libaryId, methodId, datasetId, sweepId, sweepElementId,
-             memoryInfo))
+    self.Insert("memory", (buildId, libaryId, methodId, datasetId, memoryInfo,
+        sweepId, sweepElementId))
 
   '''
   Update the given memory record in the memory table if the record is available
@@ -866,31 +1300,19 @@ class Database:
   @param sweepId - The id of the parameter sweep (-1 if no sweep).
   @param sweepElementId - The element of the sweep this record is for (-1 if no
       sweep).
-  @param memoryInfo - The text for the memory value.
+  @param memoryInfo - The memory series (see Profiler.MassifSeries) as JSON.
   '''
   def UpdateMemory(self, buildId, libaryId, methodId, datasetId, memoryInfo,
       sweepId=-1, sweepElementId=-1):
-    with self.con:
-      if sweepId != -1:
-        if self.GetMemoryResults(buildId, libaryId, methodId, sweepId,
-            sweepElementId):
-          self.cur.execute("UPDATE memory SET memory_info=\'" + memoryInfo
-            + "\' WHERE build_id=" + str(buildId) + " AND libary_id="
-            + str(libaryId) + " AND dataset_id=" + str(datasetId)
-            + " AND method_id=" + str(methodId) + " AND sweepId="
-            + str(sweepId) + " AND sweepElementId=" + str(sweepElementId))
-        else:
-          self.NewMemory(buildId, libaryId, methodId, datasetId, memoryInfo,
-              sweepId, sweepElementId)
-
-      else:
-        if self.GetMemoryResults(buildId, libaryId, methodId):
-          self.cur.execute("UPDATE memory SET memory_info=\'" + memoryInfo
-            + "\' WHERE build_id=" + str(buildId) + " AND libary_id="
-            + str(libaryId) + " AND dataset_id=" + str(datasetId)
-            + " AND method_id=" + str(methodId))
-        else:
-          self.NewMemory(buildId, libaryId, methodId, datasetId, memoryInfo)
+    if self.GetMemoryResults(buildId, libaryId, methodId, sweepId,
+        sweepElementId, datasetId):
+      condition, values = Database.SweepCondition(sweepId, sweepElementId)
+      self.Query("UPDATE memory SET memory_info=%s WHERE build_id=%s AND "
+          "libary_id=%s AND dataset_id=%s AND method_id=%s" + condition,
+          (memoryInfo, buildId, libaryId, datasetId, methodId) + values)
+    else:
+      self.NewMemory(buildId, libaryId, methodId, datasetId, memoryInfo,
+          sweepId, sweepElementId)
 
   '''
   Get the memory informations of the given parameters.
@@ -901,22 +1323,23 @@ class Database:
   @param sweepId - The id of the sweep (-1 if no sweep).
   @param sweepElementId - The element of the sweep that is desired (-1 if no
       sweep).
+  @param datasetId - The id of the dataset (None for all datasets).
   @return The memory informations of the method.
   '''
   def GetMemoryResults(self, buildId, libaryId, methodId, sweepId=-1,
-      sweepElementId=-1):
-    with self.con:
-      if sweepId == -1:
-        self.cur.execute("SELECT * FROM memory JOIN datasets ON " +
-          "memory.dataset_id = datasets.id WHERE libary_id=" + str(libaryId) +
-          " AND build_id="+ str(buildId) + " AND method_id=" + str(methodId))
-      else:
-        self.cur.execute("SELECT * FROM memory JOIN datasets ON " +
-            "memory.dataset_id = datasets.id WHERE libary_id=" + str(libaryId) +
-            " AND build_id=" + str(buildId) + " AND method_id=" +
-            str(methodId) + " AND sweepId=" + str(sweepId) +
-            " AND sweepElementId=" + str(sweepElementId))
-      return self.cur.fetchall()
+      sweepElementId=-1, datasetId=None):
+    self.Flush()
+    command = ("SELECT * FROM memory JOIN datasets ON "
+        "memory.dataset_id = datasets.id WHERE build_id=%s AND "
+        "method_id=%s AND libary_id=%s")
+    values = (buildId, methodId, libaryId)
+    if sweepId != -1:
+      command += " AND sweep_id=%s AND sweep_elem_id=%s"
+      values += (sweepId, sweepElementId)
+    if datasetId is not None:
+      command += " AND dataset_id=%s"
+      values += (datasetId,)
+    return self.Query(command, values)
 
   '''
   Get the information of the given method.
@@ -925,10 +1348,8 @@ class Database:
   @return The informaton of the method.
   '''
   def GetMethodInfo(self, methodId):
-    with self.con:
-      self.cur.execute("SELECT * FROM method_info WHERE method_id=" +
-          str(methodId))
-      return self.cur.fetchall()
+    return self.Query("SELECT * FROM method_info WHERE method_id=%s",
+        (methodId,))
 
   '''
   Add a new method info record to the method_info table.
@@ -965,11 +1386,97 @@ class Database:
   @param sweepBegin The starting point of the sweep.
   @param sweepStep The step size of the sweep.
   @param sweepEnd The ending point of the sweep.
+  @param parameters All swept options of a multi-dimensional sweep (JSON).
+  @param plan The plan of the sweep.
   '''
-  def GetSweep(self, sweepType, sweepBegin, sweepStep, sweepEnd):
-    with self.con:
-      self.cur.execute("SELECT id FROM sweeps WHERE type='"
-          + sweepType + "' AND begin='" + str(sweepBegin)
-          + "' AND step='" + str(sweepStep) + "' AND end='"
-          + str(sweepEnd) + "'")
-      return self.cur.fetchall()
+  def GetSweep(self, sweepType, sweepBegin, sweepStep, sweepEnd, parameters="",
+      plan=""):
+    return self.Query("SELECT id FROM sweeps WHERE type=%s AND begin=%s AND "
+        "step=%s AND end=%s AND parameters=%s AND plan=%s",
+        (sweepType, str(sweepBegin), str(sweepStep), str(sweepEnd), parameters,
+        plan))
+
+'''
+Checks that tell if a write was committed before the connection was lost. Every
+check gets the database and the arguments of the write and returns a tuple that
+contains True if the write was committed and the return value of the write.
+'''
+def Found(records):
+  return (bool(records), records[0][0] if records else None)
+
+COMMITTED = {
+    "Insert": lambda db, table, values: (db.Contains(table, values), None),
+    "NewLibrary": lambda db, name: Found(db.GetLibrary(name)),
+    "NewDataset": lambda db, name, *args, **kwargs: Found(db.GetDataset(name)),
+    "NewMethod": lambda db, name, parameters, alias: Found(db.GetMethod(name,
+        parameters)),
+    "NewMethodInfo": lambda db, methodId, info: (bool(db.GetMethodInfo(
+        methodId)), None),
+    "NewSweep": lambda db, *args, **kwargs: Found(db.GetSweep(*args, **kwargs)),
+    "NewSweepPoints": lambda db, sweepId, points: (bool(db.GetSweepPoints(
+        sweepId)), None),
+    "CopyLatestBuildFromLibary": lambda db, buildId, newBuildId: (bool(
+        db.Query("SELECT id FROM results WHERE build_id=%s LIMIT 1",
+        (newBuildId,))), None)}
+
+'''
+Wrap the given database method, if the connection to the database server is
+lost the method is called again with a new connection. The reads and the
+idempotent statements are simply repeated, a write is only repeated if its check
+(see COMMITTED) shows that it wasn't committed. A write without a check raises
+the error after the reconnect, because it could be committed twice.
+
+@param method - The method of the Database class.
+@param write - True if the method adds records.
+@return The wrapped method.
+'''
+def Reconnecting(method, write=False):
+  committed = COMMITTED.get(method.__name__)
+
+  @functools.wraps(method)
+  def Call(self, *args, **kwargs):
+    if self.depth > 0:
+      return method(self, *args, **kwargs)
+
+    self.depth += 1
+    try:
+      delay = Database.RETRY_DELAY
+      for attempt in range(Database.RETRIES):
+        try:
+          if attempt > 0:
+            # The buffered records could be committed by the interrupted call.
+            self.DropCommittedBuffer()
+            if write:
+              done, result = committed(self, *args, **kwargs)
+              if done:
+                return result
+
+          return method(self, *args, **kwargs)
+        except Exception as e:
+          if attempt == Database.RETRIES - 1 or not self.Disconnected(e):
+            raise
+          Log.Warn("Lost the database connection: " + str(e))
+
+          if write and committed is None:
+            self.Reconnect()
+            raise
+
+        time.sleep(delay)
+        delay *= 2
+        self.Reconnect()
+    finally:
+      self.depth -= 1
+
+  return Call
+
+# Every method that talks to the database reconnects if the connection is lost.
+# The methods that add result records write through Insert, which checks if the
+# record was committed.
+for name, method in list(vars(Database).items()):
+  if not callable(method) or name in ("NewResult", "NewMetricResult",
+      "NewBootstrapResult", "NewMemory"):
+    continue
+  if name.startswith(("Create", "Get", "Update", "Flush", "Query")):
+    setattr(Database, name, Reconnecting(method))
+  elif name.startswith(("New", "Copy", "Insert")):
+    setattr(Database, name, Reconnecting(method, write=True))
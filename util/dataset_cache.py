@@ -0,0 +1,135 @@
+'''
+  @file dataset_cache.py
+  @author Marcus Edel
+
+  Class to cache the parsed datasets as binary numpy files.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import hashlib
+import mmap
+
+'''
+This class implements a cache for the text datasets. Every dataset is parsed
+once and saved as '.npy' file, afterwards the dataset is loaded as memory-mapped
+array, so loading doesn't depend on the size of the dataset. The cache key
+contains the path, the size and the modification time of the dataset, so a
+modified dataset is parsed again.
+'''
+class DatasetCache(object):
+
+  # The directory that contains the cached datasets.
+  CACHE_PATH = os.environ.get("DATASET_CACHE_PATH", "datasets/cache")
+
+  '''
+  Get the path of the cache file for the given dataset.
+
+  @param dataset - The location of the dataset file.
+  @param delimiter - The delimiter used to parse the dataset.
+  @return Tuple that contains the path of the cache file and the prefix that is
+  shared by all cache files of the dataset.
+  '''
+  @staticmethod
+  def CacheFile(dataset, delimiter=','):
+    path = os.path.realpath(dataset)
+    stat = os.stat(path)
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    pathKey = hashlib.sha1(path.encode("UTF-8")).hexdigest()[:8]
+    stateKey = hashlib.sha1((str(stat.st_size) + ":" + str(stat.st_mtime) +
+        ":" + delimiter).encode("UTF-8")).hexdigest()[:16]
+
+    prefix = os.path.join(DatasetCache.CACHE_PATH, name + "-" + pathKey + "-")
+    return (prefix + stateKey + ".npy", prefix)
+
+  '''
+  Parse the given dataset and save the result in the cache. The file is written
+  under a temporary name and renamed afterwards, so parallel benchmark workers
+  never see a partially written file. Outdated cache files of the dataset are
+  removed.
+
+  @param dataset - The location of the dataset file.
+  @param delimiter - The delimiter used to parse the dataset.
+  @return The parsed dataset.
+  '''
+  @staticmethod
+  def Build(dataset, delimiter=','):
+    import numpy as np
+
+    data = np.genfromtxt(dataset, delimiter=delimiter)
+    cacheFile, prefix = DatasetCache.CacheFile(dataset, delimiter)
+
+    try:
+      if not os.path.exists(DatasetCache.CACHE_PATH):
+        os.makedirs(DatasetCache.CACHE_PATH)
+
+      tmpFile = cacheFile + "." + str(os.getpid()) + ".tmp"
+      with open(tmpFile, "wb") as fid:
+        np.save(fid, data)
+      os.replace(tmpFile, cacheFile)
+
+      for f in os.listdir(DatasetCache.CACHE_PATH):
+        f = os.path.join(DatasetCache.CACHE_PATH, f)
+        if f.startswith(prefix) and f.endswith(".npy") and f != cacheFile:
+          os.remove(f)
+    except OSError as e:
+      Log.Warn("Could not cache the dataset " + dataset + ": " + str(e))
+
+    return data
+
+  '''
+  Read one byte of every page of the given memory-mapped array, so the page
+  faults happen while the dataset is loaded and not in the timed part of the
+  benchmark script.
+
+  @param data - The memory-mapped array.
+  @return The array.
+  '''
+  @staticmethod
+  def Touch(data):
+    import numpy as np
+
+    if data.size:
+      np.asarray(data).ravel(order='K').view(np.uint8)[::mmap.PAGESIZE].sum()
+    return data
+
+  '''
+  Load the given dataset. If the dataset isn't in the cache, the dataset is
+  parsed and added to the cache.
+
+  @param dataset - The location of the dataset file.
+  @param delimiter - The delimiter used to parse the dataset.
+  @return The dataset as copy-on-write memory-mapped array, all pages of the
+  array are already mapped.
+  '''
+  @staticmethod
+  def Load(dataset, delimiter=','):
+    import numpy as np
+
+    try:
+      cacheFile, prefix = DatasetCache.CacheFile(dataset, delimiter)
+    except OSError:
+      return np.genfromtxt(dataset, delimiter=delimiter)
+
+    if not os.path.isfile(cacheFile):
+      data = DatasetCache.Build(dataset, delimiter)
+      if not os.path.isfile(cacheFile):
+        return data
+
+    # Empty arrays can't be memory-mapped.
+    try:
+      return DatasetCache.Touch(np.load(cacheFile, mmap_mode='c'))
+    except ValueError:
+      return np.load(cacheFile)
@@ -0,0 +1,143 @@
+'''
+  @file description_cache.py
+  @author Marcus Edel
+
+  Class to cache the help output of the benchmark executables.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import json
+import re
+import subprocess
+
+'''
+This class implements a cache for the '-h' output of the executables, which is
+used to get the description of the methods. The cache is indexed by the path
+and the modification time of the executable, so a rebuilt executable is probed
+again.
+'''
+class DescriptionCache(object):
+
+  # The file that contains the cached help output.
+  CACHE_FILE = "reports/etc/descriptions.json"
+
+  # The loaded cache of the current process.
+  cache = None
+
+  '''
+  Get the cache key of the given executable.
+
+  @param executable - The path of the executable.
+  @return The cache key or None if the executable doesn't exist.
+  '''
+  @staticmethod
+  def Key(executable):
+    path = os.path.realpath(executable)
+    try:
+      return path + ":" + str(os.stat(path).st_mtime)
+    except OSError:
+      return None
+
+  '''
+  Load the cache from the cache file.
+
+  @return Dictionary that contains the cached help output.
+  '''
+  @staticmethod
+  def Load():
+    if DescriptionCache.cache is None:
+      DescriptionCache.cache = {}
+      try:
+        with open(DescriptionCache.CACHE_FILE, "r") as fid:
+          DescriptionCache.cache = json.load(fid)
+      except (IOError, OSError, ValueError):
+        pass
+
+    return DescriptionCache.cache
+
+  '''
+  Save the given entry in the cache file. The file is read again before the
+  entry is added, so entries of other processes aren't lost, and the file is
+  written under a temporary name and renamed afterwards.
+
+  @param key - The cache key.
+  @param output - The help output.
+  '''
+  @staticmethod
+  def Save(key, output):
+    DescriptionCache.cache = None
+    cache = DescriptionCache.Load()
+    cache[key] = output
+
+    try:
+      path = os.path.dirname(DescriptionCache.CACHE_FILE)
+      if path and not os.path.exists(path):
+        os.makedirs(path)
+
+      tmpFile = DescriptionCache.CACHE_FILE + "." + str(os.getpid()) + ".tmp"
+      with open(tmpFile, "w") as fid:
+        json.dump(cache, fid, indent=2, sort_keys=True)
+      os.replace(tmpFile, DescriptionCache.CACHE_FILE)
+    except OSError as e:
+      Log.Warn("Could not save the description cache: " + str(e))
+
+  '''
+  Get the help output of the given executable, the executable is only called if
+  the output isn't in the cache.
+
+  @param executable - The path of the executable.
+  @return The help output as byte string or None in case of an error.
+  '''
+  @staticmethod
+  def Help(executable):
+    key = DescriptionCache.Key(executable)
+    cache = DescriptionCache.Load()
+
+    if key is None or key not in cache:
+      cmd = [executable, "-h"]
+      try:
+        s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=False)
+      except Exception as e:
+        Log.Fatal("Could not execute command: " + str(cmd))
+        return None
+
+      # Latin-1 maps every byte to a single character, so the output survives
+      # the JSON round trip unchanged.
+      if key is not None:
+        DescriptionCache.Save(key, s.decode("latin-1"))
+      return s
+
+    return cache[key].encode("latin-1")
+
+  '''
+  Get the description of the given executable.
+
+  @param executable - The path of the executable.
+  @param pattern - Regular expression (byte string), the first group of the
+  pattern is the description.
+  @return The description as byte string or None in case of an error.
+  '''
+  @staticmethod
+  def Description(executable, pattern=br"""(.*?)Optional.*?options:"""):
+    s = DescriptionCache.Help(executable)
+    if s is None:
+      return None
+
+    match = re.compile(pattern, re.VERBOSE|re.MULTILINE|re.DOTALL).match(s)
+    if not match:
+      Log.Warn("Can't parse description")
+      return ""
+
+    return match.group(1)
@@ -0,0 +1,294 @@
+'''
+  @file environment.py
+  @author Marcus Edel
+
+  Class to check and control the measurement environment.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from system import *
+
+import glob
+import json
+import platform
+
+'''
+This class records the settings of the machine that change the timings, e.g.
+the cpu frequency scaling and the background load, and pins the benchmark to
+the chosen cores. The fingerprint of the environment contains:
+
+  governor - The cpu frequency governors of the used cores.
+  turbo - 'on' or 'off', the turbo boost state.
+  smt - 'on' or 'off', the state of the SMT siblings (hyper-threading).
+  isolated - The cores isolated from the scheduler (isolcpus).
+  cpus - The cores the benchmark is allowed to use.
+  numaNodes - The NUMA nodes of these cores.
+  loadAverage - The load average of the last minute.
+  thp - The transparent huge pages setting.
+  cpuModel, kernel - The cpu model and the kernel release.
+
+Settings the platform doesn't report are missing from the fingerprint.
+'''
+class Environment(object):
+
+  # The policies for a noisy machine: 'ignore' the checks, 'warn' about the
+  # noisy settings or refuse to run the benchmark ('strict').
+  POLICIES = ["ignore", "warn", "strict"]
+
+  # The default maximum load average of the last minute.
+  MAX_LOAD = 0.5
+
+  SYSFS_CPU = "/sys/devices/system/cpu"
+  SYSFS_NODE = "/sys/devices/system/node"
+
+  '''
+  Read the given file.
+
+  @param path - The location of the file.
+  @return The stripped content of the file or None if the file can't be read.
+  '''
+  @staticmethod
+  def Read(path):
+    try:
+      with open(path, "r") as fid:
+        return fid.read().strip()
+    except (IOError, OSError):
+      return None
+
+  '''
+  Parse a cpu list like '0-3,8,10-11'.
+
+  @param cpuList - The cpu list.
+  @return Sorted list of the cores.
+  '''
+  @staticmethod
+  def ParseCPUList(cpuList):
+    cpus = set()
+    for part in str(cpuList).split(","):
+      part = part.strip()
+      if not part:
+        continue
+      if "-" in part:
+        begin, end = part.split("-")
+        cpus.update(range(int(begin), int(end) + 1))
+      else:
+        cpus.add(int(part))
+    return sorted(cpus)
+
+  '''
+  Get the cores of the given NUMA node.
+
+  @param node - The id of the node.
+  @return Sorted list of the cores or None if the node doesn't exist.
+  '''
+  @staticmethod
+  def NodeCPUs(node):
+    cpuList = Environment.Read(os.path.join(Environment.SYSFS_NODE, "node" +
+        str(node), "cpulist"))
+    if cpuList is None:
+      return None
+    return Environment.ParseCPUList(cpuList)
+
+  '''
+  Get the cores the current process is allowed to use.
+
+  @return Sorted list of the cores.
+  '''
+  @staticmethod
+  def CPUs():
+    try:
+      return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+      return list(range(os.cpu_count() or 1))
+
+  '''
+  Get the turbo boost state.
+
+  @return 'on', 'off' or None if the state is unknown.
+  '''
+  @staticmethod
+  def Turbo():
+    # intel_pstate reports the inverse state.
+    noTurbo = Environment.Read(os.path.join(Environment.SYSFS_CPU,
+        "intel_pstate", "no_turbo"))
+    if noTurbo is not None:
+      return "off" if noTurbo == "1" else "on"
+
+    boost = Environment.Read(os.path.join(Environment.SYSFS_CPU, "cpufreq",
+        "boost"))
+    if boost is not None:
+      return "on" if boost == "1" else "off"
+    return None
+
+  '''
+  Get the fingerprint of the current environment.
+
+  @return Dictionary that contains the settings (see the class description).
+  '''
+  @staticmethod
+  def Fingerprint():
+    cpus = Environment.CPUs()
+    fingerprint = {"cpus": cpus, "cpuModel": SystemInfo.GetCPUModel().strip(),
+        "kernel": platform.release()}
+
+    governors = set()
+    for cpu in cpus:
+      governor = Environment.Read(os.path.join(Environment.SYSFS_CPU, "cpu" +
+          str(cpu), "cpufreq", "scaling_governor"))
+      if governor is not None:
+        governors.add(governor)
+    if governors:
+      fingerprint["governor"] = sorted(governors)
+
+    turbo = Environment.Turbo()
+    if turbo is not None:
+      fingerprint["turbo"] = turbo
+
+    smt = Environment.Read(os.path.join(Environment.SYSFS_CPU, "smt",
+        "active"))
+    if smt is not None:
+      fingerprint["smt"] = "on" if smt == "1" else "off"
+
+    isolated = Environment.Read(os.path.join(Environment.SYSFS_CPU,
+        "isolated"))
+    if isolated is not None:
+      fingerprint["isolated"] = Environment.ParseCPUList(isolated)
+
+    nodes = []
+    for path in sorted(glob.glob(os.path.join(Environment.SYSFS_NODE,
+        "node[0-9]*"))):
+      node = int(os.path.basename(path)[4:])
+      if set(Environment.NodeCPUs(node) or []) & set(cpus):
+        nodes.append(node)
+    if nodes:
+      fingerprint["numaNodes"] = nodes
+
+    try:
+      fingerprint["loadAverage"] = os.getloadavg()[0]
+    except OSError:
+      pass
+
+    thp = Environment.Read("/sys/kernel/mm/transparent_hugepage/enabled")
+    if thp is not None:
+      # The active setting is marked with brackets, e.g. 'always [madvise]'.
+      fingerprint["thp"] = thp.split("[")[1].split("]")[0] if "[" in thp \
+          else thp
+
+    return fingerprint
+
+  '''
+  Check the given fingerprint for settings that make the timings noisy.
+
+  @param fingerprint - The fingerprint of the environment.
+  @param maxLoad - The maximum load average of the last minute.
+  @return List of the problems.
+  '''
+  @staticmethod
+  def Check(fingerprint, maxLoad=MAX_LOAD):
+    problems = []
+
+    governors = [g for g in fingerprint.get("governor", [])
+        if g != "performance"]
+    if governors:
+      problems.append("cpu frequency governor is '" + "', '".join(governors) +
+          "' instead of 'performance'")
+    if fingerprint.get("turbo") == "on":
+      problems.append("turbo boost is enabled")
+    if fingerprint.get("smt") == "on":
+      problems.append("SMT siblings are enabled")
+    if fingerprint.get("loadAverage", 0) > maxLoad:
+      problems.append("load average is {0:.2f} (maximum {1})".format(
+          fingerprint["loadAverage"], maxLoad))
+    if fingerprint.get("thp") == "always":
+      problems.append("transparent huge pages are set to 'always'")
+
+    isolated = set(fingerprint.get("isolated", []))
+    if isolated and not set(fingerprint["cpus"]) <= isolated:
+      problems.append("the benchmark uses cores that aren't isolated")
+
+    return problems
+
+  '''
+  Pin the current process (and so all workers and executables started
+  afterwards) to the given cores or to the cores of the given NUMA node. Linux
+  allocates the memory on the node of the core that touches it first, so the
+  memory of a benchmark pinned to a node stays on that node.
+
+  @param cpus - The cores as cpu list (e.g. '2-5') or None.
+  @param node - The id of the NUMA node or None.
+  @return True if the process is pinned as requested.
+  '''
+  @staticmethod
+  def Pin(cpus=None, node=None):
+    if cpus is None and node is None:
+      return True
+
+    selected = set(Environment.CPUs())
+    if cpus is not None:
+      selected &= set(Environment.ParseCPUList(cpus))
+    if node is not None:
+      nodeCPUs = Environment.NodeCPUs(node)
+      if nodeCPUs is None:
+        Log.Fatal("The NUMA node " + str(node) + " doesn't exist.")
+        return False
+      selected &= set(nodeCPUs)
+
+    if not selected:
+      Log.Fatal("No usable cores for cpus '" + str(cpus) + "' and NUMA node " +
+          str(node) + ".")
+      return False
+
+    try:
+      os.sched_setaffinity(0, selected)
+    except (AttributeError, OSError) as e:
+      Log.Fatal("Could not pin the benchmark to the cores: " + str(e))
+      return False
+
+    Log.Info("Pinned the benchmark to the cores " + ",".join(str(c) for c in
+        sorted(selected)) + ".")
+    return True
+
+  '''
+  Prepare the measurement environment: pin the process, record the fingerprint
+  and check it according to the given policy.
+
+  @param policy - The policy for a noisy machine (see POLICIES).
+  @param maxLoad - The maximum load average of the last minute.
+  @param cpus - The cores as cpu list or None.
+  @param node - The id of the NUMA node or None.
+  @return The fingerprint as JSON string or None if the benchmark should not
+  run.
+  '''
+  @staticmethod
+  def Prepare(policy="warn", maxLoad=MAX_LOAD, cpus=None, node=None):
+    if policy not in Environment.POLICIES:
+      Log.Fatal("Unknown environment policy: " + str(policy))
+      return None
+
+    if not Environment.Pin(cpus, node):
+      return None
+
+    fingerprint = Environment.Fingerprint()
+    if policy != "ignore":
+      problems = Environment.Check(fingerprint, maxLoad)
+      for problem in problems:
+        if policy == "strict":
+          Log.Fatal("Noisy environment: " + problem)
+        else:
+          Log.Warn("Noisy environment: " + problem)
+
+      if problems and policy == "strict":
+        return None
+
+    return json.dumps(fingerprint, sort_keys=True)
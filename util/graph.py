@@ -17,8 +17,9 @@ if cmd_subfolder not in sys.path:
 from misc import *
 from log import *
 from template import *
+from profiler import *
 
-import re, collections, simplejson, datetime
+import collections, simplejson, datetime
 
 '''
 Generate a bar chart for the metrics with the specified informations.
@@ -251,21 +252,20 @@ def GenerateBarChart(results, libraries, fileName, bestlib="mlpack"):
 '''
 Generate a memory chart with the specified informations.
 
-@param massiflogFile - The massif logfile.
+@param massiflogFile - The memory info of the memory record, the memory series
+or the location of the massif logfile.
 '''
 def CreateMassifChart(massiflogFile, datasetName):
-  # Read the massif logfile.
+  # Read the memory series.
   try:
-    with open(massiflogFile, "r") as fid:
-      content = fid.read()
-  except IOError as e:
+    series = Profiler.MemorySeries(massiflogFile)
+  except (IOError, ValueError) as e:
     Log.Fatal("Exception: " + str(e))
     return
 
-  # Parse the massif logfile.
-  memHeapB = [(int(i) / 1024) + 0.0001 for i in re.findall(r"mem_heap_B=(\d*)", content)]
-  memHeapExtraB = [(int(i) / 1024) + 0.0001 for i in  re.findall(r"mem_heap_extra_B=(\d*)", content)]
-  memStackB = [(int(i) / 1024) + 0.0001 for i in  re.findall(r"mem_stacks_B=(\d*)", content)]
+  memHeapB = [(i / 1024) + 0.0001 for i in series["heap"]]
+  memHeapExtraB = [(i / 1024) + 0.0001 for i in series["heapExtra"]]
+  memStackB = [(i / 1024) + 0.0001 for i in series["stacks"]]
 
   # Plot the memory information.
   X = list(range(len(memHeapExtraB)))
@@ -336,6 +336,9 @@ def CreateTopLineChart(db):
     header = ''
     sums = []
 
+    # Get the sums of all libraries with a single query.
+    resultsSums = db.GetResultsSums()
+
     i = 1
     for id, name in res:
       if 'memory' not in name:
@@ -346,7 +349,7 @@ def CreateTopLineChart(db):
 
         # Add the calcuated sum over all timing data for the specified data
         # to the list.
-        lsum = db.GetResultsSum(name)
+        lsum = resultsSums.get(id)
         if lsum:
           sums.append(lsum[1])
         else:
@@ -0,0 +1,74 @@
+'''
+  @file java_server.py
+  @author Marcus Edel
+
+  Class to run java benchmark methods on a persistent JVM.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from pipe_server import *
+
+import atexit
+import subprocess
+
+'''
+This class implements the client of the java benchmark server
+(methods/weka/src/BenchmarkServer.java). Every process keeps one server per
+classpath. If the server can't be started, the methods are executed in a new
+JVM as before.
+'''
+class JavaServer(PipeServer):
+
+  # The running servers, indexed by the classpath.
+  servers = {}
+
+  '''
+  Start the java benchmark server with the given classpath.
+
+  @param classpath - The classpath of the server.
+  '''
+  def __init__(self, classpath):
+    PipeServer.__init__(self, ["java", "-classpath", classpath,
+        "BenchmarkServer"])
+
+  '''
+  Run the main method of the given class and return its output as byte string,
+  like subprocess.check_output() with stderr=subprocess.STDOUT.
+
+  @param classpath - The classpath which contains the class.
+  @param cmd - List that contains the name of the class and the arguments.
+  @param timeout - The time until the timeout, 0 or None for no timeout.
+  @param cold - If True the server is restarted, so the method runs in a new
+  JVM.
+  @return The output of the method.
+  '''
+  @staticmethod
+  def Run(classpath, cmd, timeout=None, cold=False):
+    if cold:
+      PipeServer.Restart(JavaServer.servers, classpath)
+
+    server = PipeServer.Get(JavaServer.servers, classpath,
+        lambda: JavaServer(classpath))
+
+    if server is None:
+      return subprocess.check_output(["java", "-classpath", classpath] + cmd,
+          stderr=subprocess.STDOUT, shell=False, timeout=timeout or None)
+
+    status, blocks = PipeServer.Call(JavaServer.servers, classpath, cmd,
+        timeout)
+    if status != 0:
+      raise subprocess.CalledProcessError(status, cmd, blocks[0])
+    return blocks[0]
+
+atexit.register(PipeServer.StopAll, JavaServer.servers)
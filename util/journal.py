@@ -0,0 +1,222 @@
+'''
+  @file journal.py
+  @author Marcus Edel
+
+  Class to record the state of the benchmark jobs.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from misc import *
+
+import hashlib
+import json
+
+'''
+This class implements an append-only journal of the benchmark jobs. Every line
+of the journal file is a JSON record, the first record describes the run (e.g.
+the config, the builds and the process id, a resumed run appends a new header)
+and the other records the state of a job:
+
+  pending - The job is part of the run.
+  running - A worker started the job.
+  done - The job is finished, the record contains the result.
+  recorded - The result of the job is saved in the database.
+
+The last record of a job wins. Every record is written with a single write call
+on a file opened in append mode, so the workers can write into the same journal
+and a crash loses at most the record that is being written.
+'''
+class Journal(object):
+
+  # The directory that contains the journals, every config and database has its
+  # own journal.
+  JOURNAL_PATH = "reports/etc"
+
+  # The states of a job, in the order they are reached.
+  STATES = ["pending", "running", "done", "recorded"]
+
+  '''
+  Create the journal instance.
+
+  @param path - The location of the journal file.
+  '''
+  def __init__(self, path):
+    self.path = os.path.abspath(path)
+
+  '''
+  Get the location of the journal of the runs with the given config and
+  database, so concurrent runs with different configs or databases don't share
+  a journal.
+
+  @param config - The location of the config file.
+  @param database - The database or None if the results aren't saved.
+  @return The location of the journal file.
+  '''
+  @staticmethod
+  def Path(config, database):
+    key = json.dumps([os.path.abspath(config), database])
+    return os.path.join(Journal.JOURNAL_PATH, "journal-" + hashlib.sha1(
+        key.encode("UTF-8")).hexdigest()[:12] + ".jsonl")
+
+  '''
+  Get the key of the given job.
+
+  @param library - The name of the library.
+  @param method - The name of the method.
+  @param options - The options of the job (with the sweep value).
+  @param dataset - The dataset of the job as given in the config.
+  @param sweepElement - The sweep step of the job.
+  @param trials - The number of trials of the job.
+  @return The key as string.
+  '''
+  @staticmethod
+  def Key(library, method, options, dataset, sweepElement, trials):
+    return json.dumps([library, method, options, dataset, sweepElement, trials],
+        sort_keys=True)
+
+  '''
+  Append the given records to the journal.
+
+  @param records - List of records.
+  '''
+  def Write(self, records):
+    if not records:
+      return
+
+    data = "".join(json.dumps(record, default=Serialize) + "\n"
+        for record in records)
+    fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+      os.write(fd, data.encode("utf-8"))
+    finally:
+      os.close(fd)
+
+  '''
+  Get the id of the process that is running the benchmark of the journal.
+
+  @return The process id or None if the run isn't running anymore or the run
+  belongs to the current process.
+  '''
+  def Owner(self):
+    loaded = self.Load()
+    pid = loaded[0].get("pid") if loaded else None
+    if not pid or pid == os.getpid():
+      return None
+
+    try:
+      os.kill(pid, 0)
+    except ProcessLookupError:
+      return None
+    except PermissionError:
+      pass
+    return pid
+
+  '''
+  Take over the journal of an interrupted run, the header of the run is written
+  again with the current process id.
+
+  @param header - Dictionary that describes the run.
+  @return False if the run of the journal is still running.
+  '''
+  def Resume(self, header):
+    if self.Owner() is not None:
+      return False
+
+    header = dict(header)
+    header["pid"] = os.getpid()
+    self.Write([{"header": header}])
+    return True
+
+  '''
+  Start a new journal, the old journal is removed. The journal of a run that is
+  still running isn't removed.
+
+  @param header - Dictionary that describes the run.
+  @param keys - The keys of all jobs of the run.
+  @return False if the run of the old journal is still running.
+  '''
+  def Start(self, header, keys):
+    if self.Owner() is not None:
+      return False
+
+    header = dict(header)
+    header["pid"] = os.getpid()
+
+    path = os.path.dirname(self.path)
+    if not os.path.exists(path):
+      os.makedirs(path)
+
+    with open(self.path, "w"):
+      pass
+
+    self.Write([{"header": header}] + [{"key": key, "state": "pending"}
+        for key in keys])
+    return True
+
+  '''
+  Set the state of the given job.
+
+  @param key - The key of the job.
+  @param state - The new state of the job.
+  @param result - The result of the job (only for the state 'done').
+  '''
+  def Update(self, key, state, result=None):
+    record = {"key": key, "state": state}
+    if state == "done":
+      record["result"] = result
+    self.Write([record])
+
+  '''
+  Mark the given jobs as saved in the database.
+
+  @param keys - The keys of the jobs.
+  '''
+  def Record(self, keys):
+    self.Write([{"key": key, "state": "recorded"} for key in keys])
+
+  '''
+  Load the journal.
+
+  @return Tuple that contains the header and a dictionary with the job key as
+  key and a tuple of the state and the result as value or None if there is no
+  journal.
+  '''
+  def Load(self):
+    header = None
+    jobs = {}
+
+    try:
+      with open(self.path, "r") as fid:
+        for line in fid:
+          try:
+            record = json.loads(line)
+          except ValueError:
+            # The last record of a crashed run may be incomplete.
+            Log.Warn("Skip broken journal record: " + line.strip())
+            continue
+
+          if "header" in record:
+            header = record["header"]
+          elif record["state"] == "done":
+            jobs[record["key"]] = ("done", record["result"])
+          elif record["state"] == "recorded" and record["key"] in jobs:
+            jobs[record["key"]] = ("recorded", jobs[record["key"]][1])
+          else:
+            jobs[record["key"]] = (record["state"], None)
+    except (IOError, OSError):
+      return None
+
+    if header is None:
+      return None
+    return (header, jobs)
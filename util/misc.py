@@ -188,25 +188,48 @@ def CreateDirectoryStructure(directories):
        os.makedirs(directory)
 
 '''
-Load a given dataset.
+Load a given dataset. The parsed dataset is cached, so the dataset is returned
+as copy-on-write memory-mapped array. Files that are rewritten by every run,
+e.g. the predictions of a method, should not be cached.
 
 @param dataset - The location of the datasetfile.
+@param delimiter - The delimiter used to parse the dataset.
+@param cache - If False the dataset is parsed without the cache.
 @ return The loaded dataset.
 '''
-def LoadDataset(dataset, delimiter=','):
-  import numpy as np
-  return np.genfromtxt(dataset, delimiter=delimiter)
+def LoadDataset(dataset, delimiter=',', cache=True):
+  if not cache:
+    import numpy as np
+    return np.genfromtxt(dataset, delimiter=delimiter)
+
+  from dataset_cache import DatasetCache
+  return DatasetCache.Load(dataset, delimiter)
 
 '''
-Split the train labels from the given train dataset.
+Split the train labels from the given train dataset. The returned trainset and
+labels are views of the cached dataset.
 
 @param dataset - List which contains the dataset filenames.
 @return Trainset and the train labels as vector.
 '''
 def SplitTrainData(dataset):
-  import numpy as np
   if dataset:
-    trainData = np.genfromtxt(dataset[0], delimiter=',')
+    trainData = LoadDataset(dataset[0])
     return (trainData[:,:-1], trainData[:, (trainData.shape[1] - 1)])
   else:
     return None
+
+'''
+Convert the values json can't serialize, e.g. the numpy numbers of the metrics
+and the byte strings of the method descriptions. Use it as the 'default'
+function of json.dump().
+
+@param value - The value to convert.
+@return The converted value.
+'''
+def Serialize(value):
+  if isinstance(value, bytes):
+    return value.decode("latin-1")
+  if hasattr(value, "tolist"):
+    return value.tolist()
+  return str(value)
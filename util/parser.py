@@ -19,6 +19,7 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 from loader import *
+from sweep import *
 
 import yaml
 import collections
@@ -390,14 +391,9 @@ class Parser(object):
             # {'files': ['datasets/iris.csv', 'datasets/wine.csv'],
             # 'options': ''}.
             for dataset in methodMapping.datasets:
-              # Double-check for valid options: make sure there are not two
-              # sweep() calls in a single method.
-              sweeps = ["sweep" in str(v) for k, v in
-                  dataset["options"].items()].count(True)
-              if sweeps > 1:
-                Log.Fatal("Options " + str(dataset["options"]) + " invalid:" +
-                    " only one sweep allowed per method block!")
-                raise Exception("only one sweep allowed per method block")
+              # Double-check for valid options: make sure the sweep() calls
+              # and the sweep plan can be parsed.
+              Sweep.Parse(dataset["options"])
 
               # Extract the information from every section and store the
               # information into the dictionary. First check if the 'streamData'
@@ -0,0 +1,169 @@
+'''
+  @file perf_counters.py
+  @author Marcus Edel
+
+  Class to measure the hardware performance counters of a benchmark run.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import shutil
+import subprocess
+import tempfile
+
+'''
+This class wraps the benchmark executables with 'perf stat', so every run
+records the hardware performance counters of the executable and all its
+children. The counters are stored as metrics:
+
+  Cycles, Instructions - The number of cpu cycles and retired instructions.
+  CacheReferences, CacheMisses - The number of last level cache references and
+  misses.
+  BranchMisses - The number of mispredicted branches.
+  TaskClock - The cpu time of the executable in seconds.
+  IPC - The instructions per cycle.
+  CacheMissRate - The cache misses per cache reference.
+  BranchMPKI - The branch misses per thousand instructions.
+
+Counters that aren't supported by the cpu (e.g. in a virtual machine) are
+missing from the metrics.
+'''
+class PerfCounters(object):
+
+  # The perf events and the names of their metrics.
+  EVENTS = [("cycles", "Cycles"), ("instructions", "Instructions"),
+      ("cache-references", "CacheReferences"), ("cache-misses", "CacheMisses"),
+      ("branch-misses", "BranchMisses"), ("task-clock", "TaskClock")]
+
+  # If True the commands are wrapped with perf stat.
+  enabled = False
+
+  # The perf command, None if perf isn't available and False if it wasn't
+  # checked yet.
+  perf = False
+
+  '''
+  Check once if perf is installed and allowed to count the events of the
+  current user (see /proc/sys/kernel/perf_event_paranoid).
+
+  @return The location of the perf executable or None.
+  '''
+  @staticmethod
+  def Available():
+    if PerfCounters.perf is False:
+      PerfCounters.perf = shutil.which(os.environ.get("PERF_BIN", "perf"))
+      if PerfCounters.perf:
+        try:
+          subprocess.check_output([PerfCounters.perf, "stat", "-x", ",", "-e",
+              "task-clock", "--", "true"], stderr=subprocess.STDOUT)
+        except (subprocess.CalledProcessError, OSError) as e:
+          Log.Warn("Could not use perf: " + str(e))
+          PerfCounters.perf = None
+      else:
+        Log.Warn("The perf executable was not found, the hardware performance "
+            "counters are not measured.")
+
+    return PerfCounters.perf
+
+  '''
+  Wrap the given command with perf stat, if the counters are enabled.
+
+  @param cmd - The command as list.
+  @return Tuple that contains the command to execute and the location of the
+  perf output file (None if the command isn't wrapped).
+  '''
+  @staticmethod
+  def Wrap(cmd):
+    if not PerfCounters.enabled or not PerfCounters.Available():
+      return (cmd, None)
+
+    fd, output = tempfile.mkstemp(suffix=".perf")
+    os.close(fd)
+
+    events = ",".join(event for event, name in PerfCounters.EVENTS)
+    return ([PerfCounters.perf, "stat", "-x", ",", "-o", output, "-e", events,
+        "--"] + list(cmd), output)
+
+  '''
+  Parse the csv output of perf stat, the output file is removed afterwards. On
+  hybrid cpus every event is counted once per core type (e.g.
+  'cpu_core/cycles/' and 'cpu_atom/cycles/'), the values are added up.
+
+  @param output - The location of the perf output file.
+  @return Dictionary that contains the metrics.
+  '''
+  @staticmethod
+  def Parse(output):
+    names = dict(PerfCounters.EVENTS)
+    counters = {}
+    try:
+      with open(output, "r") as fid:
+        for line in fid:
+          fields = line.strip().split(",")
+          if line.startswith("#") or len(fields) < 3:
+            continue
+
+          # Remove the pmu and the modifiers, e.g. 'cpu_core/cycles/u'.
+          event = fields[2]
+          if "/" in event:
+            event = event.split("/")[1]
+          event = event.split(":")[0]
+
+          try:
+            value = float(fields[0])
+          except ValueError:
+            # '<not supported>' or '<not counted>'.
+            continue
+
+          if event in names:
+            counters[names[event]] = counters.get(names[event], 0) + value
+    except (IOError, OSError) as e:
+      Log.Warn("Could not read the perf output: " + str(e))
+    finally:
+      if os.path.isfile(output):
+        os.remove(output)
+
+    metrics = {}
+    for name, value in counters.items():
+      metrics[name] = value / 1000.0 if name == "TaskClock" else int(value)
+
+    if metrics.get("Cycles") and "Instructions" in metrics:
+      metrics["IPC"] = metrics["Instructions"] / float(metrics["Cycles"])
+    if metrics.get("CacheReferences") and "CacheMisses" in metrics:
+      metrics["CacheMissRate"] = metrics["CacheMisses"] / \
+          float(metrics["CacheReferences"])
+    if metrics.get("Instructions") and "BranchMisses" in metrics:
+      metrics["BranchMPKI"] = metrics["BranchMisses"] * 1000.0 / \
+          metrics["Instructions"]
+
+    return metrics
+
+  '''
+  Summarize the counters of the given metrics for the result table.
+
+  @param metrics - The metrics of the run.
+  @return String like 'IPC 1.52, cache miss 3.1%, branch MPKI 2.40' or '-' if
+  the metrics don't contain counters.
+  '''
+  @staticmethod
+  def Summary(metrics):
+    summary = []
+    if isinstance(metrics.get("IPC"), (int, float)):
+      summary.append("IPC {0:.2f}".format(metrics["IPC"]))
+    if isinstance(metrics.get("CacheMissRate"), (int, float)):
+      summary.append("cache miss {0:.1f}%".format(
+          100 * metrics["CacheMissRate"]))
+    if isinstance(metrics.get("BranchMPKI"), (int, float)):
+      summary.append("branch MPKI {0:.2f}".format(metrics["BranchMPKI"]))
+    return ", ".join(summary) if summary else "-"
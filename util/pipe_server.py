@@ -0,0 +1,215 @@
+'''
+  @file pipe_server.py
+  @author Marcus Edel
+
+  Class to talk to persistent benchmark servers over a pipe.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import select
+import subprocess
+import timeit
+
+'''
+This class implements the client side of a persistent benchmark server. The
+server reads one request per line from stdin, the fields of the request are
+separated by tabs. The server answers with a header line of the form
+"<status> <length> <length> ..." followed by the data blocks with the given
+lengths. After the start the server sends a single "READY" line.
+
+Every process keeps one server per key, the server is started with the first
+request and stopped when the process exits; the server also exits as soon as
+its stdin is closed, so a worker process that exits without running the exit
+handlers doesn't leave a server behind.
+'''
+class PipeServer(object):
+
+  # The number of requests the servers of the current process answered, so the
+  # caller can tell if the work was done outside of the process.
+  requests = 0
+
+  '''
+  Start the server.
+
+  @param cmd - The command to start the server.
+  '''
+  def __init__(self, cmd):
+    self.cmd = cmd
+    self.pid = os.getpid()
+    self.buffer = b""
+    self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, shell=False)
+
+    try:
+      if self.ReadLine(None) != b"READY":
+        raise EOFError()
+    except EOFError:
+      self.Stop()
+      raise Exception("Could not start the benchmark server: " + str(cmd))
+
+  '''
+  Stop the server.
+  '''
+  def Stop(self):
+    if self.process.poll() is None:
+      self.process.kill()
+    self.process.wait()
+    self.process.stdin.close()
+    self.process.stdout.close()
+
+  '''
+  Read from the server until the buffer contains the given number of bytes.
+
+  @param size - The number of bytes.
+  @param deadline - The time until the timeout or None for no timeout.
+  '''
+  def Fill(self, size, deadline):
+    fd = self.process.stdout.fileno()
+    while len(self.buffer) < size:
+      if deadline is not None:
+        remaining = deadline - timeit.default_timer()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+          raise subprocess.TimeoutExpired(self.cmd, 0)
+
+      data = os.read(fd, 65536)
+      if not data:
+        raise EOFError("The benchmark server exited.")
+      self.buffer += data
+
+  '''
+  Read a single line from the server.
+
+  @param deadline - The time until the timeout or None for no timeout.
+  @return The line without the line break.
+  '''
+  def ReadLine(self, deadline):
+    while b"\n" not in self.buffer:
+      self.Fill(len(self.buffer) + 1, deadline)
+
+    line, self.buffer = self.buffer.split(b"\n", 1)
+    return line
+
+  '''
+  Read the given number of bytes from the server.
+
+  @param size - The number of bytes.
+  @param deadline - The time until the timeout or None for no timeout.
+  @return The data.
+  '''
+  def Read(self, size, deadline):
+    self.Fill(size, deadline)
+    data, self.buffer = self.buffer[:size], self.buffer[size:]
+    return data
+
+  '''
+  Send a request to the server and return the answer.
+
+  @param fields - List that contains the fields of the request.
+  @param timeout - The time until the timeout, 0 or None for no timeout.
+  @return Tuple that contains the status and the list of data blocks.
+  '''
+  def Request(self, fields, timeout):
+    deadline = None
+    if timeout:
+      deadline = timeit.default_timer() + timeout
+
+    self.process.stdin.write(("\t".join(fields) + "\n").encode("UTF-8"))
+    self.process.stdin.flush()
+
+    header = [int(x) for x in self.ReadLine(deadline).split()]
+    return (header[0], [self.Read(size, deadline) for size in header[1:]])
+
+  '''
+  Get the server of the current process with the given key, the server is
+  started if necessary.
+
+  @param servers - Dictionary that contains the servers.
+  @param key - The key of the server.
+  @param factory - Function to start a new server.
+  @return The server or None if the server can't be started.
+  '''
+  @staticmethod
+  def Get(servers, key, factory):
+    # Don't use a server that was started by the parent process.
+    server = servers.get(key)
+    if server is not None and server.pid != os.getpid():
+      del servers[key]
+
+    if key not in servers:
+      try:
+        servers[key] = factory()
+      except Exception as e:
+        Log.Warn(str(e))
+        servers[key] = None
+
+    return servers[key]
+
+  '''
+  Stop the server of the current process with the given key, so the next
+  request starts a new server.
+
+  @param servers - Dictionary that contains the servers.
+  @param key - The key of the server.
+  '''
+  @staticmethod
+  def Restart(servers, key):
+    # A server that couldn't be started isn't started again.
+    server = servers.get(key)
+    if server is not None:
+      del servers[key]
+      if server.pid == os.getpid():
+        server.Stop()
+
+  '''
+  Send a request to the server with the given key. If the request fails or
+  times out, the server is stopped and the next request starts a new one.
+
+  @param servers - Dictionary that contains the servers.
+  @param key - The key of the server.
+  @param fields - List that contains the fields of the request.
+  @param timeout - The time until the timeout, 0 or None for no timeout.
+  @return Tuple that contains the status and the list of data blocks.
+  '''
+  @staticmethod
+  def Call(servers, key, fields, timeout):
+    for field in fields:
+      if "\t" in field or "\n" in field:
+        raise ValueError("Invalid argument: " + repr(field))
+
+    server = servers[key]
+    PipeServer.requests += 1
+    try:
+      return server.Request(fields, timeout)
+    except (subprocess.TimeoutExpired, EOFError, OSError) as e:
+      # The method is still running or the server died (e.g. the method called
+      # exit()), so we stop the server.
+      server.Stop()
+      del servers[key]
+
+      if isinstance(e, subprocess.TimeoutExpired):
+        raise subprocess.TimeoutExpired(fields, timeout)
+      raise subprocess.CalledProcessError(server.process.returncode, fields)
+
+  '''
+  Stop all servers of the current process.
+
+  @param servers - Dictionary that contains the servers.
+  '''
+  @staticmethod
+  def StopAll(servers):
+    for server in servers.values():
+      if server is not None and server.pid == os.getpid():
+        server.Stop()
+    servers.clear()
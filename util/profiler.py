@@ -18,11 +18,391 @@ if cmd_subfolder not in sys.path:
 
 from log import *
 
+import json
+import subprocess
+import time
+
+'''
+This class tracks the memory of a process tree. The process is started in its
+own cgroup v2, so the kernel accounts the memory of every child, even of short
+lived children, and memory.peak is the exact peak of the whole tree. If no
+cgroup can be created (cgroup v1, no delegated subtree or a kernel without
+memory.peak, see Setup) the resident set size of the process tree is sampled from
+/proc/<pid>/smaps_rollup and the peak is the maximum of the samples and of the
+peak resident set size of the process reported by wait4().
+
+The timeline keeps between points and 2 * points samples. If the timeline is
+full, neighbouring samples are merged (the larger value is kept, so spikes
+aren't lost) and the following samples are merged in the same way, so the
+timeline always covers the whole run with the same resolution.
+'''
+class MemoryTracker(object):
+
+  # The mount points of the cgroup v2 hierarchy, the second one is used by
+  # systems with the hybrid cgroup layout.
+  CGROUP_ROOTS = ["/sys/fs/cgroup", "/sys/fs/cgroup/unified"]
+
+  # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+  RSS_FACTOR = 1 if sys.platform == "darwin" else 1024
+
+  # The leaf cgroup of the benchmark processes (see Setup).
+  LEAF_CGROUP = "benchmark-processes"
+
+  # The number of cgroups created by the current process.
+  cgroups = 0
+
+  # The cgroup that contains the cgroups of the tracked processes, None if no
+  # cgroup can be used and False if it wasn't checked yet.
+  parent = False
+
+  '''
+  Create the memory tracker.
+
+  @param points - The minimum number of samples of the timeline.
+  @param interval - The time between two samples in seconds.
+  '''
+  def __init__(self, points=200, interval=0.01):
+    self.points = points
+    self.interval = interval
+    self.cgroup = None
+    self.backend = None
+    self.peak = 0
+    self.timeline = []
+    self.stride = 1
+    self.pending = None
+    self.count = 0
+
+  '''
+  Read the controllers listed in the given file, e.g. cgroup.controllers.
+
+  @param path - The location of the file.
+  @return List of the controllers.
+  '''
+  @staticmethod
+  def Controllers(path):
+    try:
+      with open(path, "r") as fid:
+        return fid.read().split()
+    except (IOError, OSError):
+      return []
+
+  '''
+  Find the cgroup v2 that contains the cgroups of the tracked processes. cgroup
+  v2 only allows to enable the memory controller for the children of a cgroup
+  that doesn't contain processes, so the processes of the cgroup of the
+  benchmark are moved into the leaf cgroup LEAF_CGROUP first. This requires a
+  delegated cgroup, e.g. 'systemd-run --user --scope -p Delegate=yes make
+  memory ...'. The check is done once per process, the processes started
+  afterwards (e.g. the workers) are already in the leaf cgroup.
+
+  @return The path of the cgroup or None if no cgroup can be used.
+  '''
+  @staticmethod
+  def Setup():
+    if MemoryTracker.parent is not False:
+      return MemoryTracker.parent
+    MemoryTracker.parent = None
+
+    path = None
+    try:
+      with open("/proc/self/cgroup", "r") as fid:
+        for line in fid:
+          if line.startswith("0::"):
+            path = line[3:].strip()
+    except (IOError, OSError):
+      pass
+
+    # Only a cgroup v2 hierarchy has the cgroup.controllers file.
+    cgroups = [] if path is None else [os.path.normpath(os.path.join(root,
+        path.lstrip("/"))) for root in MemoryTracker.CGROUP_ROOTS]
+    cgroups = [c for c in cgroups if os.path.exists(os.path.join(c,
+        "cgroup.controllers"))]
+    if not cgroups:
+      Log.Warn("No cgroup v2 hierarchy found, the memory is sampled from "
+          "smaps_rollup.")
+      return None
+    cgroup = cgroups[0]
+
+    parent = os.path.dirname(cgroup)
+    if os.path.basename(cgroup) == MemoryTracker.LEAF_CGROUP and "memory" in \
+        MemoryTracker.Controllers(os.path.join(parent,
+        "cgroup.subtree_control")):
+      # The benchmark was moved into the leaf cgroup by the parent process.
+      cgroup = parent
+    elif "memory" not in MemoryTracker.Controllers(os.path.join(cgroup,
+        "cgroup.subtree_control")):
+      try:
+        if "memory" not in MemoryTracker.Controllers(os.path.join(cgroup,
+            "cgroup.controllers")):
+          raise OSError("the memory controller isn't delegated to " + cgroup)
+
+        leaf = os.path.join(cgroup, MemoryTracker.LEAF_CGROUP)
+        if not os.path.exists(leaf):
+          os.mkdir(leaf)
+
+        with open(os.path.join(cgroup, "cgroup.procs"), "r") as fid:
+          pids = fid.read().split()
+        for pid in pids:
+          try:
+            with open(os.path.join(leaf, "cgroup.procs"), "w") as fid:
+              fid.write(pid)
+          except ProcessLookupError:
+            # The process terminated in the meantime.
+            pass
+
+        with open(os.path.join(cgroup, "cgroup.subtree_control"), "w") as fid:
+          fid.write("+memory")
+      except (IOError, OSError) as e:
+        Log.Warn("Could not enable the memory controller (" + str(e) + "), "
+            "the memory is sampled from smaps_rollup. Run the benchmark in a "
+            "delegated cgroup, e.g. with 'systemd-run --user --scope -p "
+            "Delegate=yes make memory ...'.")
+        return None
+
+    Log.Info("Track the memory with the cgroup " + cgroup + ".")
+    MemoryTracker.parent = cgroup
+    return cgroup
+
+  '''
+  Create a new cgroup for a tracked process (see Setup).
+
+  @return The path of the cgroup or None if the cgroup can't be used.
+  '''
+  @staticmethod
+  def CreateCgroup():
+    parent = MemoryTracker.Setup()
+    if parent is None:
+      return None
+
+    try:
+      MemoryTracker.cgroups += 1
+      cgroup = os.path.join(parent, "benchmark-" + str(os.getpid()) + "-" +
+          str(MemoryTracker.cgroups))
+      os.mkdir(cgroup)
+    except (IOError, OSError) as e:
+      Log.Warn("Could not create the cgroup (" + str(e) + "), the memory is "
+          "sampled from smaps_rollup.")
+      MemoryTracker.parent = None
+      return None
+
+    # The kernel doesn't support memory.peak (Linux < 5.19).
+    if not os.path.exists(os.path.join(cgroup, "memory.peak")):
+      Log.Warn("The kernel doesn't support memory.peak, the memory is sampled "
+          "from smaps_rollup.")
+      MemoryTracker.RemoveCgroup(cgroup)
+      MemoryTracker.parent = None
+      return None
+
+    return cgroup
+
+  '''
+  Kill the processes that are left in the given cgroup and remove the cgroup.
+
+  @param cgroup - The path of the cgroup.
+  '''
+  @staticmethod
+  def RemoveCgroup(cgroup):
+    # cgroup.kill is available since Linux 5.14.
+    kill = os.path.join(cgroup, "cgroup.kill")
+    if os.path.exists(kill):
+      try:
+        with open(kill, "w") as fid:
+          fid.write("1")
+      except (IOError, OSError):
+        pass
+
+    # The killed processes leave the cgroup asynchronously.
+    for i in range(100):
+      try:
+        os.rmdir(cgroup)
+        return
+      except OSError:
+        time.sleep(0.01)
+
+    Log.Warn("Could not remove the cgroup: " + cgroup)
+
+  '''
+  Read the first integer of the given file.
+
+  @param path - The location of the file.
+  @return The value or 0 if the file can't be read.
+  '''
+  @staticmethod
+  def ReadValue(path):
+    try:
+      with open(path, "r") as fid:
+        return int(fid.read().split()[0])
+    except (IOError, OSError, ValueError, IndexError):
+      return 0
+
+  '''
+  Get the process ids of the process tree of the given process.
+
+  @param pid - The id of the root process.
+  @return List of the process ids.
+  '''
+  @staticmethod
+  def ProcessTree(pid):
+    pids = [pid]
+    for p in pids:
+      try:
+        for tid in os.listdir("/proc/" + str(p) + "/task"):
+          with open("/proc/" + str(p) + "/task/" + tid + "/children", "r") as fid:
+            pids.extend(int(c) for c in fid.read().split())
+      except (IOError, OSError):
+        # The process terminated or the kernel doesn't list the children.
+        continue
+    return pids
+
+  '''
+  Get the resident set size of the given process from smaps_rollup.
+
+  @param pid - The id of the process.
+  @return The resident set size in bytes.
+  '''
+  @staticmethod
+  def ResidentSetSize(pid):
+    try:
+      with open("/proc/" + str(pid) + "/smaps_rollup", "r") as fid:
+        for line in fid:
+          if line.startswith("Rss:"):
+            return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError):
+      pass
+    return 0
+
+  '''
+  Get the current memory of the tracked process tree.
+
+  @param pid - The id of the root process.
+  @return The memory in bytes.
+  '''
+  def Current(self, pid):
+    if self.cgroup:
+      return MemoryTracker.ReadValue(os.path.join(self.cgroup,
+          "memory.current"))
+    return sum(MemoryTracker.ResidentSetSize(p)
+        for p in MemoryTracker.ProcessTree(pid))
+
+  '''
+  Add a sample to the timeline.
+
+  @param elapsed - The time since the start of the process in seconds.
+  @param value - The memory in bytes.
+  '''
+  def Add(self, elapsed, value):
+    self.peak = max(self.peak, value)
+    if self.pending is None:
+      self.pending = (elapsed, value)
+    elif value > self.pending[1]:
+      self.pending = (self.pending[0], value)
+
+    self.count += 1
+    if self.count < self.stride:
+      return
+
+    self.timeline.append(self.pending)
+    self.pending = None
+    self.count = 0
+
+    if len(self.timeline) >= 2 * self.points:
+      self.timeline = [(a[0], max(a[1], b[1])) for a, b in
+          zip(self.timeline[::2], self.timeline[1::2])]
+      self.stride *= 2
+
+  '''
+  Run the given command and track the memory of the process tree.
+
+  @param command - The command line as list.
+  @param timeout - The timeout in seconds.
+  @return The exit status of the command.
+  '''
+  def Run(self, command, timeout=None):
+    self.cgroup = MemoryTracker.CreateCgroup()
+    self.backend = "cgroup" if self.cgroup else "smaps_rollup"
+
+    preexec = None
+    if self.cgroup:
+      procs = os.path.join(self.cgroup, "cgroup.procs")
+
+      # Move the child into the cgroup before it executes the command, so the
+      # complete process tree is tracked.
+      def preexec():
+        with open(procs, "w") as fid:
+          fid.write("0")
+
+    start = time.time()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL, shell=False, preexec_fn=preexec)
+    try:
+      while True:
+        pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+        elapsed = time.time() - start
+        if pid:
+          # Popen doesn't wait for the reaped process again.
+          process.returncode = -os.WTERMSIG(status) if \
+              os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+          break
+
+        self.Add(elapsed, self.Current(process.pid))
+        if timeout and elapsed > timeout:
+          raise subprocess.TimeoutExpired(command, timeout)
+        time.sleep(self.interval)
+
+      if self.pending is not None:
+        self.timeline.append(self.pending)
+        self.pending = None
+
+      if self.cgroup:
+        self.peak = MemoryTracker.ReadValue(os.path.join(self.cgroup,
+            "memory.peak"))
+      else:
+        self.peak = max(self.peak, usage.ru_maxrss * MemoryTracker.RSS_FACTOR)
+    finally:
+      if process.returncode is None:
+        process.kill()
+        process.wait()
+      if self.cgroup:
+        MemoryTracker.RemoveCgroup(self.cgroup)
+
+    return process.returncode
+
+  '''
+  Save the timeline in the massif output format, so the file can be used like
+  a valgrind massif log file (e.g. by CreateMassifChart). The memory of the
+  process tree is reported as heap memory.
+
+  @param output - The location of the output file.
+  @param command - The command line that was tracked.
+  '''
+  def Save(self, output, command):
+    with open(output, "w") as fid:
+      fid.write("desc: backend=" + self.backend + " peak_B=" + str(self.peak) +
+          "\n")
+      fid.write("cmd: " + " ".join(command) + "\n")
+      fid.write("time_unit: ms\n")
+      for i, (elapsed, value) in enumerate(self.timeline):
+        fid.write("#-----------\nsnapshot=" + str(i) + "\n#-----------\n")
+        fid.write("time=" + str(int(elapsed * 1000)) + "\n")
+        fid.write("mem_heap_B=" + str(value) + "\n")
+        fid.write("mem_heap_extra_B=0\nmem_stacks_B=0\nheap_tree=empty\n")
+
 '''
 This class implements functions the get profiling informations.
 '''
 class Profiler(object):
 
+  # The memory backend, 'massif' runs the command with valgrind massif and
+  # 'sampler' tracks the memory with the MemoryTracker.
+  backend = "massif"
+
+  # The maximum number of points of the stored memory series.
+  SERIES_POINTS = 200
+
+  # The massif snapshot fields and the names of the series.
+  MASSIF_FIELDS = {"time": "time", "mem_heap_B": "heap",
+      "mem_heap_extra_B": "heapExtra", "mem_stacks_B": "stacks"}
+
   '''
   Use valgrind massif to get memory profiling information and save the ouput in
   the specified file.
@@ -36,8 +416,11 @@ class Profiler(object):
   '''
   @staticmethod
   def MassifMemoryUsage(command, output, timeout, options,
-      valgrind=os.environ["VALGRIND_BIN"]):
-    import shlex, subprocess
+      valgrind=os.environ.get("VALGRIND_BIN", "")):
+    import shlex
+
+    if Profiler.backend == "sampler":
+      return Profiler.SampledMemoryUsage(command, output, timeout)
 
     cmd = shlex.split(("%s --tool=massif --massif-out-file=%s %s ") %
         (valgrind, output, options)) + command
@@ -56,8 +439,9 @@ class Profiler(object):
   @return The ms_print output if the method was successful otherwise -1.
   '''
   @staticmethod
-  def MassifMemoryUsageReport(fileName, valgrind=os.environ["MS_PRINT_BIN"]):
-    import shlex, subprocess
+  def MassifMemoryUsageReport(fileName,
+      valgrind=os.environ.get("MS_PRINT_BIN", "")):
+    import shlex
 
     cmd = shlex.split(valgrind + " " + fileName)
     try:
@@ -68,36 +452,87 @@ class Profiler(object):
       return -1
 
   '''
-  Returns the memory used by a process and his children. We don't know when the
-  process is done so we have to poll to get the memory. To avoid memory overflow
-  we use a ringbuffer to limit the size of the memory values.
+  Track the memory of the command with the MemoryTracker and save the timeline
+  in the massif output format in the specified file.
+
+  @param command - Method command line to profile.
+  @param output - Save the report at the output path with the specified name.
+  @param timeout - The timeout in seconds.
+  @return Returns -1 if the method was not successful, if the method was
+  successful save the report file in the specified file.
+  '''
+  @staticmethod
+  def SampledMemoryUsage(command, output, timeout):
+    tracker = MemoryTracker()
+    try:
+      status = tracker.Run(command, timeout)
+      if status != 0:
+        raise Exception("exit status " + str(status))
+      tracker.Save(output, command)
+    except Exception as e:
+      Log.Fatal("Could not execute command: " + str(command))
+      Log.Fatal("Exception: " + str(e))
+      return -1
+
+  '''
+  Parse the given massif output file in a single pass, the file is read line by
+  line, so the heap trees of the detailed snapshots aren't kept in memory.
+  Series with more than points snapshots are downsampled, neighbouring
+  snapshots are merged and the larger values are kept.
 
-  @param process - Popen instance.
-  @param Buffersize - Memory value count.
-  @return List of memory values.
+  @param fileName - The location of the massif output file.
+  @param points - The maximum number of points of the series.
+  @return Dictionary with the 'time', 'heap', 'heapExtra' and 'stacks' series
+  (in bytes), the time unit ('timeUnit') and the peak of the total memory in
+  bytes ('peak').
   '''
   @staticmethod
-  def SubprocessMemoryUsage(process, Buffersize=200):
-    import psutil, time, collections
+  def MassifSeries(fileName, points=SERIES_POINTS):
+    series = {"time": [], "heap": [], "heapExtra": [], "stacks": [],
+        "timeUnit": "i", "peak": 0}
 
-    # Create the process list with the main process and his childrens.
-    p = psutil.Process(process.pid)
-    children = list(p.get_children(recursive=True)) + [p]
+    with open(fileName, "r") as fid:
+      for line in fid:
+        key, sep, value = line.partition("=")
+        if key in Profiler.MASSIF_FIELDS:
+          series[Profiler.MASSIF_FIELDS[key]].append(int(value))
+        elif line.startswith("time_unit:"):
+          series["timeUnit"] = line[10:].strip()
+        elif line.startswith("desc:") and "peak_B=" in line:
+          # The MemoryTracker saves the exact peak in the description.
+          series["peak"] = int(line.split("peak_B=")[1].split()[0])
 
-    memoryTable = collections.deque(maxlen=Buffersize)
+    # Every snapshot has all fields, a truncated file may end in the middle of
+    # a snapshot.
+    length = min(len(series[name]) for name in
+        Profiler.MASSIF_FIELDS.values())
+    names = list(Profiler.MASSIF_FIELDS.values())
+    for name in names:
+      del series[name][length:]
 
-    # We have to poll to get the memory values.
-    while process.poll() == None:
-      try:
-        for p in children:
-          memoryTable.append(int(p.get_memory_info()[0]))
-      # Sometimes a subprocess has terminated in the time between we measure the
-      # memory. In this case, we continue.
-      except psutil.NoSuchProcess:
-        continue
-      except psutil.AccessDenied:
-        continue
+    series["peak"] = max([series["peak"]] + [sum(values) for values in
+        zip(series["heap"], series["heapExtra"], series["stacks"])])
 
-      time.sleep(0.01)
+    while len(series["time"]) > points:
+      for name in names:
+        values = series[name]
+        if name == "time":
+          series[name] = values[::2]
+        else:
+          series[name] = [max(values[i:i + 2]) for i in
+              range(0, len(values), 2)]
 
-    return memoryTable
+    return series
+
+  '''
+  Get the memory series of the given memory record. Older records contain the
+  location of the massif output file instead of the series.
+
+  @param memoryInfo - The memory info of the memory record.
+  @return The memory series (see MassifSeries).
+  '''
+  @staticmethod
+  def MemorySeries(memoryInfo):
+    if memoryInfo.lstrip().startswith("{"):
+      return json.loads(memoryInfo)
+    return Profiler.MassifSeries(memoryInfo)
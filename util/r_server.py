@@ -0,0 +1,82 @@
+'''
+  @file r_server.py
+  @author Marcus Edel
+
+  Class to run R benchmark scripts on a persistent R session.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from pipe_server import *
+
+import atexit
+import subprocess
+
+'''
+This class implements the client of the R benchmark server
+(methods/R/benchmark_server.r). The server keeps the libraries loaded and
+caches the parsed datasets, the timings and the predictions are returned in
+memory. Every process keeps one server per script directory. If the server
+can't be started, the scripts are executed with a new Rscript process as before.
+'''
+class RServer(PipeServer):
+
+  # The Rscript executable.
+  RSCRIPT = "libraries/bin/Rscript"
+
+  # The running servers, indexed by the script directory.
+  servers = {}
+
+  '''
+  Start the R benchmark server.
+
+  @param path - The directory that contains the R scripts.
+  '''
+  def __init__(self, path):
+    PipeServer.__init__(self, [RServer.RSCRIPT, os.path.join(path,
+        "benchmark_server.r")])
+
+  '''
+  Run the given R script and return its output and predictions.
+
+  @param path - The directory that contains the R scripts.
+  @param cmd - List that contains the path of the script and the arguments.
+  @param timeout - The time until the timeout, 0 or None for no timeout.
+  @return Tuple that contains the output of the script as byte string and the
+  predictions as numpy array (None if the script doesn't write predictions).
+  '''
+  @staticmethod
+  def Run(path, cmd, timeout=None):
+    import numpy as np
+
+    server = PipeServer.Get(RServer.servers, path, lambda: RServer(path))
+
+    if server is None:
+      s = subprocess.check_output([RServer.RSCRIPT] + cmd,
+          stderr=subprocess.STDOUT, shell=False, timeout=timeout or None)
+
+      predictions = None
+      if os.path.isfile("predictions.csv"):
+        predictions = np.genfromtxt("predictions.csv", delimiter=',')[1:]
+      return (s, predictions)
+
+    status, blocks = PipeServer.Call(RServer.servers, path, cmd, timeout)
+    if status != 0:
+      raise subprocess.CalledProcessError(status, cmd, blocks[0])
+
+    predictions = None
+    if len(blocks[1]) > 0:
+      predictions = np.array(blocks[1].decode().split("\n"), dtype=float)
+    return (blocks[0], predictions)
+
+atexit.register(PipeServer.StopAll, RServer.servers)
@@ -0,0 +1,131 @@
+'''
+  @file resource_usage.py
+  @author Marcus Edel
+
+  Class to measure the resource usage (peak memory, cpu time) of a benchmark
+  run.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+try:
+  import resource
+  resource_available = True
+except ImportError:
+  resource_available = False
+
+'''
+This class implements a lightweight measurement of the resource usage with
+getrusage(), so the benchmark gets the peak memory and the cpu time of every run
+without a profiler. The values are stored as metrics:
+
+  PeakRSS - The peak resident set size in bytes.
+  CPUTime - The user and system cpu time in seconds.
+  UserTime, SystemTime - The user and the system cpu time in seconds.
+  MinorFaults, MajorFaults - The number of page faults.
+  VoluntaryContextSwitches, InvoluntaryContextSwitches - The number of context
+  switches.
+
+The usage of a single subprocess is taken from wait4() (see Metrics), the usage
+of a run in the benchmark process is the difference of the usage of the process
+and its terminated children before and after the run (see Start and Stop).
+'''
+class ResourceUsage(object):
+
+  # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+  RSS_FACTOR = 1 if sys.platform == "darwin" else 1024
+
+  # Writing '5' to this file resets the peak resident set size of the process
+  # (Linux only).
+  CLEAR_REFS = "/proc/self/clear_refs"
+
+  '''
+  Convert the given rusage structure to metrics.
+
+  @param usage - The rusage structure, e.g. from os.wait4().
+  @return Dictionary that contains the metrics.
+  '''
+  @staticmethod
+  def Metrics(usage):
+    return {"PeakRSS": usage.ru_maxrss * ResourceUsage.RSS_FACTOR,
+        "CPUTime": usage.ru_utime + usage.ru_stime,
+        "UserTime": usage.ru_utime,
+        "SystemTime": usage.ru_stime,
+        "MinorFaults": usage.ru_minflt,
+        "MajorFaults": usage.ru_majflt,
+        "VoluntaryContextSwitches": usage.ru_nvcsw,
+        "InvoluntaryContextSwitches": usage.ru_nivcsw}
+
+  '''
+  Start the measurement. The peak resident set size of the process is reset if
+  the platform supports it.
+  '''
+  def Start(self):
+    if not resource_available:
+      return
+
+    self.resetPeak = False
+    try:
+      with open(ResourceUsage.CLEAR_REFS, "w") as fid:
+        fid.write("5")
+      self.resetPeak = True
+    except (IOError, OSError):
+      pass
+
+    self.process = resource.getrusage(resource.RUSAGE_SELF)
+    self.children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+  '''
+  Stop the measurement.
+
+  @return Dictionary that contains the metrics of the run or an empty
+  dictionary if getrusage() isn't available.
+  '''
+  def Stop(self):
+    if not resource_available:
+      return {}
+
+    process = ResourceUsage.Metrics(resource.getrusage(resource.RUSAGE_SELF))
+    children = ResourceUsage.Metrics(resource.getrusage(
+        resource.RUSAGE_CHILDREN))
+    processStart = ResourceUsage.Metrics(self.process)
+    childrenStart = ResourceUsage.Metrics(self.children)
+
+    metrics = {}
+    for key in process:
+      if key != "PeakRSS":
+        metrics[key] = (process[key] - processStart[key]) + \
+            (children[key] - childrenStart[key])
+
+    # The peak of the children is the peak of all children ever terminated, so
+    # it only belongs to this run if it increased. If a child terminated during
+    # the run without raising it, the peak of the child is unknown and the peak
+    # of the process alone would be wrong, so the metric is omitted. The peak of
+    # the process is only valid if it was reset.
+    childRan = any(children[key] != childrenStart[key] for key in
+        ("MinorFaults", "MajorFaults", "VoluntaryContextSwitches",
+        "InvoluntaryContextSwitches", "CPUTime"))
+    childPeak = children["PeakRSS"] > childrenStart["PeakRSS"]
+    if childRan and not childPeak:
+      return metrics
+
+    peaks = []
+    if self.resetPeak:
+      peaks.append(process["PeakRSS"])
+    if childPeak:
+      peaks.append(children["PeakRSS"])
+    if peaks:
+      metrics["PeakRSS"] = max(peaks)
+
+    return metrics
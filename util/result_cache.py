@@ -0,0 +1,196 @@
+'''
+  @file result_cache.py
+  @author Marcus Edel
+
+  Class to cache the results of the benchmark jobs.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from misc import *
+
+import hashlib
+import json
+import time
+
+'''
+This class implements a content-addressed cache for the results of the
+benchmark jobs. The cache key is a hash of everything that determines the
+result: the library version, the script source, the dataset contents, the
+method, the options and the trial settings. So a job is only run again if one
+of its inputs changed.
+
+Libraries without a fixed version (e.g. 'HEAD') are built from source, the
+version doesn't tell if the library changed, so their results aren't cached.
+'''
+class ResultCache(object):
+
+  # The file that contains the cached results.
+  CACHE_FILE = "reports/etc/results.json"
+
+  # The number of seconds a cached result is kept.
+  MAX_AGE = 30 * 24 * 60 * 60
+
+  # Library versions that don't identify a release.
+  UNVERSIONED = ["", "HEAD", "head", "master", "latest"]
+
+  # The loaded cache of the current process.
+  cache = None
+
+  '''
+  Load the cache from the cache file.
+
+  @return Dictionary that contains the cached results ('results') and the
+  hashes of the input files ('files').
+  '''
+  @staticmethod
+  def Load():
+    if ResultCache.cache is None:
+      ResultCache.cache = {"results": {}, "files": {}}
+      try:
+        with open(ResultCache.CACHE_FILE, "r") as fid:
+          ResultCache.cache = json.load(fid)
+      except (IOError, OSError, ValueError):
+        pass
+
+    return ResultCache.cache
+
+  '''
+  Save the given results in the cache file. The file is read again before the
+  results are added, so results of other processes aren't lost, outdated results
+  are removed and the file is written under a temporary name and renamed
+  afterwards. A result that is already in the cache keeps the time it was
+  measured, so reused results still expire.
+
+  @param results - Dictionary with the cache key as key and the result as value.
+  '''
+  @staticmethod
+  def Save(results):
+    if not results:
+      return
+
+    files = ResultCache.Load()["files"]
+    ResultCache.cache = None
+    cache = ResultCache.Load()
+    cache["files"].update(files)
+
+    now = time.time()
+    for key, result in results.items():
+      entry = cache["results"].get(key)
+      if entry is not None and now - entry["time"] <= ResultCache.MAX_AGE and \
+          json.dumps(entry["result"], sort_keys=True) == json.dumps(result,
+          sort_keys=True, default=Serialize):
+        continue
+      cache["results"][key] = {"time": now, "result": result}
+    for key in [k for k, v in cache["results"].items()
+        if now - v["time"] > ResultCache.MAX_AGE]:
+      del cache["results"][key]
+
+    try:
+      path = os.path.dirname(ResultCache.CACHE_FILE)
+      if path and not os.path.exists(path):
+        os.makedirs(path)
+
+      tmpFile = ResultCache.CACHE_FILE + "." + str(os.getpid()) + ".tmp"
+      with open(tmpFile, "w") as fid:
+        json.dump(cache, fid, default=Serialize)
+      os.replace(tmpFile, ResultCache.CACHE_FILE)
+    except OSError as e:
+      Log.Warn("Could not save the result cache: " + str(e))
+
+  '''
+  Get the hash of the contents of the given file. The hash is saved together
+  with the size and the modification time of the file, so an unmodified file
+  isn't read again.
+
+  @param path - The location of the file.
+  @return The hash as hex string or None if the file doesn't exist.
+  '''
+  @staticmethod
+  def FileHash(path):
+    path = os.path.realpath(path)
+    try:
+      stat = os.stat(path)
+    except OSError:
+      return None
+
+    files = ResultCache.Load()["files"]
+    state = [stat.st_size, stat.st_mtime]
+    if path in files and files[path][0] == state:
+      return files[path][1]
+
+    sha = hashlib.sha1()
+    with open(path, "rb") as fid:
+      for chunk in iter(lambda: fid.read(1 << 20), b""):
+        sha.update(chunk)
+
+    files[path] = [state, sha.hexdigest()]
+    return files[path][1]
+
+  '''
+  Get the cache key of a benchmark job.
+
+  @param version - The version of the library.
+  @param script - The location of the benchmark script.
+  @param dataset - The dataset as given in the config, a file or a list of
+  files.
+  @param settings - List of the other settings that determine the result, e.g.
+  the method, the options and the number of trials.
+  @return The cache key or None if the result can't be cached.
+  '''
+  @staticmethod
+  def Key(version, script, dataset, settings):
+    if version is None or str(version) in ResultCache.UNVERSIONED:
+      return None
+
+    scriptHash = ResultCache.FileHash(script)
+    if scriptHash is None:
+      return None
+
+    datasets = [dataset] if isinstance(dataset, str) else dataset
+    datasetHashes = [ResultCache.FileHash(d) or d for d in datasets]
+
+    key = json.dumps([str(version), scriptHash, datasetHashes, settings],
+        sort_keys=True)
+    return hashlib.sha1(key.encode("UTF-8")).hexdigest()
+
+  '''
+  Get the cached result of the given key.
+
+  @param key - The cache key.
+  @return The cached result or None if the result isn't in the cache.
+  '''
+  @staticmethod
+  def Get(key):
+    if key is None:
+      return None
+
+    entry = ResultCache.Load()["results"].get(key)
+    if entry is None or time.time() - entry["time"] > ResultCache.MAX_AGE:
+      return None
+    return entry["result"]
+
+  '''
+  Check if the given result can be cached, timeouts and failures are measured
+  again.
+
+  @param result - The result of the job.
+  @return True if the result can be cached.
+  '''
+  @staticmethod
+  def Cacheable(result):
+    if not result or not result["metrics"]:
+      return False
+
+    runtime = result["metrics"].get("Runtime")
+    return isinstance(runtime, (int, float)) and not isinstance(runtime, bool)
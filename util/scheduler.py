@@ -0,0 +1,263 @@
+'''
+  @file scheduler.py
+  @author Marcus Edel
+
+  Class to run independent benchmark jobs on a pool of worker processes.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from environment import *
+
+import shutil
+from multiprocessing import Process, Pipe
+from multiprocessing.connection import wait
+
+'''
+The worker loop. Every worker is pinned to its own set of cores and works in its
+own directory, so that scripts which write temporary files into the current
+working directory (e.g. 'predictions.csv') don't clobber each other.
+
+@param fun - The function to call for every job.
+@param cpus - The cores the worker (and all its children) is allowed to use.
+@param workdir - The working directory of the worker.
+@param conn - Connection to receive the jobs and to send the results.
+'''
+def Worker(fun, cpus, workdir, conn):
+  if cpus:
+    os.sched_setaffinity(0, cpus)
+  if workdir:
+    os.chdir(workdir)
+
+  while True:
+    job = conn.recv()
+    if job is None:
+      break
+
+    try:
+      result = fun(job)
+    except Exception as e:
+      result = Exception(str(e))
+    conn.send(result)
+
+'''
+This class implements a simple job scheduler. The jobs are independent of each
+other, so they can be executed in any order, but the results are always returned
+in the order of the given job list.
+'''
+class Scheduler(object):
+
+  '''
+  Create the scheduler instance.
+
+  @param fun - The function to call for every job, the function has to return
+  the result of the job.
+  @param workers - The number of worker processes, if the number of workers is 1
+  the jobs are executed in the current process.
+  @param workdir - Directory which is used to create the worker directories.
+  '''
+  def __init__(self, fun, workers=1, workdir="reports/etc/workers"):
+    self.fun = fun
+    self.workdir = workdir
+    self.cpuSets = []
+
+    if workers > 1:
+      self.cpuSets = Scheduler.CPUSets(workers)
+
+    self.workers = max(1, len(self.cpuSets))
+
+  # The hardware threads that share a physical core with the given cpu.
+  SIBLINGS = "/sys/devices/system/cpu/cpu{0}/topology/thread_siblings_list"
+
+  '''
+  Group the given cpus by physical core. The hardware threads of a core share
+  the execution units and the caches, so workers on sibling threads would slow
+  each other down. If the topology isn't available every cpu is its own core.
+
+  @param cpus - The sorted list of cpus.
+  @return List of cores, every core is the sorted list of its cpus.
+  '''
+  @staticmethod
+  def Cores(cpus):
+    cores = []
+    assigned = set()
+    for cpu in cpus:
+      if cpu in assigned:
+        continue
+
+      siblings = Environment.Read(Scheduler.SIBLINGS.format(cpu))
+      siblings = Environment.ParseCPUList(siblings) if siblings else [cpu]
+
+      core = sorted(set(siblings).intersection(cpus).union([cpu]))
+      assigned.update(core)
+      cores.append(core)
+    return cores
+
+  '''
+  Split the available cores into disjoint sets, one set for every worker. Every
+  worker gets whole physical cores, so the hardware threads of a core are never
+  shared between workers.
+
+  @param workers - The number of sets.
+  @return List of core sets.
+  '''
+  @staticmethod
+  def CPUSets(workers):
+    try:
+      cpus = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+      Log.Warn("CPU affinity not supported on this platform.")
+      return [None for x in range(workers)]
+
+    cores = Scheduler.Cores(cpus)
+    if workers > len(cores):
+      Log.Warn("Only " + str(len(cores)) + " physical cores available, use " +
+          str(len(cores)) + " workers.")
+      workers = len(cores)
+
+    size = len(cores) // workers
+    return [sum(cores[i * size:(i + 1) * size], []) for i in range(workers)]
+
+  '''
+  Create the working directory of a worker. The directory contains links to
+  everything in the current working directory, so that the relative paths used
+  in the config and in the scripts are still valid.
+
+  @param path - The path of the working directory.
+  @return The path of the working directory.
+  '''
+  def CreateWorkingDirectory(self, path):
+    root = os.getcwd()
+    self.RemoveWorkingDirectory(path)
+    os.makedirs(path)
+
+    for entry in os.listdir(root):
+      if not entry.startswith("."):
+        os.symlink(os.path.join(root, entry), os.path.join(path, entry))
+
+    return path
+
+  '''
+  Remove the working directory of a worker. Remove the links first, so we don't
+  follow them.
+
+  @param path - The path of the working directory.
+  '''
+  def RemoveWorkingDirectory(self, path):
+    if not os.path.isdir(path):
+      return
+
+    for entry in os.listdir(path):
+      if os.path.islink(os.path.join(path, entry)):
+        os.unlink(os.path.join(path, entry))
+    shutil.rmtree(path, ignore_errors=True)
+
+  '''
+  Start a new worker process.
+
+  @param workerId - The id of the worker.
+  @return Tuple that contains the process instance and the connection.
+  '''
+  def StartWorker(self, workerId):
+    workdir = os.path.abspath(os.path.join(self.workdir, str(workerId)))
+    if not os.path.isdir(workdir):
+      self.CreateWorkingDirectory(workdir)
+
+    conn, workerConn = Pipe()
+    p = Process(target=Worker, args=(self.fun, self.cpuSets[workerId], workdir,
+        workerConn))
+    p.start()
+    workerConn.close()
+    return (p, conn)
+
+  '''
+  Execute the given jobs. If the function raises an exception, the exception is
+  returned as result of the job.
+
+  @param jobs - List of jobs.
+  @return Generator that yields the results in the order of the given jobs.
+  '''
+  def Run(self, jobs):
+    if self.workers == 1:
+      for job in jobs:
+        try:
+          result = self.fun(job)
+        except Exception as e:
+          result = Exception(str(e))
+        yield result
+      return
+
+    Log.Info("Run " + str(len(jobs)) + " jobs on " + str(self.workers) +
+        " workers.")
+
+    pending = iter(enumerate(jobs))
+    workers = [self.StartWorker(i) for i in range(self.workers)]
+    running = {}
+    results = {}
+    current = 0
+
+    # Send the next job to the given worker or stop the worker if there are no
+    # jobs left.
+    def Dispatch(workerId):
+      try:
+        index, job = next(pending)
+      except StopIteration:
+        workers[workerId][1].send(None)
+      else:
+        running[workerId] = index
+        workers[workerId][1].send(job)
+
+    try:
+      for workerId in range(self.workers):
+        Dispatch(workerId)
+
+      while current < len(jobs):
+        ready = wait([workers[i][1] for i in running] +
+            [workers[i][0].sentinel for i in running])
+
+        for workerId, (p, conn) in enumerate(workers):
+          if workerId not in running:
+            continue
+
+          if conn in ready:
+            try:
+              results[running[workerId]] = conn.recv()
+            except EOFError:
+              pass
+            else:
+              del running[workerId]
+              Dispatch(workerId)
+              continue
+
+          # The worker died while processing the job, so the job failed and we
+          # restart the worker.
+          if p.sentinel in ready:
+            p.join()
+            results[running.pop(workerId)] = Exception(
+                "Worker exited with code " + str(p.exitcode))
+            workers[workerId] = self.StartWorker(workerId)
+            Dispatch(workerId)
+
+        # Return the results in the order of the jobs.
+        while current in results:
+          yield results.pop(current)
+          current += 1
+    finally:
+      for p, conn in workers:
+        if p.is_alive():
+          p.terminate()
+        p.join()
+        conn.close()
+
+      for i in range(self.workers):
+        self.RemoveWorkingDirectory(os.path.join(self.workdir, str(i)))
@@ -0,0 +1,335 @@
+'''
+  @file sweep.py
+  @author Marcus Edel
+
+  Class to expand the parameter sweeps of a method block.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+
+import itertools
+import json
+import math
+import random
+import re
+
+'''
+This class implements the parameter sweeps. Every option with a value like
+"sweep(begin, step, end)" is swept, the plan of the sweep is set with the
+'sweep_plan' option:
+
+  grid - The cartesian product of all swept options (default).
+  random(n[, seed]) - n points sampled uniformly from the sweep ranges.
+  lhs(n[, seed]) - n points of a latin hypercube, every option range is split
+  into n strata and every stratum is used once.
+  adaptive(n[, tolerance[, metric]]) - A one-dimensional sweep that starts
+  with a few evenly spaced points and bisects the intervals where the metric
+  (default 'Runtime') changes the most, until the change of every interval is
+  below tolerance times the range of the metric or n points are measured.
+
+The sampled points are snapped to the step of the sweep, so every point is also
+a point of the grid. The sweep step of a point is its index in the list of
+points (see Points), for the grid and the adaptive plans this is the index in
+the grid, for the random plans the index in the sampled list. The points are
+stored with the sweep, so the steps of the random plans can be mapped back to
+the option values. A sweep with a single option and the grid plan is the same as
+the old one-dimensional sweep.
+'''
+class Sweep(object):
+
+  # The option that sets the plan of the sweep, it isn't passed to the method.
+  PLAN_OPTION = "sweep_plan"
+
+  # The default seed of the random plans, so a sweep always has the same points.
+  SEED = 0
+
+  # The number of points of the first round of an adaptive sweep.
+  ADAPTIVE_POINTS = 5
+
+  # The default tolerance of an adaptive sweep.
+  TOLERANCE = 0.05
+
+  SWEEP_PATTERN = re.compile(r"sweep\([ \t]*(?P<begin>[-0-9.e]*),[ \t]*"
+      r"(?P<step>[-0-9.e]*)[ \t]*,[ \t]*(?P<end>[-0-9.e]*)[ \t]*\)")
+
+  PLAN_PATTERN = re.compile(r"^[ \t]*(?P<plan>grid|random|lhs)[ \t]*"
+      r"(\([ \t]*(?P<count>[0-9]+)[ \t]*(,[ \t]*(?P<seed>[0-9]+)[ \t]*)?\))?"
+      r"[ \t]*$")
+
+  ADAPTIVE_PATTERN = re.compile(r"^[ \t]*adaptive[ \t]*\([ \t]*"
+      r"(?P<count>[0-9]+)[ \t]*(,[ \t]*(?P<tolerance>[0-9.e-]+)[ \t]*"
+      r"(,[ \t]*(?P<metric>[A-Za-z0-9_]+)[ \t]*)?)?\)[ \t]*$")
+
+  '''
+  Create the sweep.
+
+  @param axes - List of tuples that contain the name of the swept option, the
+  type ('int' or 'float'), the begin, the step and the end of the sweep (as
+  strings, the way they are written in the config).
+  @param plan - The name of the plan ('grid', 'random', 'lhs' or 'adaptive').
+  @param count - The number of points of the random and the adaptive plans.
+  @param seed - The seed of the random plans.
+  @param tolerance - The tolerance of the adaptive plan.
+  @param metric - The metric that is refined by the adaptive plan.
+  '''
+  def __init__(self, axes, plan="grid", count=None, seed=SEED,
+      tolerance=TOLERANCE, metric="Runtime"):
+    self.axes = axes
+    self.plan = plan
+    self.count = count
+    self.seed = seed
+    self.tolerance = tolerance
+    self.metric = metric
+    self.points = None
+
+  '''
+  Convert the given string to a number.
+
+  @param s - The string to convert.
+  @return The int or float value.
+  '''
+  @staticmethod
+  def ToNum(s):
+    try:
+      return int(s)
+    except ValueError:
+      return float(s)
+
+  '''
+  Parse the sweeps of the given options.
+
+  @param options - The options of the method block.
+  @return The sweep or None if no option is swept.
+  '''
+  @staticmethod
+  def Parse(options):
+    axes = []
+    for k, v in options.items():
+      if k == Sweep.PLAN_OPTION or "sweep" not in str(v):
+        continue
+
+      m = Sweep.SWEEP_PATTERN.match(str(v))
+      if not m:
+        Log.Fatal("cannot parse sweep: " + str(v))
+        raise Exception("cannot parse sweep")
+
+      begin, step, end = m.group("begin"), m.group("step"), m.group("end")
+
+      # Get the type of the sweep.
+      try:
+        int(begin), int(step), int(end)
+        sweepType = 'int'
+      except ValueError:
+        try:
+          float(begin), float(step), float(end)
+          sweepType = 'float'
+        except ValueError:
+          Log.Fatal("cannot parse sweep: " + str(v))
+          raise Exception("cannot parse sweep")
+
+      # Descending sweeps have a negative step, the step has to point from the
+      # begin to the end of the sweep.
+      if float(step) == 0 or (float(end) - float(begin)) * float(step) < 0:
+        Log.Fatal("invalid sweep range: " + str(v))
+        raise Exception("invalid sweep range")
+
+      axes.append((k, sweepType, begin, step, end))
+
+    plan = str(options.get(Sweep.PLAN_OPTION, "grid"))
+    m = Sweep.ADAPTIVE_PATTERN.match(plan)
+    if m:
+      if len(axes) > 1:
+        Log.Fatal("adaptive sweeps support a single swept option: " +
+            str(options))
+        raise Exception("adaptive sweep with several swept options")
+      if not axes:
+        return None
+
+      tolerance = float(m.group("tolerance")) if m.group("tolerance") else \
+          Sweep.TOLERANCE
+      return Sweep(axes, "adaptive", max(2, int(m.group("count"))),
+          tolerance=tolerance, metric=m.group("metric") or "Runtime")
+
+    m = Sweep.PLAN_PATTERN.match(plan)
+    if not m or (m.group("plan") != "grid" and not m.group("count")):
+      Log.Fatal("cannot parse sweep plan: " + plan)
+      raise Exception("cannot parse sweep plan")
+
+    if not axes:
+      return None
+
+    count = int(m.group("count")) if m.group("count") else None
+    seed = int(m.group("seed")) if m.group("seed") else Sweep.SEED
+    return Sweep(axes, m.group("plan"), count, seed)
+
+  '''
+  Get the number of grid points of the given axis.
+
+  @param axis - The axis of the sweep.
+  @return The number of points.
+  '''
+  @staticmethod
+  def Length(axis):
+    name, sweepType, begin, step, end = axis
+    return int(math.ceil((float(end) - float(begin)) / float(step))) + 1
+
+  '''
+  Get the value of the given grid point of the given axis.
+
+  @param axis - The axis of the sweep.
+  @param index - The index of the grid point.
+  @return The value of the option.
+  '''
+  @staticmethod
+  def Value(axis, index):
+    name, sweepType, begin, step, end = axis
+    return Sweep.ToNum(begin) + Sweep.ToNum(step) * index
+
+  '''
+  Get the grid indices of n points of a latin hypercube or of n random points.
+
+  @param lengths - The number of grid points of every axis.
+  @return List of index tuples.
+  '''
+  def Sample(self, lengths):
+    rng = random.Random(self.seed)
+    columns = []
+    for length in lengths:
+      if self.plan == "lhs":
+        strata = list(range(self.count))
+        rng.shuffle(strata)
+        positions = [(s + rng.random()) / self.count for s in strata]
+      else:
+        positions = [rng.random() for i in range(self.count)]
+
+      # Snap the position in [0, 1) to the nearest grid point.
+      columns.append([min(length - 1, int(round(p * (length - 1))))
+          for p in positions])
+
+    # Remove duplicates, but keep the order of the points.
+    indices = []
+    for index in zip(*columns):
+      if index not in indices:
+        indices.append(index)
+    return indices
+
+  '''
+  Get the points of the sweep. The points of an adaptive sweep are all grid
+  points, the sweep measures only the points selected by Initial and Refine.
+
+  @return List of dictionaries, every dictionary maps the swept options to the
+  values of the point.
+  '''
+  def Points(self):
+    if self.points is None:
+      lengths = [Sweep.Length(axis) for axis in self.axes]
+      if self.plan in ("grid", "adaptive"):
+        indices = itertools.product(*[range(length) for length in lengths])
+      else:
+        indices = self.Sample(lengths)
+
+      self.points = [dict((axis[0], Sweep.Value(axis, i)) for axis, i in
+          zip(self.axes, index)) for index in indices]
+
+    return self.points
+
+  '''
+  Get the points of the first round of the adaptive sweep, evenly spaced points
+  that contain the first and the last grid point.
+
+  @return List of the sweep steps.
+  '''
+  def Initial(self):
+    length = Sweep.Length(self.axes[0])
+    n = min(length, self.count, Sweep.ADAPTIVE_POINTS)
+    if n <= 1:
+      return [0]
+    return sorted(set(int(round(k * (length - 1) / float(n - 1)))
+        for k in range(n)))
+
+  '''
+  Get the points of the next round of the adaptive sweep. The intervals between
+  the measured points are bisected, the intervals with the largest change of
+  the metric first, as long as the change is larger than the tolerance (relative
+  to the range of the metric) and the budget isn't used up.
+
+  @param values - Dictionary with the sweep step as key and the metric as value
+  (None if the metric isn't available, e.g. because of a timeout).
+  @return List of the sweep steps to measure, empty if the sweep is finished.
+  '''
+  def Refine(self, values):
+    budget = self.count - len(values)
+    numeric = [v for v in values.values() if v is not None]
+    if budget <= 0 or len(numeric) < 2:
+      return []
+
+    scale = max(numeric) - min(numeric)
+    if scale == 0:
+      return []
+
+    intervals = []
+    steps = sorted(values)
+    for i, j in zip(steps, steps[1:]):
+      if j - i > 1 and values[i] is not None and values[j] is not None:
+        change = abs(values[j] - values[i]) / scale
+        if change > self.tolerance:
+          intervals.append((change, i, j))
+
+    intervals.sort(reverse=True)
+    return [(i + j) // 2 for change, i, j in intervals[:budget]]
+
+  '''
+  Get the options of the given point.
+
+  @param options - The options of the method block.
+  @param point - The point of the sweep (see Points).
+  @return The options that are passed to the method.
+  '''
+  @staticmethod
+  def Options(options, point):
+    runOptions = dict((k, v) for k, v in options.items()
+        if k != Sweep.PLAN_OPTION)
+    runOptions.update(point)
+    return runOptions
+
+  '''
+  Describe the given point.
+
+  @param point - The point of the sweep (see Points).
+  @return String like 'k: 3, leaf_size: 20'.
+  '''
+  def Describe(self, point):
+    return ", ".join(axis[0] + ": " + str(point[axis[0]]) for axis in self.axes)
+
+  '''
+  Get the columns of the sweep record in the database. The one-dimensional grid
+  sweep is stored the way it always was, the other sweeps store the first axis
+  in the old columns and the complete description in the parameters and the
+  plan column.
+
+  @return Tuple that contains the type, the begin, the step, the end, the
+  parameters and the plan of the sweep.
+  '''
+  def Record(self):
+    name, sweepType, begin, step, end = self.axes[0]
+    if len(self.axes) == 1 and self.plan == "grid":
+      return (sweepType, begin, step, end, "", "")
+
+    plan = self.plan
+    if self.plan == "adaptive":
+      plan += "(" + str(self.count) + ", " + str(self.tolerance) + ", " + \
+          self.metric + ")"
+    elif self.plan != "grid":
+      plan += "(" + str(self.count) + ", " + str(self.seed) + ")"
+    return (sweepType, begin, step, end, json.dumps(self.axes), plan)
@@ -37,11 +37,11 @@ class SystemInfo(object):
   @staticmethod
   def GetMemory():
     if sys.platform.startswith("posix") or sys.platform.startswith("linux"):
-      cmd = "free -m"
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT, shell=True)
-
-      mem = s.decode().split('\n')[1].split()[1]
-      return str(float(mem) / 1024) + ' GB'
+      with open("/proc/meminfo", "r") as fid:
+        for line in fid:
+          if line.startswith("MemTotal:"):
+            return str(float(line.split()[1]) / 1024 / 1024) + ' GB'
+      return 'N/A'
 
     elif sys.platform.startswith('darwin'):
       cmd = shlex.split("sysctl -n hw.memsize")
@@ -61,10 +61,9 @@ class SystemInfo(object):
   @staticmethod
   def GetCPUModel():
     if sys.platform.startswith('posix') or sys.platform.startswith('linux'):
-      cmd = 'cat /proc/cpuinfo'
-      s = subprocess.check_output(cmd, stderr=subprocess.STDOUT,
-          shell=True).strip()
-      for line in s.decode().split("\n"):
+      with open("/proc/cpuinfo", "r") as fid:
+        lines = fid.read().strip().split("\n")
+      for line in lines:
         if "model name" in line:
           modelName = re.sub( ".*model name.*:", "", line, 1)
           return modelName
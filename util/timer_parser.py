@@ -0,0 +1,269 @@
+'''
+  @file timer_parser.py
+  @author Marcus Edel
+
+  Class to parse the timer output of the benchmark executables.
+'''
+
+import os
+import sys
+import inspect
+
+# Import the util path, this method even works if the path contains symlinks to
+# modules.
+cmd_subfolder = os.path.realpath(os.path.abspath(os.path.join(
+  os.path.split(inspect.getfile(inspect.currentframe()))[0], "")))
+if cmd_subfolder not in sys.path:
+  sys.path.insert(0, cmd_subfolder)
+
+from log import *
+from resource_usage import *
+from perf_counters import *
+
+import collections
+import json
+import re
+import select
+import signal
+import subprocess
+import time
+import timeit
+
+'''
+This class implements an incremental parser for the verbose output of the
+mlpack executables. The output is parsed line by line, so the parser works on
+streamed output and doesn't depend on the order of the timers. The parser
+understands two formats:
+
+  - The key/value timer lines, e.g. "[INFO ]   tree_building: 0.012345s".
+  - A JSON timer dump on a single line, e.g. '{"timers": {"total_time": 1.2}}'.
+
+Besides the timers the parser collects the values of the patterns in VALUES,
+e.g. the number of base cases.
+'''
+class TimerParser(object):
+
+  # Escape sequences used to color the output.
+  COLOR = re.compile(r"\x1b\[[0-9;]*m")
+
+  # The log level prefix of a line, e.g. "[INFO ] ".
+  PREFIX = re.compile(r"^\s*(\[[A-Z ]+\]\s*)?")
+
+  # A single timer line, the value is followed by an optional human readable
+  # representation, e.g. "total_time: 61.5s (1 mins, 1.5 secs)".
+  TIMER = re.compile(r"""^(?P<name>[\w\-\./]+):\s+
+      (?P<value>\d+(?:[\.,]\d+)?(?:[eE][-+]?\d+)?)s(?:\s|\(|$)""", re.VERBOSE)
+
+  # Other values to collect from the output.
+  VALUES = {"base_cases": re.compile(r"(\d+) base cases were calculated")}
+
+  '''
+  Create the parser.
+  '''
+  def __init__(self):
+    self.timers = collections.OrderedDict()
+    self.values = collections.OrderedDict()
+    self.usage = {}
+    self.buffer = b""
+
+  '''
+  Parse the next chunk of the output. Only complete lines are parsed, the rest
+  is kept until the next chunk arrives.
+
+  @param data - The next chunk of the output as byte string.
+  '''
+  def Feed(self, data):
+    self.buffer += data
+    lines = self.buffer.split(b"\n")
+    self.buffer = lines.pop()
+
+    for line in lines:
+      self.ParseLine(line.decode("UTF-8", "replace"))
+
+  '''
+  Parse the rest of the output.
+  '''
+  def Close(self):
+    if self.buffer:
+      self.ParseLine(self.buffer.decode("UTF-8", "replace"))
+      self.buffer = b""
+
+  '''
+  Parse a single line of the output.
+
+  @param line - The line to parse.
+  '''
+  def ParseLine(self, line):
+    line = TimerParser.PREFIX.sub("", TimerParser.COLOR.sub("", line)).rstrip()
+
+    if line.startswith("{"):
+      try:
+        dump = json.loads(line)
+      except ValueError:
+        dump = None
+
+      if isinstance(dump, dict) and isinstance(dump.get("timers"), dict):
+        for name, value in dump["timers"].items():
+          self.timers[name] = TimerParser.ToSeconds(value)
+        return
+
+    match = TimerParser.TIMER.match(line)
+    if match:
+      self.timers[match.group("name")] = TimerParser.ToSeconds(
+          match.group("value"))
+      return
+
+    for name, pattern in TimerParser.VALUES.items():
+      match = pattern.search(line)
+      if match:
+        self.values[name] = int(match.group(1))
+
+  '''
+  Convert a timer value into seconds.
+
+  @param value - The timer value (number or string with an optional 's').
+  @return The value in seconds.
+  '''
+  @staticmethod
+  def ToSeconds(value):
+    if isinstance(value, str):
+      value = float(value.rstrip("s").replace(",", "."))
+    return float(value)
+
+  '''
+  Get the value of the given timer or collected value.
+
+  @param name - The name of the timer or value.
+  @return The value or -1 if the output doesn't contain the value.
+  '''
+  def Get(self, name):
+    if name in self.timers:
+      return self.timers[name]
+    return self.values.get(name, -1)
+
+  '''
+  Get the given timers.
+
+  @param names - The names of the timers.
+  @return Namedtuple that contains the timer data or -1 in case of an error.
+  '''
+  def Timer(self, names):
+    missing = [name for name in names if name not in self.timers]
+    if missing:
+      Log.Fatal("Can't parse the data: missing timers " + ", ".join(missing))
+      return -1
+
+    timer = collections.namedtuple("timer", names)
+    return timer(*[self.timers[name] for name in names])
+
+  '''
+  Get all timers and values as metrics, the names are converted to the metric
+  naming scheme, e.g. 'tree_building' becomes 'TreeBuilding'. If the command was
+  executed by Run, the metrics contain the resource usage of the command (see
+  ResourceUsage).
+
+  @return Dictionary that contains the metrics.
+  '''
+  def Metrics(self):
+    metrics = dict(self.usage)
+    for values in [self.timers, self.values]:
+      for name, value in values.items():
+        key = "".join(s[:1].upper() + s[1:] for s in re.split(r"[_\W]+", name))
+        metrics[key] = value
+    return metrics
+
+  '''
+  Parse the given output.
+
+  @param data - The output as byte string.
+  @return The parser that contains the timers.
+  '''
+  @staticmethod
+  def Parse(data):
+    parser = TimerParser()
+    parser.Feed(data)
+    parser.Close()
+    return parser
+
+  '''
+  Wait for the given process with wait4(), so we get the resource usage of the
+  process.
+
+  @param process - Popen instance.
+  @param deadline - The time of the timeout or None for no timeout.
+  @return The rusage structure of the process.
+  '''
+  @staticmethod
+  def Wait(process, deadline):
+    while True:
+      pid, status, usage = os.wait4(process.pid,
+          os.WNOHANG if deadline is not None else 0)
+      if pid:
+        # Popen doesn't wait for the reaped process again.
+        process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) \
+            else os.WEXITSTATUS(status)
+        return usage
+
+      if timeit.default_timer() >= deadline:
+        raise subprocess.TimeoutExpired(process.args, 0)
+      time.sleep(0.001)
+
+  '''
+  Run the given command and parse the output (stdout and stderr) while the
+  command is running, so the output is never buffered as a whole. The resource
+  usage of the command is collected as well, and the hardware performance
+  counters if they are enabled (see PerfCounters).
+
+  @param cmd - The command to execute.
+  @param timeout - The time until the timeout, 0 or None for no timeout.
+  @return The parser that contains the timers.
+  '''
+  @staticmethod
+  def Run(cmd, timeout=None):
+    parser = TimerParser()
+    deadline = None
+    if timeout:
+      deadline = timeit.default_timer() + timeout
+
+    # perf doesn't stop the command if it's killed, so the command is started
+    # in its own process group and the whole group is killed.
+    command, perfOutput = PerfCounters.Wrap(cmd)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT, shell=False,
+        start_new_session=perfOutput is not None)
+    fd = process.stdout.fileno()
+
+    try:
+      while True:
+        if deadline is not None:
+          remaining = deadline - timeit.default_timer()
+          if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise subprocess.TimeoutExpired(cmd, timeout)
+
+        data = os.read(fd, 65536)
+        if not data:
+          break
+        parser.Feed(data)
+      parser.Close()
+
+      try:
+        parser.usage = ResourceUsage.Metrics(TimerParser.Wait(process,
+            deadline))
+      except subprocess.TimeoutExpired:
+        raise subprocess.TimeoutExpired(cmd, timeout)
+      if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+      if perfOutput:
+        parser.usage.update(PerfCounters.Parse(perfOutput))
+    finally:
+      if process.poll() is None:
+        if perfOutput:
+          os.killpg(process.pid, signal.SIGKILL)
+        else:
+          process.kill()
+        process.wait()
+      process.stdout.close()
+      if perfOutput and os.path.isfile(perfOutput):
+        os.remove(perfOutput)
+
+    return parser